@@ -1,44 +1,148 @@
-#!/usr/bin/env python3
-
-import rospy2
-from std_msgs.msg import String
-from gpiozero import Motor
-
-# Initialize the motors
-right_motor = Motor(forward=17, backward=18)
-left_motor = Motor(forward=22, backward=23)
-
-
-def move_forward():
-    right_motor.forward()
-    left_motor.forward()
-
-
-def move_backward():
-    right_motor.backward()
-    left_motor.backward()
-
-
-def stop_motors():
-    right_motor.stop()
-    left_motor.stop()
-
-
-def command_callback(msg):
-    command = msg.data
-    if command == "forward":
-        move_forward()
-    elif command == "backward":
-        move_backward()
-    elif command == "stop":
-        stop_motors()
-
-
-def main():
-    rospy2.init_node('motor_control_node', anonymous=True)
-    rospy2.Subscriber('/cmd_vel', String, command_callback)
-    rospy2.spin()
-
-
-if _name_ == '_main_':
-    main()
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import threading
+import time
+import rospy2
+from std_msgs.msg import String
+from hal import Drive, open_drive
+from scheduler import LatencyHistogram
+
+# Command string -> drive method; anything else is counted and ignored
+COMMANDS = {
+    "forward": Drive.forward,
+    "backward": Drive.backward,
+    "stop": Drive.stop,
+}
+
+LATENCY_EDGES_MS = (0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 50)
+
+
+class Mailbox:
+    """Single-slot handoff between threads: a new item replaces one not yet taken."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._item = None
+        self.overwritten = 0  # Items replaced before the reader got to them
+
+    def put(self, item):
+        with self._condition:
+            if self._item is not None:
+                self.overwritten += 1
+            self._item = item
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Take the item, waiting up to ``timeout`` seconds for one; None if none came."""
+        with self._condition:
+            if self._item is None:
+                self._condition.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+
+class MotorActuator:
+    """Drives the motors from its own thread, fed through a latest-wins Mailbox.
+
+    ``submit()`` only drops the command in the mailbox, so the subscriber
+    callback returns at once; a burst of commands collapses into the newest
+    one instead of queueing motor writes. If the drive is moving and no
+    known command has been applied for ``watchdog`` seconds (publishers are
+    expected to repeat their command), the motors are stopped. ``latency`` records the
+    time from ``submit()`` to the drive call returning.
+    """
+
+    def __init__(self, drive, watchdog=0.5, clock=time.monotonic):
+        self.drive = drive
+        self.watchdog = watchdog  # None disables it
+        self.clock = clock
+        self.mailbox = Mailbox()
+        self.latency = LatencyHistogram(LATENCY_EDGES_MS)
+        self.actuated = 0
+        self.unknown = 0
+        self.watchdog_stops = 0
+        self.last_command = clock()
+        self.running = False
+        self.thread = None
+
+    def submit(self, command):
+        self.mailbox.put((command, self.clock()))
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="motor-actuator", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread and then the motors."""
+        self.running = False
+        if self.thread is not None:
+            self.mailbox.put(None)  # Wake it up
+            self.thread.join()
+            self.thread = None
+        self.drive.stop()
+
+    def _run(self):
+        wait = self.watchdog / 4 if self.watchdog else None
+        while self.running:
+            item = self.mailbox.get(wait)
+            if item is not None:
+                self._actuate(*item)
+            # Checked on every pass, so a stream of messages that are not commands cannot keep the motors running
+            if self.watchdog and self.drive.is_moving() and self.clock() - self.last_command > self.watchdog:
+                self.drive.stop()
+                self.watchdog_stops += 1
+                logging.warning("No motor command for %.2fs: motors stopped", self.watchdog)
+
+    def _actuate(self, command, submitted):
+        action = COMMANDS.get(command)
+        if action is None:
+            self.unknown += 1
+            logging.warning("Unknown motor command: %r", command)
+            return
+        action(self.drive)
+        self.last_command = now = self.clock()  # Only a command actually applied feeds the watchdog
+        self.actuated += 1
+        self.latency.record((now - submitted) * 1000)
+
+    def report(self):
+        return (f"{self.actuated} actuated, {self.mailbox.overwritten} superseded, {self.unknown} unknown, "
+                f"{self.watchdog_stops} watchdog stops; latency {self.latency.summary()}")
+
+
+# Fed by the subscriber; started by main()
+actuator = None
+
+
+def command_callback(msg):
+    actuator.submit(msg.data)
+
+
+def main(argv=None):
+    global actuator
+    parser = argparse.ArgumentParser(description="Drive the rover motors from /cmd_vel commands.")
+    parser.add_argument('--backend', choices=('gpiozero', 'gpiozero-mock', 'mock'), default='gpiozero',
+                        help="motor backend; the mock ones need no Pi")
+    parser.add_argument('--watchdog', type=float, default=0.5,
+                        help="seconds without a command before the motors are stopped (0 disables it)")
+    args, _ = parser.parse_known_args(argv)  # ROS appends its own remapping arguments
+
+    drive = open_drive(args.backend)
+    actuator = MotorActuator(drive, watchdog=args.watchdog or None).start()
+    try:
+        rospy2.init_node('motor_control_node', anonymous=True)
+        rospy2.Subscriber('/cmd_vel', String, command_callback)
+        rospy2.spin()
+    finally:
+        actuator.stop()
+        drive.close()
+        print(f"Motor node: {actuator.report()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,72 +1,353 @@
-import pygame
-import sys
-
-# Initialize Pygame
-pygame.init()
-
-# Constants
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-ROVER_SIZE = 20
-ROVER_COLOR = (0, 128, 255)
-BACKGROUND_COLOR = (200, 200, 200)
-GPS_SCALE = 0.1  # Scale for GPS coordinates to fit the screen
-
-# Setup Display
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("SIH Rover GPS Navigation")
-
-# Rover Class
-class Rover:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-
-    def move(self, dx, dy):
-        self.x += dx
-        self.y += dy
-
-    def draw(self):
-        pygame.draw.rect(screen, ROVER_COLOR, (self.x, self.y, ROVER_SIZE, ROVER_SIZE))
-
-    def get_gps_coordinates(self):
-        # Convert screen coordinates to GPS-like coordinates
-        return (self.x * GPS_SCALE, self.y * GPS_SCALE)
-
-# Initialize Rover
-rover = Rover(100, 100)
-
-# Main loop
-clock = pygame.time.Clock()
-
-while True:
-    # Event Handling
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-
-    # Input Handling
-    keys = pygame.key.get_pressed()
-    if keys[pygame.K_LEFT]:
-        rover.move(-5, 0)
-    if keys[pygame.K_RIGHT]:
-        rover.move(5, 0)
-    if keys[pygame.K_UP]:
-        rover.move(0, -5)
-    if keys[pygame.K_DOWN]:
-        rover.move(0, 5)
-
-    # Clear Screen
-    screen.fill(BACKGROUND_COLOR)
-
-    # Draw Rover
-    rover.draw()
-
-    # Print GPS Coordinates
-    gps_coordinates = rover.get_gps_coordinates()
-    print(f"GPS Coordinates: X={gps_coordinates[0]:.2f}, Y={gps_coordinates[1]:.2f}")
-
-    # Update Display
-    pygame.display.flip()
-    clock.tick(30)
+import argparse
+import collections
+import pygame
+import sys
+from telemetry import TelemetryLogger
+from terrain import TerrainMap, TileCache
+
+# Constants
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+ROVER_SIZE = 20
+ROVER_COLOR = (0, 128, 255)
+BACKGROUND_COLOR = (200, 200, 200)
+GPS_SCALE = 0.1  # Scale for GPS coordinates to fit the screen
+MOVE_STEP = 5
+FPS = 60
+
+# The world is larger than the screen; the view scrolls to follow the rover
+WORLD_WIDTH = 8000
+WORLD_HEIGHT = 6000
+SCROLL_MARGIN = 150  # Scroll once the rover gets this close to an edge of the screen
+TILE_SIZE = 256
+TILE_CACHE_SIZE = 64  # Tiles kept rendered; a screenful is 12 to 20
+TERRAIN_CACHE_SIZE = 96  # Terrain tiles kept loaded: a screenful plus what is prefetched around the rover
+GRID_COLOR = (180, 180, 180)
+GRID_SPACING = 100
+
+# Rover Class
+class Rover:
+    def __init__(self, x, y, world_width=WORLD_WIDTH, world_height=WORLD_HEIGHT):
+        self.x = x  # World pixels
+        self.y = y
+        self.world_width = world_width
+        self.world_height = world_height
+
+    def move(self, dx, dy):
+        # Stay inside the world
+        self.x = min(max(self.x + dx, 0), self.world_width - ROVER_SIZE)
+        self.y = min(max(self.y + dy, 0), self.world_height - ROVER_SIZE)
+
+    def rect(self):
+        return pygame.Rect(self.x, self.y, ROVER_SIZE, ROVER_SIZE)
+
+    def draw(self, surface, viewport=None):
+        rect = self.rect() if viewport is None else viewport.to_screen(self.rect())
+        pygame.draw.rect(surface, ROVER_COLOR, rect)
+
+    def get_gps_coordinates(self):
+        # Convert screen coordinates to GPS-like coordinates
+        return (self.x * GPS_SCALE, self.y * GPS_SCALE)
+
+
+class TiledBackground:
+    """The world's background, rendered one tile at a time and cached.
+
+    Tiles are drawn on first use and kept in a small LRU cache, so a world
+    far larger than the screen only costs memory for the tiles near the view.
+    """
+
+    def __init__(self, world_width=WORLD_WIDTH, world_height=WORLD_HEIGHT, tile_size=TILE_SIZE,
+                 cache_size=TILE_CACHE_SIZE):
+        self.world_width = world_width
+        self.world_height = world_height
+        self.tile_size = tile_size
+        self.cache_size = cache_size
+        self.tiles = collections.OrderedDict()
+        self.rendered = 0
+
+    def tile(self, col, row):
+        key = (col, row)
+        surface = self.tiles.get(key)
+        if surface is not None:
+            self.tiles.move_to_end(key)
+            return surface
+        surface = self.render_tile(col, row)
+        self.tiles[key] = surface
+        self.rendered += 1
+        if len(self.tiles) > self.cache_size:
+            self.tiles.popitem(last=False)
+        return surface
+
+    def render_tile(self, col, row):
+        """Background colour with a grid every GRID_SPACING world pixels, so scrolling shows."""
+        size = self.tile_size
+        surface = pygame.Surface((size, size))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()  # Same pixel format as the screen: plain copies when blitted
+        surface.fill(BACKGROUND_COLOR)
+        left, top = col * size, row * size
+        for x in range(-left % GRID_SPACING, size, GRID_SPACING):
+            pygame.draw.line(surface, GRID_COLOR, (x, 0), (x, size - 1))
+        for y in range(-top % GRID_SPACING, size, GRID_SPACING):
+            pygame.draw.line(surface, GRID_COLOR, (0, y), (size - 1, y))
+        return surface
+
+    def blit(self, target, world_rect, origin):
+        """Copy the background under ``world_rect`` onto ``target``, whose top-left is world ``origin``."""
+        size = self.tile_size
+        area = world_rect.clip(pygame.Rect(0, 0, self.world_width, self.world_height))
+        if not area.width or not area.height:
+            return
+        origin_x, origin_y = origin
+        for row in range(area.top // size, (area.bottom - 1) // size + 1):
+            for col in range(area.left // size, (area.right - 1) // size + 1):
+                tile_rect = pygame.Rect(col * size, row * size, size, size)
+                part = tile_rect.clip(area)
+                target.blit(self.tile(col, row), (part.x - origin_x, part.y - origin_y),
+                            part.move(-tile_rect.x, -tile_rect.y))
+
+    def follow(self, x, y):
+        """Told where the rover is (world pixels) every frame; a plain background has nothing to prepare."""
+
+    def take_arrived(self):
+        """World rects whose background changed since the last call; a plain background never changes."""
+        return []
+
+    def close(self):
+        pass
+
+
+class TerrainBackground(TiledBackground):
+    """Background from a terrain map (terrain.py), one map pixel per world pixel.
+
+    Drawing and prefetching both use that one mapping; the map's own origin
+    and resolution are not used here. Tiles come from a TileCache whose
+    loader thread reads the map, so a frame never waits on the disk: a tile
+    that is not loaded yet is drawn as plain background and repainted once
+    it arrives. ``follow()`` keeps the tiles around the rover, and ahead of
+    it, on their way in.
+    """
+
+    def __init__(self, terrain, cache_size=TERRAIN_CACHE_SIZE):
+        super().__init__(terrain.width, terrain.height, terrain.tile_size, cache_size)
+        self.terrain = terrain
+        self.cache = TileCache(terrain, cache_size,
+                               make=lambda data, size: pygame.image.frombuffer(data, (size, size), 'RGB')).start()
+        self.placeholder = pygame.Surface((terrain.tile_size, terrain.tile_size))
+        self.placeholder.fill(BACKGROUND_COLOR)
+        self.last_position = None
+
+    def tile(self, col, row):
+        tile = self.cache.get(row, col)
+        return self.placeholder if tile is None else tile
+
+    def follow(self, x, y):
+        # World pixels are map pixels, the same as tile() and blit() use
+        dx, dy = (0.0, 0.0) if self.last_position is None else (x - self.last_position[0], y - self.last_position[1])
+        self.last_position = (x, y)
+        self.cache.prefetch(x, y, dx, dy)
+
+    def take_arrived(self):
+        size = self.tile_size
+        return [pygame.Rect(col * size, row * size, size, size) for row, col in self.cache.take_arrived()]
+
+    def close(self):
+        self.cache.stop()
+        self.terrain.close()
+
+
+class Viewport:
+    """The part of the world on screen; scrolls only when the rover nears an edge."""
+
+    def __init__(self, width=SCREEN_WIDTH, height=SCREEN_HEIGHT, world_width=WORLD_WIDTH,
+                 world_height=WORLD_HEIGHT, margin=SCROLL_MARGIN):
+        self.width = width
+        self.height = height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.margin = margin
+        self.x = 0  # World position of the screen's top-left corner
+        self.y = 0
+
+    def rect(self):
+        return pygame.Rect(self.x, self.y, self.width, self.height)
+
+    def to_screen(self, rect):
+        return rect.move(-self.x, -self.y)
+
+    def follow(self, rect):
+        """Scroll just enough to keep ``rect`` (world pixels) ``margin`` from the edges; returns (dx, dy)."""
+        x, y, margin = self.x, self.y, self.margin
+        if rect.left < x + margin:
+            x = rect.left - margin
+        elif rect.right > x + self.width - margin:
+            x = rect.right - self.width + margin
+        if rect.top < y + margin:
+            y = rect.top - margin
+        elif rect.bottom > y + self.height - margin:
+            y = rect.bottom - self.height + margin
+        x = min(max(x, 0), max(self.world_width - self.width, 0))
+        y = min(max(y, 0), max(self.world_height - self.height, 0))
+        dx, dy = x - self.x, y - self.y
+        self.x, self.y = x, y
+        return dx, dy
+
+
+class DirtyRectRenderer:
+    """Redraws only what changed and passes just those rectangles to ``display.update()``.
+
+    A frame where the rover moved without scrolling restores the background
+    where it was, draws it where it is and updates those two rectangles. A
+    scroll shifts the pixels already on screen with ``Surface.scroll()`` and
+    paints only the strips scrolled into view. Background tiles that arrived
+    since the last frame are repainted where visible. A frame where nothing
+    changed does nothing at all.
+    """
+
+    def __init__(self, screen, background, viewport):
+        self.screen = screen
+        self.background = background
+        self.viewport = viewport
+        self.last_rect = None  # Rover on screen in the last frame
+        self.frames = 0
+        self.full_frames = 0  # First frame, or scrolled a whole screen
+        self.scroll_frames = 0
+        self.idle_frames = 0
+
+    def draw(self, rover):
+        """Draw a frame; returns the rectangles updated (empty when nothing changed)."""
+        screen, viewport = self.screen, self.viewport
+        dx, dy = viewport.follow(rover.rect())
+        rover_rect = viewport.to_screen(rover.rect())
+        origin = (viewport.x, viewport.y)
+        self.frames += 1
+        if self.last_rect is None or abs(dx) >= viewport.width or abs(dy) >= viewport.height:
+            self.background.blit(screen, viewport.rect(), origin)
+            rover.draw(screen, viewport)
+            self.background.take_arrived()  # Already drawn
+            pygame.display.update()
+            self.full_frames += 1
+            self.last_rect = rover_rect
+            return [screen.get_rect()]
+        arrived = self._repaint_arrived((viewport.x - dx, viewport.y - dy))  # The screen has not scrolled yet
+        if dx or dy:
+            screen.scroll(-dx, -dy)
+            width, height = viewport.width, viewport.height
+            strips = []
+            if dx:
+                strips.append(pygame.Rect(width - dx if dx > 0 else 0, 0, abs(dx), height))
+            if dy:
+                strips.append(pygame.Rect(0, height - dy if dy > 0 else 0, width, abs(dy)))
+            strips.append(self.last_rect.move(-dx, -dy))  # The rover's old image, shifted with everything else
+            for strip in strips:
+                self.background.blit(screen, strip.move(origin), origin)
+            rover.draw(screen, viewport)
+            pygame.display.update()  # Every pixel moved
+            self.scroll_frames += 1
+            self.last_rect = rover_rect
+            return [screen.get_rect()]
+        if rover_rect == self.last_rect:
+            if arrived:
+                pygame.display.update(arrived)
+            else:
+                self.idle_frames += 1
+            return arrived
+        old = self.last_rect
+        self.background.blit(screen, old.move(origin), origin)
+        rover.draw(screen, viewport)
+        dirty = [old.union(rover_rect)] if old.colliderect(rover_rect) else [old, rover_rect]
+        dirty += arrived
+        pygame.display.update(dirty)
+        self.last_rect = rover_rect
+        return dirty
+
+    def _repaint_arrived(self, origin):
+        """Repaint the visible parts of newly arrived background tiles on the screen as it is, with
+        its top-left at world ``origin``; returns the screen rects repainted."""
+        view = pygame.Rect(origin, (self.viewport.width, self.viewport.height))
+        repainted = []
+        for rect in self.background.take_arrived():
+            visible = rect.clip(view)
+            if not visible.width or not visible.height:
+                continue
+            self.background.blit(self.screen, visible, origin)
+            repainted.append(visible.move(-origin[0], -origin[1]))
+        if repainted and self.last_rect.collidelist(repainted) != -1:
+            # Keep the old image of the rover, so the normal erase below leaves no trace
+            pygame.draw.rect(self.screen, ROVER_COLOR, self.last_rect)
+        return repainted
+
+
+def handle_input(rover, keys):
+    """Move the rover for every arrow key held down."""
+    if keys[pygame.K_LEFT]:
+        rover.move(-MOVE_STEP, 0)
+    if keys[pygame.K_RIGHT]:
+        rover.move(MOVE_STEP, 0)
+    if keys[pygame.K_UP]:
+        rover.move(0, -MOVE_STEP)
+    if keys[pygame.K_DOWN]:
+        rover.move(0, MOVE_STEP)
+
+
+def draw_frame(surface, rover):
+    """Draw a whole frame from scratch; the caller flips the display. DirtyRectRenderer avoids this."""
+    # Clear Screen
+    surface.fill(BACKGROUND_COLOR)
+
+    # Draw Rover
+    rover.draw(surface)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive a rover around a world larger than the screen.")
+    parser.add_argument('--terrain', metavar='PATH', help="terrain map to drive over (see terrain.py generate)")
+    args = parser.parse_args(argv)
+
+    # Initialize Pygame
+    pygame.init()
+
+    # Setup Display
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("SIH Rover GPS Navigation")
+
+    # Initialize Rover, and a view onto the world that follows it
+    background = TerrainBackground(TerrainMap(args.terrain)) if args.terrain else TiledBackground()
+    rover = Rover(100, 100, background.world_width, background.world_height)
+    viewport = Viewport(world_width=background.world_width, world_height=background.world_height)
+    renderer = DirtyRectRenderer(screen, background, viewport)
+
+    # Telemetry goes to a binary log; the console only shows a position once a second
+    telemetry = TelemetryLogger("simu_telemetry.tlm", console_interval=1.0)
+
+    # Main loop
+    clock = pygame.time.Clock()
+
+    while True:
+        # Event Handling
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                telemetry.close()
+                background.close()
+                pygame.quit()
+                sys.exit()
+
+        # Input Handling
+        handle_input(rover, pygame.key.get_pressed())
+
+        # Record GPS Coordinates
+        gps_coordinates = rover.get_gps_coordinates()
+        telemetry.record(gps_coordinates[0], gps_coordinates[1])
+
+        # Start loading the terrain around the rover, and ahead of it
+        background.follow(rover.x, rover.y)
+
+        # Draw and update only what changed
+        renderer.draw(rover)
+
+        clock.tick(FPS)
+
+
+if __name__ == '__main__':
+    main()
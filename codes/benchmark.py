@@ -0,0 +1,585 @@
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import types
+
+# Targets for the time-to-target runs, in simulation units from a rover at the origin facing +x
+SCENARIOS = (
+    ('ahead', 200.0, 0.0),
+    ('diagonal', 300.0, 400.0),
+    ('side', 0.0, 500.0),
+    ('behind', -250.0, -100.0),
+    ('far', 2000.0, -1500.0),
+)
+FAR_TARGET = (1e9, 1e9)  # Never reached, so every tick does the full navigation work
+
+# Metric name suffixes decide what counts as a regression
+HIGHER_IS_BETTER = ('_per_s',)
+LOWER_IS_BETTER = ('_us', '_ms')
+
+
+def _best_time(fn, calls, repeat):
+    """Best wall time over ``repeat`` runs of ``calls`` calls, as timeit does."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _rate(fn, calls, repeat):
+    return calls / _best_time(fn, calls, repeat)
+
+
+# Headless stand-ins for the turtle module: the benchmarks time our code, not Tk
+
+class FakeScreen:
+    def ontimer(self, fun, t=0):
+        pass  # Never run: a benchmark drives the callbacks itself
+
+    def title(self, text=None):
+        pass
+
+    def bgcolor(self, *args):
+        pass
+
+    def tracer(self, *args):
+        pass
+
+    def update(self):
+        pass
+
+    def setworldcoordinates(self, *args):
+        pass
+
+    def listen(self):
+        pass
+
+    def onkey(self, fun, key):
+        pass
+
+    onkeypress = onkeyrelease = onkey
+
+    def textinput(self, title, prompt):
+        return None
+
+    def numinput(self, title, prompt, default=None, minval=None, maxval=None):
+        return None
+
+    def mainloop(self):
+        pass
+
+    def bye(self):
+        pass
+
+    def getcanvas(self):
+        return self  # Has the update() a Tk canvas is asked for
+
+
+class FakeTurtle:
+    _screen = None
+
+    def __init__(self):
+        if FakeTurtle._screen is None:
+            FakeTurtle._screen = FakeScreen()
+        self.screen = FakeTurtle._screen
+        self.x = 0.0
+        self.y = 0.0
+        self.angle = 0.0  # Degrees, counter-clockwise from +x like turtle's standard mode
+
+    def getscreen(self):
+        return self.screen
+
+    def forward(self, distance):
+        self.x += math.cos(math.radians(self.angle)) * distance
+        self.y += math.sin(math.radians(self.angle)) * distance
+
+    def left(self, angle):
+        self.angle = (self.angle + angle) % 360
+
+    def right(self, angle):
+        self.angle = (self.angle - angle) % 360
+
+    def setheading(self, angle):
+        self.angle = angle % 360
+
+    def heading(self):
+        return self.angle
+
+    def goto(self, x, y=None):
+        self.x, self.y = (x if y is None else (x, y))
+
+    def position(self):
+        return self.x, self.y
+
+    pos = position
+
+    def xcor(self):
+        return self.x
+
+    def ycor(self):
+        return self.y
+
+    def towards(self, x, y=None):
+        if y is None:
+            x, y = x
+        return math.degrees(math.atan2(y - self.y, x - self.x)) % 360
+
+    def _ignore(self, *args, **kwargs):
+        pass
+
+    shape = color = penup = pendown = speed = hideturtle = showturtle = _ignore
+
+
+def install_fake_turtle():
+    """Put a headless turtle module in ``sys.modules`` before the turtle views are imported."""
+    module = types.ModuleType('turtle')
+    module.Turtle = FakeTurtle
+    module.Screen = lambda: FakeTurtle._screen or FakeTurtle().screen
+    module.TurtleGraphicsError = Exception
+    for name in ('title', 'listen', 'onkey', 'onkeypress', 'onkeyrelease', 'textinput', 'numinput',
+                 'mainloop', 'bgcolor', 'tracer', 'update'):
+        module.__dict__[name] = lambda *args, _name=name, **kwargs: getattr(module.Screen(), _name)(*args, **kwargs)
+    sys.modules['turtle'] = module
+    return module
+
+
+# A local stand-in for rospy2: subscribers are called straight from publish(), on the publishing thread
+
+class FakeRospy(types.ModuleType):
+    def __init__(self):
+        super().__init__('rospy2')
+        self.subscribers = {}
+
+    def init_node(self, name, anonymous=False):
+        pass
+
+    def Subscriber(self, topic, msg_type, callback):
+        self.subscribers.setdefault(topic, []).append(callback)
+
+    def Publisher(self, topic, msg_type, queue_size=None):
+        subscribers = self.subscribers.setdefault(topic, [])
+        publisher = types.SimpleNamespace()
+        publisher.publish = lambda msg: [callback(msg) for callback in subscribers]
+        return publisher
+
+    def spin(self):
+        pass
+
+
+class FakeString:
+    __slots__ = ('data',)
+
+    def __init__(self, data=''):
+        self.data = data
+
+
+def install_fake_rospy():
+    """Put headless rospy2 and std_msgs modules in ``sys.modules`` before Nav is imported."""
+    rospy = FakeRospy()
+    std_msgs = types.ModuleType('std_msgs')
+    std_msgs.msg = types.ModuleType('std_msgs.msg')
+    std_msgs.msg.String = FakeString
+    sys.modules.update({'rospy2': rospy, 'std_msgs': std_msgs, 'std_msgs.msg': std_msgs.msg})
+    return rospy
+
+
+# Benchmarks: each returns a dict of metric name -> value
+
+def bench_auto_control(calls, repeat):
+    from rover_sim import RoverSimulation
+    sim = RoverSimulation()
+    sim.control_mode = 'auto'
+    sim.auto_control.set_target(*FAR_TARGET)
+    results = {
+        'update_per_s': _rate(sim.auto_control.update, calls, repeat),
+        'navigate_to_target_per_s': _rate(sim.auto_control.navigate_to_target, calls, repeat),
+        'sim_step_per_s': _rate(sim.step, calls, repeat),
+    }
+    from trajectory import TrajectoryController
+    sim = RoverSimulation(controller=TrajectoryController)
+    sim.control_mode = 'auto'
+    sim.auto_control.set_target(*FAR_TARGET)
+    results['trajectory_update_per_s'] = _rate(sim.auto_control.update, calls, repeat)
+    sim = RoverSimulation(controller=TrajectoryController)
+    sim.auto_control.set_target(2000.0, -1500.0)  # 254 poses
+    generations = max(1, calls // 100)
+    results['trajectory_generate_us'] = _best_time(sim.auto_control.generate, generations, repeat) / generations * 1e6
+    return results
+
+
+def bench_manual_control(calls, repeat):
+    from rover_sim import RoverSimulation
+    sim = RoverSimulation()
+    sim.manual_control.move_forward()
+    sim.manual_control.turn_left()
+    return {
+        'update_per_s': _rate(sim.manual_control.update, calls, repeat),
+        'sim_step_per_s': _rate(sim.step, calls, repeat),
+    }
+
+
+def bench_time_to_target(calls, repeat):
+    """Ticks and path length for each controller and scenario; changed ticks mean changed behaviour."""
+    from rover_sim import RoverSimulation
+    from auto_control import AutoControl
+    from controllers import PurePursuitController, PIDController
+    from trajectory import TrajectoryController
+    results = {}
+    for prefix, controller in (('', AutoControl), ('pursuit_', PurePursuitController), ('pid_', PIDController),
+                               ('trajectory_', TrajectoryController)):
+        for name, x, y in SCENARIOS:
+            sim = RoverSimulation(controller=controller)
+            sim.control_mode = 'auto'
+            sim.auto_control.set_target(x, y)
+            ticks = sim.run_until_reached(max_ticks=10000)
+            results[f'{prefix}{name}_ticks'] = ticks if ticks is not None else -1
+            run = sim.auto_control.last_run
+            results[f'{prefix}{name}_path'] = run.path_length if run is not None else -1.0
+    return results
+
+
+def bench_kalman(calls, repeat):
+    """One filter step (odometry, predict, GPS fix) for a rover, and per rover for a batched fleet."""
+    from sensors import KalmanFilter, FleetKalmanFilter, GpsSensor, PositionEstimator
+    from rover_sim import RoverSimulation
+    kalman = KalmanFilter()
+
+    def step():
+        kalman.update_velocity(1.0, 0.5)
+        kalman.predict(0.1)
+        kalman.update_position(kalman.x + 0.1, kalman.y)
+
+    results = {'update_us': _best_time(step, calls, repeat) / calls * 1e6}
+    sim = RoverSimulation()
+    sim.set_estimator(PositionEstimator(sim, GpsSensor(noise=3.0, latency=0.5, dropout=0.2, seed=1)))
+    sim.control_mode = 'auto'
+    sim.auto_control.set_target(*FAR_TARGET)
+    results['estimated_sim_step_per_s'] = _rate(sim.step, calls, repeat)
+    try:
+        import numpy as np
+    except ImportError:
+        return results
+    count = 1000
+    fleet = FleetKalmanFilter(count)
+    fixes = np.zeros(count)
+    mask = np.arange(count) % 5 != 0  # Every fifth rover without a fix
+
+    def fleet_step():
+        fleet.update_velocity(1.0, 0.5)
+        fleet.predict(0.1)
+        fleet.update_position(fixes, fixes, mask)
+
+    steps = max(1, calls // 100)
+    results['fleet_update_per_rover_us'] = _best_time(fleet_step, steps, repeat) / steps / count * 1e6
+    return results
+
+
+def bench_hal(calls, repeat):
+    """Cost of one two-wheel command on the mock drive, and through gpiozero on its mock pins."""
+    from hal import MockDrive, GpioZeroDrive, mock_pin_factory
+    drive = MockDrive()
+    commands = ((1.0, 1.0), (0.5, -0.5), (0.0, 0.0))
+    state = {'i': 0}
+
+    def command(drive):
+        i = state['i'] = (state['i'] + 1) % 3
+        drive.set_speeds(*commands[i])
+
+    results = {'mock_set_speeds_per_s': _rate(lambda: command(drive), calls, repeat)}
+    try:
+        drive = GpioZeroDrive(pin_factory=mock_pin_factory())
+    except ImportError:
+        return results
+    try:
+        steps = max(1, calls // 10)
+        results['gpiozero_set_speeds_us'] = _best_time(lambda: command(drive), steps, repeat) / steps * 1e6
+    finally:
+        drive.close()
+    return results
+
+
+def bench_statebus(calls, repeat):
+    """Seqlock publish and read on the shared memory state bus, in one process."""
+    from statebus import StateBus
+    bus = StateBus()
+    try:
+        return {
+            'publish_per_s': _rate(lambda: bus.publish(1.0, 2.0, 3.0, 0.5, 'auto', (4.0, 5.0), 6), calls, repeat),
+            'read_per_s': _rate(bus.read, calls, repeat),
+        }
+    finally:
+        bus.close()
+
+
+def bench_teleop(calls, repeat):
+    """Round trip of a teleop command over local UDP and a Unix socket, server polled in-process."""
+    from teleop import TeleopServer, probe
+    from hal import MockDrive
+    results = {}
+    count = max(1, calls // 20)
+    for name, address in (('udp', ('127.0.0.1', 0)), ('unix', os.path.join(tempfile.mkdtemp(), 'teleop.sock'))):
+        server = TeleopServer(MockDrive(), address)
+        try:
+            bound = server.sock.getsockname()
+            client = probe(bound, count, rate_hz=1e6, server=server)
+            results[f'{name}_rtt_mean_us'] = client.rtt.mean() * 1e3
+        finally:
+            server.close()
+    return results
+
+
+def bench_nav(calls, repeat):
+    """Callback-to-actuation latency of the Nav.py motor node with a publisher flooding /cmd_vel."""
+    rospy = sys.modules['rospy2'] if isinstance(sys.modules.get('rospy2'), FakeRospy) else install_fake_rospy()
+    import Nav
+    from hal import MockDrive
+    actuator = Nav.actuator = Nav.MotorActuator(MockDrive(), watchdog=0.5).start()
+    rospy.Subscriber('/cmd_vel', Nav.String, Nav.command_callback)
+    publisher = rospy.Publisher('/cmd_vel', Nav.String)
+    messages = [Nav.String(command) for command in ('forward', 'backward', 'stop')]
+    try:
+        callback_s = _best_time(lambda: publisher.publish(messages[actuator.actuated % 3]), calls, repeat)
+        flood = actuator.latency
+        actuator.latency = paced = type(flood)(Nav.LATENCY_EDGES_MS)
+        for i in range(max(1, calls // 100)):
+            publisher.publish(messages[i % 3])
+            time.sleep(0.0005)  # A 2 kHz publisher: the actuator keeps up, so this is the plain handoff
+    finally:
+        actuator.stop()
+        rospy.subscribers.clear()
+    return {
+        'callback_us': callback_s / calls * 1e6,
+        'flood_latency_ms': flood.mean(),
+        'flood_superseded_ratio': actuator.mailbox.overwritten / (repeat * calls),
+        'paced_latency_ms': paced.mean(),
+    }
+
+
+def bench_virtual_pi(calls, repeat):
+    import virtual_pi
+    board = virtual_pi.VirtualPiBoard()
+    board.telemetry.console_interval = None  # The benchmark outruns the flusher; keep the output clean
+    try:
+        board.drive.set_speeds(1.0, 1.0)
+        results = {
+            'move_forward_per_s': _rate(board.move_forward, calls, repeat),
+            'drive_tick_per_s': _rate(board.drive._tick, calls, repeat),
+        }
+        board.renderer.mark_dirty()
+
+        def frame():
+            board.update_coordinates()
+            board.renderer.draw()
+
+        results['frame_us'] = _best_time(frame, calls, repeat) / calls * 1e6
+    finally:
+        logging.disable(logging.ERROR)  # The ring overflowing here is expected, not worth an error line
+        board.cleanup()
+        logging.disable(logging.NOTSET)
+    return results
+
+
+def bench_turtle_view(calls, repeat):
+    import main as turtle_main
+    board = turtle_main.VirtualPiBoard()
+    board.open_view()
+    renderer = board.view.start(fps=30)
+    board.manual_control.move_forward()
+    board.manual_control.turn_left()
+
+    def frame():
+        board.step()  # Notifies the view, which only marks the renderer dirty
+        renderer.draw()
+
+    results = {'tick_and_frame_us': _best_time(frame, calls, repeat) / calls * 1e6}
+    renderer.stop()
+    return results
+
+
+def bench_simu_frame(calls, repeat):
+    """Cost of one Simu.py frame on a real pygame surface (SDL's dummy video driver, no window)."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    try:
+        import pygame
+    except ImportError:
+        return None
+    import Simu
+    pygame.display.init()
+    try:
+        screen = pygame.display.set_mode((Simu.SCREEN_WIDTH, Simu.SCREEN_HEIGHT))
+        rover = Simu.Rover(100, 100)
+        frames = max(1, calls // 100)  # Full-screen fills are far slower than a control tick
+
+        def frame():
+            rover.move(1, 0)
+            Simu.draw_frame(screen, rover)
+            pygame.display.flip()
+
+        viewport = Simu.Viewport()
+        renderer = Simu.DirtyRectRenderer(screen, Simu.TiledBackground(), viewport)
+        rover.x, rover.y = Simu.SCREEN_WIDTH // 2, Simu.SCREEN_HEIGHT // 2
+        renderer.draw(rover)
+        steps = [Simu.MOVE_STEP, -Simu.MOVE_STEP]
+
+        def dirty_frame():
+            # Back and forth in the middle of the screen: never scrolls
+            steps.reverse()
+            rover.move(steps[0], 0)
+            renderer.draw(rover)
+
+        def scroll_frame():
+            # Heading east past the margin: scrolls every frame
+            rover.move(Simu.MOVE_STEP, 0)
+            renderer.draw(rover)
+
+        metrics = {'frame_ms': _best_time(frame, frames, repeat) / frames * 1e3,
+                   'dirty_frame_ms': _best_time(dirty_frame, frames, repeat) / frames * 1e3}
+        rover.x = viewport.x + viewport.width - viewport.margin
+        renderer.draw(rover)
+        metrics['scroll_frame_ms'] = _best_time(scroll_frame, frames, repeat) / frames * 1e3
+        return metrics
+    finally:
+        pygame.display.quit()
+
+
+def bench_terrain(calls, repeat):
+    """Terrain tile cache: a cache hit as the frame loop sees it, and a tile read by the loader thread."""
+    try:
+        import numpy  # noqa: F401  Needed to generate the map
+    except ImportError:
+        return None
+    from terrain import TerrainMap, TileCache, write_terrain
+    path = os.path.join(tempfile.mkdtemp(), 'bench.terrain')
+    write_terrain(path, 8, 8, tile_size=256)
+    terrain = TerrainMap(path)
+    cache = TileCache(terrain, capacity=16).start()
+    try:
+        cache.request([(row, col) for row in range(4) for col in range(4)])
+        deadline = time.perf_counter() + 5.0
+        while len(cache.tiles) < 16 and time.perf_counter() < deadline:
+            time.sleep(0.001)
+        keys = list(cache.tiles)
+        i = [0]
+
+        def hit():
+            i[0] += 1
+            cache.get(*keys[i[0] % len(keys)])
+
+        return {
+            'get_hit_us': _best_time(hit, calls, repeat) / calls * 1e6,
+            'load_mean_ms': cache.load_time.mean(),
+        }
+    finally:
+        cache.stop()
+        terrain.close()
+        os.unlink(path)
+
+
+BENCHMARKS = {
+    'auto_control': bench_auto_control,
+    'manual_control': bench_manual_control,
+    'time_to_target': bench_time_to_target,
+    'kalman': bench_kalman,
+    'hal': bench_hal,
+    'statebus': bench_statebus,
+    'teleop': bench_teleop,
+    'nav': bench_nav,
+    'virtual_pi': bench_virtual_pi,
+    'turtle_view': bench_turtle_view,
+    'simu_frame': bench_simu_frame,
+    'terrain': bench_terrain,
+}
+
+
+def run_benchmarks(names, calls=20000, repeat=5):
+    install_fake_turtle()
+    workdir = tempfile.mkdtemp(prefix='rover-bench-')  # Telemetry logs land here, not in the tree
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    results = {}
+    try:
+        for name in names:
+            metrics = BENCHMARKS[name](calls, repeat)
+            if metrics is None:
+                print(f"{name}: skipped (dependency not installed)")
+                continue
+            results[name] = metrics
+            for metric, value in metrics.items():
+                print(f"{name}.{metric}: {value:,.2f}" if isinstance(value, float) else f"{name}.{metric}: {value}")
+    finally:
+        os.chdir(cwd)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the change against ``baseline``; returns the list of regressed metric names."""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(name, {}).get(metric)
+            if old is None:
+                continue
+            key = f"{name}.{metric}"
+            if metric.endswith('_ticks'):
+                status = 'same' if value == old else 'CHANGED'
+                if value != old:
+                    regressions.append(key)
+                print(f"{key}: {old} -> {value} {status}")
+                continue
+            change = (value - old) / old if old else 0.0
+            if metric.endswith(HIGHER_IS_BETTER):
+                worse = change < -threshold
+            elif metric.endswith(LOWER_IS_BETTER):
+                worse = change > threshold
+            else:
+                worse = False
+            if worse:
+                regressions.append(key)
+            print(f"{key}: {old:,.2f} -> {value:,.2f} ({change:+.1%}){' REGRESSION' if worse else ''}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rover control, motion and render hot paths.")
+    parser.add_argument('benchmarks', nargs='*', metavar='BENCHMARK',
+                        help=f"benchmarks to run (default: all): {', '.join(BENCHMARKS)}")
+    parser.add_argument('--calls', type=int, default=20000, help="calls per timed run")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs; the best one is kept")
+    parser.add_argument('--save', metavar='PATH', help="write the results as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare against a saved baseline")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="relative slowdown reported as a regression (default 0.10)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = run_benchmarks(args.benchmarks or list(BENCHMARKS), args.calls, args.repeat)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'results': results}, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+        print("No regressions.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
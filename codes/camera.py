@@ -0,0 +1,68 @@
+class Camera:
+    """Keeps the rover in view of a turtle screen without re-framing on every step.
+
+    The view only moves when the rover leaves the dead zone in the middle of the
+    viewport. It then scrolls so the rover sits at the trailing edge of the dead
+    zone, leaving the longest possible run in the direction of travel before the
+    next re-frame. With ``pan_frames`` > 1 the move is spread over that many
+    frames, one ``setworldcoordinates`` call per frame.
+    """
+
+    def __init__(self, screen, half_width=200, half_height=200, dead_zone=0.75, pan_frames=1):
+        self.screen = screen
+        self.half_width = half_width
+        self.half_height = half_height
+        self.limit_x = half_width * dead_zone  # Rover may wander this far from the center
+        self.limit_y = half_height * dead_zone
+        self.pan_frames = max(1, pan_frames)
+        self.center_x = None  # Where the view currently is (None until first framed)
+        self.center_y = None
+        self.target_x = None  # Where the view is heading while panning
+        self.target_y = None
+        self.pan_step_x = 0.0
+        self.pan_step_y = 0.0
+        self.reframes = 0
+
+    def follow(self, x, y):
+        """Track the rover at (x, y); returns True if the view was moved."""
+        if self.center_x is None:
+            self.center_x, self.center_y = x, y
+            self.target_x, self.target_y = x, y
+            self._apply()
+            return True
+
+        offset_x = x - self.target_x
+        offset_y = y - self.target_y
+        if abs(offset_x) > self.limit_x or abs(offset_y) > self.limit_y:
+            if abs(offset_x) > self.limit_x:
+                self.target_x = x + (self.limit_x if offset_x > 0 else -self.limit_x)
+            if abs(offset_y) > self.limit_y:
+                self.target_y = y + (self.limit_y if offset_y > 0 else -self.limit_y)
+            # Cover the distance in equal steps, one per frame
+            self.pan_step_x = abs(self.target_x - self.center_x) / self.pan_frames
+            self.pan_step_y = abs(self.target_y - self.center_y) / self.pan_frames
+        return self.pan()
+
+    def is_panning(self):
+        return self.center_x != self.target_x or self.center_y != self.target_y
+
+    def pan(self):
+        """Move one frame's worth towards the target view; returns True if the view was moved."""
+        if not self.is_panning():
+            return False
+        self.center_x = self._approach(self.center_x, self.target_x, self.pan_step_x)
+        self.center_y = self._approach(self.center_y, self.target_y, self.pan_step_y)
+        self._apply()
+        return True
+
+    @staticmethod
+    def _approach(value, target, step):
+        if abs(target - value) <= step:
+            return target
+        return value + step if target > value else value - step
+
+    def _apply(self):
+        # One call rescales and redraws the whole canvas, so it is done once per move
+        self.reframes += 1
+        self.screen.setworldcoordinates(self.center_x - self.half_width, self.center_y - self.half_height,
+                                        self.center_x + self.half_width, self.center_y + self.half_height)
@@ -0,0 +1,244 @@
+import math
+
+
+def wrap_angle(angle):
+    """Wrap an angle in radians to [-pi, pi)."""
+    return (angle + math.pi) % (2 * math.pi) - math.pi
+
+
+class RunStats:
+    """How one run to a target went: ticks taken and distance actually driven."""
+
+    __slots__ = ('ticks', 'path_length', 'straight_distance')
+
+    def __init__(self, ticks, path_length, straight_distance):
+        self.ticks = ticks
+        self.path_length = path_length
+        self.straight_distance = straight_distance
+
+    def efficiency(self):
+        """Straight-line distance over distance driven; 1.0 is a perfect run."""
+        return self.straight_distance / self.path_length if self.path_length else 1.0
+
+    def __str__(self):
+        return (f"{self.ticks} ticks, path {self.path_length:.1f} "
+                f"(straight line {self.straight_distance:.1f}, {self.efficiency():.0%} efficient)")
+
+
+class Controller:
+    """Base for the auto-mode controllers a RoverSimulation can be given.
+
+    Handles the target, distance and bearing, the "reached" check and the per-run
+    statistics; a subclass only implements ``steer(distance, bearing)`` for one
+    tick. Targets are (lat, lon); with a geo frame they are converted once to the
+    simulation's local x (north) / y (east) metres. Observers are called with a
+    RunStats each time a target is reached.
+    """
+
+    def __init__(self, rover, frame=None, threshold=1.0):
+        self.rover = rover
+        self.frame = frame  # Optional geo.LocalFrame: distances become metres on real coordinates
+        self.threshold = threshold  # Within this distance the target counts as reached
+        self.target_lat = None
+        self.target_lon = None
+        self.target_x = None
+        self.target_y = None
+        self.observers = []
+        self.last_run = None
+        self.estimate = None  # Optional source of position_x/position_y (e.g. filtered GPS) to navigate on
+        self._active = False
+        self._ticks = 0
+        self._path_length = 0.0
+        self._start_distance = 0.0
+        self._last_position = None
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def set_target(self, lat, lon):
+        self.target_lat = lat
+        self.target_lon = lon
+        if self.frame is not None:
+            east, north = self.frame.to_enu(lat, lon)
+            self.target_x, self.target_y = north, east
+        else:
+            self.target_x, self.target_y = lat, lon
+        self._active = True
+        self._ticks = 0
+        self._path_length = 0.0
+        self._last_position = (self.rover.position_x, self.rover.position_y)
+        self._start_distance = self.distance_bearing()[0]
+        self.reset()
+
+    def reset(self):
+        """Clear any per-run controller state (speeds, integrators); called for every new target."""
+
+    def position(self):
+        """Where the controller believes the rover is: the estimate if one is set, else the true pose."""
+        source = self.estimate if self.estimate is not None else self.rover
+        return source.position_x, source.position_y
+
+    def distance_bearing(self):
+        """Distance to the target and the bearing to it, as an angle in the rover's heading convention."""
+        x, y = self.position()
+        dx = self.target_x - x
+        dy = self.target_y - y
+        return math.hypot(dx, dy), math.atan2(dy, dx)
+
+    def navigate_to_target(self):
+        if self.target_lat is None or self.target_lon is None:
+            return False  # No target set
+        self._track()
+        distance, bearing = self.distance_bearing()
+        if distance < self.threshold:
+            # Close enough to target, stop moving
+            self.rover.stop()
+            self._finish()
+            return True
+        self._ticks += 1
+        self.steer(distance, bearing)
+        return False
+
+    def update(self):
+        return self.navigate_to_target()
+
+    def steer(self, distance, bearing):
+        raise NotImplementedError
+
+    def stop_auto_navigation(self):
+        # Stop any ongoing auto navigation and reset state
+        self.target_lat = None
+        self.target_lon = None
+        self._active = False
+        self.reset()
+
+    def _track(self):
+        x, y = self.rover.position_x, self.rover.position_y
+        last_x, last_y = self._last_position
+        self._path_length += math.hypot(x - last_x, y - last_y)
+        self._last_position = (x, y)
+
+    def _finish(self):
+        if not self._active:
+            return  # Already reported; auto mode keeps calling update() at the target
+        self._active = False
+        self.last_run = RunStats(self._ticks, self._path_length, self._start_distance)
+        for observer in self.observers:
+            observer(self.last_run)
+
+
+class SpeedLimitedController(Controller):
+    """Adds what the smooth controllers share: velocity ramping and a bounded turn per tick.
+
+    Speeds are distances per tick. The speed rises by at most ``accel`` per
+    tick, never exceeds what can still be braked away at ``accel`` before the
+    target, and never exceeds the remaining distance, so the rover cannot
+    overshoot the threshold and hunt around it. A heading error beyond
+    ``spot_turn`` is turned away on the spot before driving on.
+    """
+
+    spot_turn = math.pi / 3
+
+    def __init__(self, rover, frame=None, threshold=1.0, max_speed=10.0, accel=4.0, max_turn=math.pi / 8):
+        super().__init__(rover, frame, threshold)
+        self.max_speed = max_speed
+        self.accel = accel
+        self.max_turn = max_turn  # Radians per tick
+        self.speed = 0.0
+
+    def reset(self):
+        self.speed = 0.0
+
+    def ramp(self, wanted, distance):
+        """Speed for this tick: ``wanted`` limited by acceleration, braking distance and the target."""
+        braking = math.sqrt(2 * self.accel * distance)
+        self.speed = max(0.0, min(wanted, self.max_speed, self.speed + self.accel, braking, distance))
+        return self.speed
+
+    def drive(self, turn, speed):
+        """Turn (bounded) and move as one arc: half the turn, the move, then the other half."""
+        turn = max(-self.max_turn, min(self.max_turn, turn))
+        rover = self.rover
+        if speed > 0:
+            rover.heading += turn / 2  # Observers hear about it with the move and the final heading
+            rover.move(speed)
+            turn /= 2
+        rover.adjust_heading(wrap_angle(rover.heading + turn))
+
+
+class PurePursuitController(SpeedLimitedController):
+    """Pure pursuit along the straight line from where the target was set to the target.
+
+    Each tick it aims at the point ``lookahead`` further along that line than the
+    rover's own projection onto it, and turns along the arc through that point.
+    The rover slows down while the target is off to the side and turns on the
+    spot when it is behind.
+    """
+
+    def __init__(self, rover, frame=None, threshold=1.0, max_speed=10.0, accel=4.0, max_turn=math.pi / 8,
+                 lookahead=20.0):
+        super().__init__(rover, frame, threshold, max_speed, accel, max_turn)
+        self.lookahead = lookahead
+        self.line_start = None
+
+    def reset(self):
+        super().reset()
+        self.line_start = self.position()
+
+    def lookahead_point(self):
+        (ax, ay), bx, by = self.line_start, self.target_x, self.target_y
+        dx, dy = bx - ax, by - ay
+        length = math.hypot(dx, dy)
+        if length == 0:
+            return bx, by
+        x, y = self.position()
+        t = ((x - ax) * dx + (y - ay) * dy) / length
+        t = min(max(t, 0.0) + self.lookahead, length)
+        return ax + dx * t / length, ay + dy * t / length
+
+    def steer(self, distance, bearing):
+        px, py = self.lookahead_point()
+        x, y = self.position()
+        dx, dy = px - x, py - y
+        reach = math.hypot(dx, dy)
+        alpha = wrap_angle(math.atan2(dy, dx) - self.rover.heading)
+        if abs(alpha) > self.spot_turn or reach == 0:
+            self.speed = 0.0
+            self.drive(alpha, 0.0)
+            return
+        # Slower while the point is off to the side, full speed when facing it
+        speed = self.ramp(self.max_speed * math.cos(alpha), distance)
+        self.drive(2 * math.sin(alpha) / reach * speed, speed)  # Curvature of the pursuit arc times arc length
+
+
+class PIDController(SpeedLimitedController):
+    """PID on the heading error to the target, with a proportional, ramped approach speed."""
+
+    def __init__(self, rover, frame=None, threshold=1.0, max_speed=10.0, accel=4.0, max_turn=math.pi / 8,
+                 kp=0.8, ki=0.02, kd=0.2, speed_gain=1.0):
+        super().__init__(rover, frame, threshold, max_speed, accel, max_turn)
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.speed_gain = speed_gain  # Wanted speed per unit of remaining distance
+        self.integral = 0.0
+        self.last_error = None
+
+    def reset(self):
+        super().reset()
+        self.integral = 0.0
+        self.last_error = None
+
+    def steer(self, distance, bearing):
+        error = wrap_angle(bearing - self.rover.heading)
+        derivative = 0.0 if self.last_error is None else wrap_angle(error - self.last_error)
+        self.last_error = error
+        turn = self.kp * error + self.ki * self.integral + self.kd * derivative
+        if abs(turn) < self.max_turn:
+            self.integral += error  # Anti-windup: stop integrating while the turn is saturated
+        if abs(error) > self.spot_turn:
+            self.speed = 0.0
+            self.drive(turn, 0.0)
+            return
+        speed = self.ramp(self.speed_gain * distance * math.cos(error), distance)
+        self.drive(turn, speed)
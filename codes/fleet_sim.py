@@ -0,0 +1,120 @@
+import numpy as np
+
+
+class FleetSimulation:
+    """Advances many rovers towards their targets with one vectorized step per tick.
+
+    Each rover follows the same rules as AutoControl.update() in today_code:
+    it snaps onto the target once closer than ``threshold``, otherwise it faces
+    the target and moves ``min(distance, max_step)`` units along that heading.
+    """
+
+    def __init__(self, count, threshold=0.1, max_step=1.0):
+        self.count = count
+        self.threshold = threshold
+        self.max_step = max_step
+        self.tick_count = 0
+
+        # Rover state, one entry per rover (x is latitude, y is longitude as on the boards)
+        self.position_x = np.zeros(count)
+        self.position_y = np.zeros(count)
+        self.heading = np.zeros(count)  # Angle in radians
+        self.target_x = np.zeros(count)
+        self.target_y = np.zeros(count)
+        self.has_target = np.zeros(count, dtype=bool)
+        self.reached = np.zeros(count, dtype=bool)
+        self.ticks_to_target = np.full(count, -1, dtype=np.int64)
+        self.target_set_tick = np.zeros(count, dtype=np.int64)  # tick_count when the current target was given
+
+        # Scratch buffers reused every tick so stepping does not allocate
+        self._dx = np.empty(count)
+        self._dy = np.empty(count)
+        self._distance = np.empty(count)
+        self._scale = np.empty(count)
+        self._active = np.empty(count, dtype=bool)
+        self._arrived = np.empty(count, dtype=bool)
+        self._moving = np.empty(count, dtype=bool)
+
+    def set_positions(self, x, y, heading=None):
+        """Place the rovers; scalars are broadcast to the whole fleet."""
+        self.position_x[:] = x
+        self.position_y[:] = y
+        if heading is not None:
+            self.heading[:] = heading
+
+    def set_targets(self, target_lat, target_lon, mask=None):
+        """Give rovers a new target; ``mask`` limits the change to some of them."""
+        if mask is None:
+            mask = np.ones(self.count, dtype=bool)
+        np.copyto(self.target_x, target_lat, where=mask)
+        np.copyto(self.target_y, target_lon, where=mask)
+        self.has_target |= mask
+        self.reached &= ~mask
+        self.ticks_to_target[mask] = -1
+        self.target_set_tick[mask] = self.tick_count
+
+    def set_target(self, index, target_lat, target_lon):
+        self.target_x[index] = target_lat
+        self.target_y[index] = target_lon
+        self.has_target[index] = True
+        self.reached[index] = False
+        self.ticks_to_target[index] = -1
+        self.target_set_tick[index] = self.tick_count
+
+    def stop_auto_navigation(self, mask=None):
+        if mask is None:
+            self.has_target[:] = False
+        else:
+            self.has_target &= ~mask
+
+    def active_count(self):
+        return int(np.count_nonzero(self.has_target & ~self.reached))
+
+    def step(self):
+        """Advance every navigating rover by one tick; returns how many arrived this tick."""
+        dx, dy, distance = self._dx, self._dy, self._distance
+        active, arrived, moving, scale = self._active, self._arrived, self._moving, self._scale
+
+        np.subtract(self.target_x, self.position_x, out=dx)
+        np.subtract(self.target_y, self.position_y, out=dy)
+        np.hypot(dx, dy, out=distance)
+
+        np.logical_not(self.reached, out=active)
+        np.logical_and(active, self.has_target, out=active)
+        np.less(distance, self.threshold, out=arrived)
+        np.logical_and(arrived, active, out=arrived)
+        np.logical_not(arrived, out=moving)
+        np.logical_and(moving, active, out=moving)
+
+        self.tick_count += 1
+
+        # Target reached: snap onto it
+        np.copyto(self.position_x, self.target_x, where=arrived)
+        np.copyto(self.position_y, self.target_y, where=arrived)
+        self.reached |= arrived
+        np.subtract(self.tick_count, self.target_set_tick, out=self.ticks_to_target, where=arrived)
+
+        # Face the target and move by one step or the remaining distance.
+        # cos/sin of the heading are just dx/distance and dy/distance.
+        np.arctan2(dy, dx, out=self.heading, where=moving)
+        np.minimum(distance, self.max_step, out=scale)
+        np.divide(scale, distance, out=scale, where=moving)
+        np.multiply(scale, moving, out=scale)  # Parked rovers do not move
+        np.multiply(dx, scale, out=dx)
+        np.multiply(dy, scale, out=dy)
+        self.position_x += dx
+        self.position_y += dy
+
+        return int(np.count_nonzero(arrived))
+
+    def run(self, max_ticks=10000):
+        """Step until every rover with a target has reached it; returns the ticks used."""
+        start = self.tick_count
+        for _ in range(max_ticks):
+            if not self.active_count():
+                break
+            self.step()
+        return self.tick_count - start
+
+    def get_lat_lon(self, index):
+        return float(self.position_x[index]), float(self.position_y[index])
@@ -0,0 +1,158 @@
+import time
+from telemetry import MOTOR_STOPPED, MOTOR_FORWARD, MOTOR_BACKWARD
+
+try:
+    from gpiozero import PWMOutputDevice
+except ImportError:  # Only the gpiozero backends need it; the virtual and mock drives run anywhere
+    PWMOutputDevice = None
+
+RIGHT_PINS = (17, 18)  # (forward, backward) BCM pins of the right motor, as wired on the rover
+LEFT_PINS = (22, 23)
+
+
+def wheel_state(speed):
+    """Telemetry motor code for a wheel speed."""
+    if speed > 0:
+        return MOTOR_FORWARD
+    if speed < 0:
+        return MOTOR_BACKWARD
+    return MOTOR_STOPPED
+
+
+class Drive:
+    """A differential drive whose two wheels always change together.
+
+    Speeds run from -1.0 (full reverse) to 1.0 (full forward); on hardware
+    they are PWM duty cycles. Every command goes through ``set_speeds(left,
+    right)``, which hands both wheels to the backend's ``_apply`` in one call,
+    so there is never a moment where one wheel has the new command and the
+    other the old one. Backends: GpioZeroDrive (real pins, or gpiozero's mock
+    pins), MockDrive (records the writes) and virtual_pi.VirtualDrive (moves a
+    Turtle).
+    """
+
+    def __init__(self):
+        self.left_speed = 0.0
+        self.right_speed = 0.0
+
+    def set_speeds(self, left, right):
+        self.left_speed = max(-1.0, min(1.0, left))
+        self.right_speed = max(-1.0, min(1.0, right))
+        self._apply(self.left_speed, self.right_speed)
+
+    def _apply(self, left, right):
+        raise NotImplementedError
+
+    def set_wheel(self, side, speed):
+        if side == "left":
+            self.set_speeds(speed, self.right_speed)
+        else:
+            self.set_speeds(self.left_speed, speed)
+
+    def forward(self, speed=1.0):
+        self.set_speeds(speed, speed)
+
+    def backward(self, speed=1.0):
+        self.set_speeds(-speed, -speed)
+
+    def set_velocity(self, linear, angular):
+        """Forward speed and turn rate (positive turns left), scaled down together if a wheel would pass 1."""
+        left = linear - angular
+        right = linear + angular
+        peak = max(abs(left), abs(right))
+        if peak > 1.0:
+            left /= peak
+            right /= peak
+        self.set_speeds(left, right)
+
+    def spin_left(self, speed=1.0):
+        self.set_speeds(-speed, speed)
+
+    def spin_right(self, speed=1.0):
+        self.set_speeds(speed, -speed)
+
+    def stop(self):
+        self.set_speeds(0.0, 0.0)
+
+    def is_moving(self):
+        return self.left_speed != 0.0 or self.right_speed != 0.0
+
+    def motor_states(self):
+        """(right, left) telemetry motor codes, the order telemetry.motor_state() takes them in."""
+        return wheel_state(self.right_speed), wheel_state(self.left_speed)
+
+    def close(self):
+        self.stop()
+
+
+class GpioZeroDrive(Drive):
+    """Both motors on gpiozero PWM outputs, updated in one pass.
+
+    The four duty cycles are worked out before any pin is touched, then the
+    changed ones are written back to back: pins being switched off first, so
+    an H-bridge never has a wheel's forward and backward pins on together,
+    then the ones being switched on. Unchanged pins are not written at all.
+    gpiozero has no bank write for PWM, so the wheels still change a few
+    microseconds apart, rather than a motor call (and its logging) apart.
+    """
+
+    def __init__(self, left_pins=LEFT_PINS, right_pins=RIGHT_PINS, frequency=100, pin_factory=None):
+        if PWMOutputDevice is None:
+            raise ImportError("GpioZeroDrive needs gpiozero")
+        super().__init__()
+        # Left forward, left backward, right forward, right backward
+        self.pins = [PWMOutputDevice(pin, frequency=frequency, pin_factory=pin_factory)
+                     for pin in (*left_pins, *right_pins)]
+        self.duty = [0.0] * 4
+        self.writes = 0  # Pin writes actually made
+
+    def _apply(self, left, right):
+        duty = (left if left > 0 else 0.0, -left if left < 0 else 0.0,
+                right if right > 0 else 0.0, -right if right < 0 else 0.0)
+        old = self.duty
+        off = [i for i in range(4) if duty[i] < old[i]]
+        on = [i for i in range(4) if duty[i] > old[i]]
+        pins = self.pins
+        for i in off:
+            pins[i].value = duty[i]
+        for i in on:
+            pins[i].value = duty[i]
+        self.duty = list(duty)
+        self.writes += len(off) + len(on)
+
+    def close(self):
+        super().close()
+        for pin in self.pins:
+            pin.close()
+
+
+class MockDrive(Drive):
+    """Records every (time, left, right) command instead of driving anything; for tests and headless runs."""
+
+    def __init__(self, clock=time.monotonic):
+        super().__init__()
+        self.clock = clock
+        self.commands = []
+
+    def _apply(self, left, right):
+        self.commands.append((self.clock(), left, right))
+
+
+def mock_pin_factory():
+    """gpiozero's mock pin factory with PWM pins, so GpioZeroDrive runs without a Pi."""
+    from gpiozero.pins.mock import MockFactory, MockPWMPin
+    return MockFactory(pin_class=MockPWMPin)
+
+
+def open_drive(backend="gpiozero", **kwargs):
+    """Open a drive by name: 'gpiozero', 'gpiozero-mock' (gpiozero on mock pins) or 'mock'.
+
+    The virtual backend needs a Turtle, so VirtualPiBoard builds its VirtualDrive itself.
+    """
+    if backend == "gpiozero":
+        return GpioZeroDrive(**kwargs)
+    if backend == "gpiozero-mock":
+        return GpioZeroDrive(pin_factory=mock_pin_factory(), **kwargs)
+    if backend == "mock":
+        return MockDrive(**kwargs)
+    raise ValueError(f"Unknown drive backend: {backend}")
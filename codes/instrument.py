@@ -0,0 +1,229 @@
+import collections
+import sys
+import threading
+import time
+
+
+class SpanStats:
+    """Totals for one named span; ``self_total`` leaves out time spent in nested spans."""
+
+    __slots__ = ('count', 'total', 'self_total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.self_total = 0.0
+        self.max = 0.0
+
+
+class _TimedStream:
+    """Stands in for sys.stdout so writes are charged to a 'stdout' span."""
+
+    def __init__(self, instruments, stream):
+        self._instruments = instruments
+        self._stream = stream
+
+    def write(self, text):
+        return self._instruments.call('stdout', self._stream.write, text)
+
+    def flush(self):
+        return self._instruments.call('stdout', self._stream.flush)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class Instrumentation:
+    """Pluggable per-tick instrumentation: tick hooks, named timing spans and a sampling profiler.
+
+    Nothing is timed until it is attached: ``tick()`` wraps a main() update
+    closure, ``attach_simulation()`` wraps the controllers ('control') and the
+    kinematics ('kinematics'), ``attach_view()`` wraps a TurtleView's frames
+    ('render') and title updates ('title'), and ``attach_stdout()`` charges
+    console output to 'stdout'. Spans nest, so a report shows both the total
+    and the self time of each. ``enabled`` can be flipped at any moment; the
+    sampling profiler is started and stopped separately.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.enabled = True
+        self.pre_tick_hooks = []  # Called as hook(tick) before each tick
+        self.post_tick_hooks = []  # Called as hook(tick, seconds) after each tick
+        self.spans = collections.defaultdict(SpanStats)
+        self.ticks = 0
+        self._stack = []  # [name, start, child time] for each open span
+        self._owner = threading.get_ident()  # Spans are only tracked on the thread that runs the ticks
+        self._wrapped = []  # (object, attribute, previous instance value) to restore on detach
+        self._stdout = None
+        self._sampler = None
+        self.samples = collections.Counter()  # (file, line, function) of the innermost frame
+        self.span_samples = collections.Counter()  # Innermost open span at each sample
+
+    # Hooks and spans
+
+    def add_pre_tick_hook(self, hook):
+        self.pre_tick_hooks.append(hook)
+
+    def add_post_tick_hook(self, hook):
+        self.post_tick_hooks.append(hook)
+
+    def call(self, name, fn, *args, **kwargs):
+        """Call ``fn`` inside the span ``name``."""
+        if not self.enabled:
+            return fn(*args, **kwargs)
+        if threading.get_ident() != self._owner:
+            # Another thread (e.g. the telemetry flusher): time it flat, without touching the stack
+            start = self.clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._add(name, self.clock() - start, 0.0)
+        entry = [name, self.clock(), 0.0]
+        self._stack.append(entry)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._stack.pop()
+            elapsed = self.clock() - entry[1]
+            self._add(name, elapsed, entry[2])
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+    def _add(self, name, elapsed, child):
+        stats = self.spans[name]
+        stats.count += 1
+        stats.total += elapsed
+        stats.self_total += elapsed - child
+        if elapsed > stats.max:
+            stats.max = elapsed
+
+    def timed(self, name, fn):
+        """Return ``fn`` wrapped in the span ``name``."""
+        def wrapper(*args, **kwargs):
+            return self.call(name, fn, *args, **kwargs)
+        wrapper.__wrapped__ = fn
+        return wrapper
+
+    def tick(self, fn):
+        """Wrap a per-tick update closure: pre/post hooks around a 'tick' span."""
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            tick = self.ticks
+            for hook in self.pre_tick_hooks:
+                hook(tick)
+            start = self.clock()
+            try:
+                return self.call('tick', fn, *args, **kwargs)
+            finally:
+                self.ticks = tick + 1
+                elapsed = self.clock() - start
+                for hook in self.post_tick_hooks:
+                    hook(tick, elapsed)
+        wrapper.__wrapped__ = fn
+        return wrapper
+
+    # Attaching to the simulation and the views
+
+    def wrap(self, obj, attribute, name):
+        """Replace ``obj.attribute`` with a timed version until ``detach()``."""
+        self._wrapped.append((obj, attribute, vars(obj).get(attribute)))
+        setattr(obj, attribute, self.timed(name, getattr(obj, attribute)))
+
+    def attach_simulation(self, sim):
+        """Time a RoverSimulation's controllers as 'control' and its motion primitives as 'kinematics'."""
+        self.wrap(sim.auto_control, 'update', 'control')
+        self.wrap(sim.manual_control, 'update', 'control')
+        for attribute in ('_move', 'turn_left', 'turn_right', 'adjust_heading', 'set_pose'):
+            self.wrap(sim, attribute, 'kinematics')
+
+    def attach_view(self, view):
+        """Time a TurtleView's frames as 'render' and its window title updates as 'title'."""
+        target = view.renderer if view.renderer is not None else view
+        self.wrap(target, 'draw', 'render')
+        self.wrap(view, 'update_screen_title', 'title')
+
+    def attach_stdout(self):
+        if self._stdout is None:
+            self._stdout = sys.stdout
+            sys.stdout = _TimedStream(self, sys.stdout)
+
+    def detach(self):
+        """Undo every wrap, leaving the original methods and sys.stdout in place."""
+        for obj, attribute, previous in reversed(self._wrapped):
+            if previous is None:
+                delattr(obj, attribute)  # The class attribute shows through again
+            else:
+                setattr(obj, attribute, previous)
+        self._wrapped = []
+        if self._stdout is not None:
+            sys.stdout = self._stdout
+            self._stdout = None
+
+    # Sampling profiler
+
+    def start_sampling(self, interval=0.002):
+        """Sample the tick thread's stack every ``interval`` seconds on a background thread."""
+        if self._sampler is not None:
+            return
+        stop = threading.Event()
+        thread = threading.Thread(target=self._sample, args=(stop, interval), name="tick-sampler", daemon=True)
+        self._sampler = (thread, stop)
+        thread.start()
+
+    def stop_sampling(self):
+        if self._sampler is None:
+            return
+        thread, stop = self._sampler
+        stop.set()
+        thread.join()
+        self._sampler = None
+
+    def sampling(self):
+        return self._sampler is not None
+
+    def toggle_sampling(self):
+        """Start or stop the sampler (bind it to a key); stopping prints what was found."""
+        if self.sampling():
+            self.stop_sampling()
+            print(self.report())
+        else:
+            self.start_sampling()
+            print("Sampling profiler started")
+
+    def _sample(self, stop, interval):
+        owner = self._owner
+        while not stop.wait(interval):
+            frame = sys._current_frames().get(owner)
+            while frame is not None and frame.f_code.co_filename == __file__:
+                frame = frame.f_back  # Charge our own wrappers to the code they wrap
+            if frame is None:
+                continue
+            code = frame.f_code
+            self.samples[(code.co_filename, frame.f_lineno, code.co_name)] += 1
+            stack = self._stack
+            self.span_samples[stack[-1][0] if stack else 'idle'] += 1
+
+    # Reporting
+
+    def reset(self):
+        self.spans.clear()
+        self.ticks = 0
+        self.samples.clear()
+        self.span_samples.clear()
+
+    def report(self, top=10):
+        lines = [f"{self.ticks} ticks"]
+        lines.append(f"{'span':<12}{'count':>9}{'total ms':>11}{'self ms':>10}{'mean us':>10}{'max us':>10}")
+        for name, stats in sorted(self.spans.items(), key=lambda item: -item[1].self_total):
+            mean = stats.total / stats.count if stats.count else 0.0
+            lines.append(f"{name:<12}{stats.count:>9}{stats.total * 1e3:>11.2f}{stats.self_total * 1e3:>10.2f}"
+                         f"{mean * 1e6:>10.1f}{stats.max * 1e6:>10.1f}")
+        total = sum(self.span_samples.values())
+        if total:
+            lines.append(f"{total} samples by span: " + ", ".join(
+                f"{name} {count / total:.0%}" for name, count in self.span_samples.most_common()))
+            for (filename, line, function), count in self.samples.most_common(top):
+                lines.append(f"{count / total:>6.1%}  {function} ({filename}:{line})")
+        return "\n".join(lines)
@@ -1,132 +1,142 @@
-import turtle
-import math
-from auto_control import AutoControl
-from manual_control import ManualControl
-
-class VirtualPiBoard:
-    def __init__(self):
-        self.motor = turtle.Turtle()
-        self.motor.hideturtle()
-        self.motor.penup()
-        self.position_x = 0
-        self.position_y = 0
-        self.heading = 0  # Angle in radians
-        self.rover = turtle.Turtle()
-        self.rover.shape("turtle")  # Change shape here
-        self.rover.color("blue")
-        self.rover.penup()
-        self.rover.speed(5)  # Increase speed (1 is fastest, 10 is slowest)
-        self.auto_control = AutoControl(self)
-        self.manual_control = ManualControl(self)
-        self.control_mode = 'manual'  # Default mode; will be set by user input
-        self.initial_mode_selection()  # Prompt user for mode at start
-
-    def initial_mode_selection(self):
-        # Prompt the user to select the starting mode
-        mode = turtle.textinput("Select Mode", "Enter 'manual' or 'auto' to start:")
-        if mode and mode.lower() == 'auto':
-            self.set_auto_mode()
-        else:
-            self.set_manual_mode()
-
-    def move_forward(self):
-        self.position_x += math.cos(self.heading) * 10
-        self.position_y += math.sin(self.heading) * 10
-        self.update_rover_position()
-
-    def move_backward(self):
-        self.position_x -= math.cos(self.heading) * 10
-        self.position_y -= math.sin(self.heading) * 10
-        self.update_rover_position()
-
-    def turn_left(self):
-        self.heading -= math.pi / 8  # Turn 22.5 degrees left
-        self.update_rover_position()
-
-    def turn_right(self):
-        self.heading += math.pi / 8  # Turn 22.5 degrees right
-        self.update_rover_position()
-
-    def stop(self):
-        # Placeholder to manage stop actions if needed
-        pass
-
-    def get_lat_lon(self):
-        # For simplicity, assume x and y directly represent lat and lon
-        return self.position_x, self.position_y
-
-    def adjust_heading(self, angle):
-        self.heading = angle
-        self.update_rover_position()
-
-    def update_rover_position(self):
-        self.rover.setheading(math.degrees(self.heading))
-        self.rover.goto(self.position_x, self.position_y)
-        self.update_screen_title()
-
-    def update_screen_title(self):
-        lat, lon = self.get_lat_lon()
-        turtle.title(f"Rover Simulation - Lat: {lat:.2f}, Lon: {lon:.2f} | Mode: {self.control_mode.capitalize()}")
-
-    def set_auto_mode(self):
-        self.control_mode = 'auto'
-        print("Switched to auto mode")
-        self.prompt_target_location()
-
-    def set_manual_mode(self):
-        # Immediately switch to manual mode and halt any ongoing auto navigation
-        self.control_mode = 'manual'
-        self.auto_control.stop_auto_navigation()  # Stop auto mode actions immediately
-        print("Switched to manual mode")
-
-    def prompt_target_location(self):
-        # Prompt the user to enter target latitude and longitude
-        target_lat = turtle.numinput("Target Location", "Enter target latitude:", default=0)
-        target_lon = turtle.numinput("Target Location", "Enter target longitude:", default=0)
-        if target_lat is not None and target_lon is not None:
-            self.auto_control.set_target(target_lat, target_lon)
-        else:
-            self.set_manual_mode()  # Return to manual mode if the user cancels input
-
-    def handle_auto_completion(self):
-        # Called when the target is reached in auto mode
-        print("Target reached in auto mode.")
-        self.set_manual_mode()  # Set to manual mode after reaching target
-
-def setup_key_bindings(board):
-    turtle.listen()
-    turtle.onkeypress(board.manual_control.move_forward, 'Up')
-    turtle.onkeypress(board.manual_control.move_backward, 'Down')
-    turtle.onkeypress(board.manual_control.turn_left, 'Left')
-    turtle.onkeypress(board.manual_control.turn_right, 'Right')
-    turtle.onkeyrelease(board.manual_control.stop, 'Up')
-    turtle.onkeyrelease(board.manual_control.stop, 'Down')
-    turtle.onkeyrelease(board.manual_control.stop, 'Left')
-    turtle.onkeyrelease(board.manual_control.stop, 'Right')
-    turtle.onkey(board.set_auto_mode, 'a')  # Switch to auto mode
-    turtle.onkey(board.set_manual_mode, 'm')  # Switch to manual mode
-
-def main():
-    screen = turtle.Screen()
-    screen.title("Rover Simulation - Lat: 0.00, Lon: 0.00 | Mode: Manual")
-    screen.bgcolor("white")
-
-    board = VirtualPiBoard()  # Instantiate the virtual board
-
-    setup_key_bindings(board)  # Set up keyboard controls for manual and auto mode switching
-
-    def update():
-        # Update based on the current control mode
-        if board.control_mode == 'auto':
-            if board.auto_control.update():  # Update auto mode movement and check if target is reached
-                board.handle_auto_completion()  # Handle reaching the target
-        else:
-            board.manual_control.update()  # Update manual mode controls
-        screen.ontimer(update, 100)  # Schedule the next update
-
-    update()  # Initial update call to start the loop
-    turtle.mainloop()  # Start the turtle main loop
-
-if __name__ == '__main__':
-    main()
-
+import argparse
+import turtle
+from rover_sim import RoverSimulation
+from controllers import PurePursuitController
+from turtle_view import TurtleView
+from mission_log import MissionRecorder
+from scheduler import ControlLoop
+from instrument import Instrumentation
+
+class VirtualPiBoard(RoverSimulation):
+    def __init__(self, mode='manual', target=None):
+        # Kinematics, controllers and mode live in the headless simulation core; no GUI until open_view()
+        super().__init__(move_distance=10, controller=PurePursuitController)
+        self.motor = None
+        self.rover = None
+        self.view = None
+        self.control_mode = mode
+        self.auto_control.add_observer(self.report_run)  # Time-to-target and path length for every run
+        if target is not None:
+            self.auto_control.set_target(*target)
+
+    def open_view(self):
+        """Create the turtles and the view on first use; headless boards never touch the GUI."""
+        if self.view is None:
+            self.motor = turtle.Turtle()
+            self.motor.hideturtle()
+            self.motor.penup()
+            self.rover = turtle.Turtle()
+            self.rover.shape("turtle")  # Change shape here
+            self.rover.color("blue")
+            self.rover.penup()
+            self.rover.speed(5)  # Increase speed (1 is fastest, 10 is slowest)
+            # The turtle is only an observer of the simulated state
+            self.view = TurtleView(self.rover, "Rover Simulation - Lat: {lat:.2f}, Lon: {lon:.2f} | Mode: {mode}")
+            self.add_observer(self.view)
+            self.view(self.state)  # Show where the rover already is
+        return self.view
+
+    def initial_mode_selection(self):
+        # Prompt the user to select the starting mode
+        mode = turtle.textinput("Select Mode", "Enter 'manual' or 'auto' to start:")
+        if mode and mode.lower() == 'auto':
+            self.set_auto_mode()
+        else:
+            self.set_manual_mode()
+
+    def report_run(self, stats):
+        print(f"Target reached: {stats}")
+
+    def set_auto_mode(self):
+        self.control_mode = 'auto'
+        print("Switched to auto mode")
+        self.prompt_target_location()
+
+    def set_manual_mode(self):
+        # Immediately switch to manual mode and halt any ongoing auto navigation
+        self.control_mode = 'manual'
+        self.auto_control.stop_auto_navigation()  # Stop auto mode actions immediately
+        print("Switched to manual mode")
+
+    def prompt_target_location(self):
+        # Prompt the user to enter target latitude and longitude
+        target_lat = turtle.numinput("Target Location", "Enter target latitude:", default=0)
+        target_lon = turtle.numinput("Target Location", "Enter target longitude:", default=0)
+        if target_lat is not None and target_lon is not None:
+            self.auto_control.set_target(target_lat, target_lon)
+        else:
+            self.set_manual_mode()  # Return to manual mode if the user cancels input
+
+    def handle_auto_completion(self):
+        # Called when the target is reached in auto mode
+        print("Target reached in auto mode.")
+        self.set_manual_mode()  # Set to manual mode after reaching target
+
+def setup_key_bindings(board, instruments=None):
+    turtle.listen()
+    turtle.onkeypress(board.manual_control.move_forward, 'Up')
+    turtle.onkeypress(board.manual_control.move_backward, 'Down')
+    turtle.onkeypress(board.manual_control.turn_left, 'Left')
+    turtle.onkeypress(board.manual_control.turn_right, 'Right')
+    turtle.onkeyrelease(board.manual_control.stop, 'Up')
+    turtle.onkeyrelease(board.manual_control.stop, 'Down')
+    turtle.onkeyrelease(board.manual_control.stop, 'Left')
+    turtle.onkeyrelease(board.manual_control.stop, 'Right')
+    turtle.onkey(board.set_auto_mode, 'a')  # Switch to auto mode
+    turtle.onkey(board.set_manual_mode, 'm')  # Switch to manual mode
+    if instruments is not None:
+        turtle.onkey(instruments.toggle_sampling, 'p')  # Start/stop the sampling profiler
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rover simulation with a turtle view.")
+    parser.add_argument('--mode', choices=('manual', 'auto'),
+                        help="mode to start in (default: ask)")
+    parser.add_argument('--target', nargs=2, type=float, metavar=('LAT', 'LON'),
+                        help="target for auto mode; implies --mode auto")
+    args = parser.parse_args(argv)
+    if args.target is not None:
+        args.mode = 'auto'
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    screen = turtle.Screen()
+    screen.title("Rover Simulation - Lat: 0.00, Lon: 0.00 | Mode: Manual")
+    screen.bgcolor("white")
+
+    board = VirtualPiBoard(mode=args.mode or 'manual', target=args.target)  # Instantiate the virtual board
+    board.open_view()
+
+    # Time control, kinematics, rendering, titles and console output per tick; 'p' toggles sampling
+    instruments = Instrumentation()
+    setup_key_bindings(board, instruments)  # Set up keyboard controls for manual and auto mode switching
+    if args.mode is None:
+        board.initial_mode_selection()  # Only ask when the mode was not given on the command line
+    elif args.mode == 'auto' and args.target is None:
+        board.prompt_target_location()
+    board.view.start(fps=30)  # Redraw at 30 FPS, independent of the 100 ms control tick
+    instruments.attach_simulation(board)
+    instruments.attach_view(board.view)
+    instruments.attach_stdout()
+    board.recorder = MissionRecorder("mission.rml")  # Every tick is logged; play back with replay.py
+
+    def update():
+        # Run one control tick in the current mode and check if the target is reached
+        if board.step() and board.control_mode == 'auto':
+            board.handle_auto_completion()  # Handle reaching the target
+
+    # Tick every 100 ms against a fixed deadline so the control rate does not drift with the work done
+    loop = ControlLoop(screen, instruments.tick(update), period_ms=board.dt * 1000)
+    loop.start()  # The first tick runs straight away
+    try:
+        turtle.mainloop()  # Start the turtle main loop
+    finally:
+        board.recorder.close()  # Flush the log, so replay.py finds every tick
+    instruments.stop_sampling()
+    instruments.detach()
+    print(loop.report())
+    print(instruments.report())
+
+if __name__ == '__main__':
+    main()
+
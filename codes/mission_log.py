@@ -0,0 +1,196 @@
+import bisect
+import mmap
+import struct
+import time
+from rover_sim import RoverState
+from telemetry import MODE_CODES, MODE_NAMES, MODE_UNKNOWN
+
+# File layout: a 64-byte header, then one column per field, each ``capacity`` entries long:
+# timestamps, x, y and heading as float64, then the mode codes as uint8.
+MAGIC = b'RVML'
+VERSION = 1
+HEADER = struct.Struct('<4sIQQ')  # magic, version, capacity, count
+HEADER_SIZE = 64
+COLUMNS = (('timestamp', 'd'), ('x', 'd'), ('y', 'd'), ('heading', 'd'), ('mode', 'B'))
+RECORD_SIZE = sum(struct.calcsize(fmt) for _, fmt in COLUMNS)
+
+
+def _file_size(capacity):
+    return HEADER_SIZE + capacity * RECORD_SIZE
+
+
+def _column_views(buffer, capacity, count):
+    """Return typed memoryviews over the first ``count`` entries of every column."""
+    views = {}
+    offset = HEADER_SIZE
+    raw = memoryview(buffer)
+    for name, fmt in COLUMNS:
+        itemsize = struct.calcsize(fmt)
+        views[name] = raw[offset:offset + count * itemsize].cast(fmt)
+        offset += capacity * itemsize
+    raw.release()
+    return views
+
+
+class MissionRecorder:
+    """Appends rover states to a memory-mapped, column-per-field mission log.
+
+    The count in the header is updated with every record, so the file is
+    readable at any moment, even if the process dies mid-mission.
+    """
+
+    def __init__(self, path, capacity=65536):
+        self.path = path
+        self.capacity = capacity
+        self.count = 0
+        self._file = open(path, 'w+b')
+        self._file.truncate(_file_size(capacity))
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._write_header()
+        self._open_columns()
+
+    def _write_header(self):
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, self.capacity, self.count)
+
+    def _open_columns(self):
+        self._columns = list(_column_views(self._map, self.capacity, self.capacity).values())
+
+    def _release_columns(self):
+        for view in self._columns:
+            view.release()
+        self._columns = []
+
+    def _grow(self):
+        """Double the capacity, moving each column to its new offset (last column first)."""
+        old_capacity, new_capacity = self.capacity, self.capacity * 2
+        self._release_columns()
+        self._map.resize(_file_size(new_capacity))
+        offsets = []
+        old_offset = new_offset = HEADER_SIZE
+        for _, fmt in COLUMNS:
+            itemsize = struct.calcsize(fmt)
+            offsets.append((old_offset, new_offset, old_capacity * itemsize))
+            old_offset += old_capacity * itemsize
+            new_offset += new_capacity * itemsize
+        for old_offset, new_offset, length in reversed(offsets):
+            self._map.move(new_offset, old_offset, length)
+        self.capacity = new_capacity
+        self._write_header()
+        self._open_columns()
+
+    def record(self, timestamp, x, y, heading, mode):
+        if self.count == self.capacity:
+            self._grow()
+        i = self.count
+        times, xs, ys, headings, modes = self._columns
+        times[i] = timestamp
+        xs[i] = x
+        ys[i] = y
+        headings[i] = heading
+        modes[i] = MODE_CODES.get(mode, MODE_UNKNOWN)
+        self.count = i + 1
+        struct.pack_into('<Q', self._map, 16, self.count)  # Publish the new count
+
+    def record_state(self, timestamp, state):
+        # Simulation coordinates, so a replay lines up with the views
+        self.record(timestamp, state.position_x, state.position_y, state.heading, state.control_mode)
+
+    def close(self):
+        if self._map is None:
+            return
+        self._release_columns()
+        self._map.flush()
+        self._map.close()
+        self._map = None
+        self._file.close()
+
+
+class MissionLog:
+    """Read-only view of a mission log; records are available as soon as it is opened."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.capacity, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} mission log")
+        columns = _column_views(self._map, self.capacity, self.count)
+        self.timestamps = columns['timestamp']
+        self.xs = columns['x']
+        self.ys = columns['y']
+        self.headings = columns['heading']
+        self.modes = columns['mode']
+
+    def __len__(self):
+        return self.count
+
+    def start_time(self):
+        return self.timestamps[0] if self.count else 0.0
+
+    def end_time(self):
+        return self.timestamps[self.count - 1] if self.count else 0.0
+
+    def index_at(self, timestamp):
+        """Index of the last record at or before ``timestamp`` (binary search, O(log n))."""
+        index = bisect.bisect_right(self.timestamps, timestamp) - 1
+        return min(max(index, 0), self.count - 1)
+
+    def record(self, index):
+        return (self.timestamps[index], self.xs[index], self.ys[index], self.headings[index],
+                MODE_NAMES.get(self.modes[index], 'manual'))
+
+    def close(self):
+        for view in (self.timestamps, self.xs, self.ys, self.headings, self.modes):
+            view.release()
+        self._map.close()
+        self._file.close()
+
+
+class MissionReplay:
+    """Plays a mission log back into a RoverState at any speed, notifying view observers."""
+
+    def __init__(self, log, speed=1.0, clock=time.monotonic):
+        self.log = log
+        self.speed = speed
+        self.clock = clock
+        self.state = RoverState()
+        self.observers = []  # Same callables the live simulation uses, e.g. a TurtleView
+        self.index = -1
+        self.playback_time = log.start_time()
+        self._wall_start = None
+        self._playback_start = self.playback_time
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def seek(self, timestamp):
+        """Jump to ``timestamp`` and show the record in effect at that moment."""
+        self.playback_time = min(max(timestamp, self.log.start_time()), self.log.end_time())
+        self._wall_start = self.clock()
+        self._playback_start = self.playback_time
+        self._show(self.log.index_at(self.playback_time))
+
+    def set_speed(self, speed):
+        self.seek(self.playback_time)  # Re-anchor the clock so the change applies from now
+        self.speed = speed
+
+    def update(self):
+        """Advance the playback to the current wall-clock time; returns False once finished."""
+        if not len(self.log):
+            return False
+        if self._wall_start is None:
+            self.seek(self.playback_time)
+        self.playback_time = self._playback_start + (self.clock() - self._wall_start) * self.speed
+        self._show(self.log.index_at(self.playback_time))
+        return self.playback_time < self.log.end_time()
+
+    def _show(self, index):
+        if index == self.index:
+            return
+        self.index = index
+        _, x, y, heading, mode = self.log.record(index)
+        state = self.state
+        state.position_x, state.position_y, state.heading, state.control_mode = x, y, heading, mode
+        for observer in self.observers:
+            observer(state)
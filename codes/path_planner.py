@@ -0,0 +1,478 @@
+import heapq
+import logging
+import math
+import numpy as np
+
+SQRT2 = math.sqrt(2)
+
+
+class GridPlanner:
+    """Shortest paths on an occupancy grid (8-connected, no cutting past blocked corners).
+
+    ``grid`` is any 2D array-like where a truthy cell is blocked, indexed as
+    ``grid[i][j]`` with ``i`` along x (latitude) and ``j`` along y (longitude).
+    Plans are made with jump point search, which skips across open space instead
+    of expanding every cell, and are cached per (start, goal) cell pair until the
+    grid changes. Straight scans run as byte searches over per-direction marker
+    arrays built once per grid, so they cost C speed rather than a Python loop per
+    cell. ``plan_astar`` is the plain A* equivalent. ``resolution`` and
+    ``origin`` default to the grid's own (an OccupancyGrid has them), else 1.0
+    and (0.0, 0.0).
+    """
+
+    def __init__(self, grid, resolution=None, origin=None, cache_size=1024):
+        self.resolution = resolution if resolution is not None else getattr(grid, 'resolution', 1.0)
+        self.origin = origin if origin is not None else getattr(grid, 'origin', (0.0, 0.0))
+        self.cache_size = cache_size
+        self.segment_cache = {}
+        self.grid_version = None
+        self.set_grid(grid)
+
+    def set_grid(self, grid):
+        """Take a snapshot of the grid; cached segments are dropped."""
+        cells = np.asarray(grid, dtype=bool)
+        self.rows, self.cols = cells.shape
+        # Padded copy with a blocked border, so neighbour lookups never need bounds checks
+        padded = np.ones((self.rows + 2, self.cols + 2), dtype=bool)
+        padded[1:-1, 1:-1] = cells
+        self.height, self.width = padded.shape
+        self._padded = padded
+        self.blocked = bytearray(padded.astype(np.uint8).tobytes())
+        self._marker_arrays = {name: padded.astype(np.uint8) for name in ('right', 'left', 'down', 'up')}
+        self._fill_markers(1, self.height - 1, 1, self.width - 1)
+        self.markers = {}
+        for name, marker in self._marker_arrays.items():
+            if name in ('down', 'up'):
+                marker = marker.T  # Stored transposed so that column scans are contiguous too
+            self.markers[name] = bytearray(marker.tobytes())
+        self.segment_cache.clear()
+        self.grid_version = getattr(grid, 'version', None)
+
+    def _fill_markers(self, r0, r1, c0, c1):
+        """Recompute the marker arrays for padded rows [r0, r1) and columns [c0, c1).
+
+        Per straight direction a marker is 1 where blocked and 2 where a scan has to
+        stop because a forced neighbour opens up beside it.
+        """
+        b = self._padded[r0 - 1:r1 + 1, c0 - 1:c1 + 1]
+        free = ~b
+        inner = free[1:-1, 1:-1]
+        forced = {
+            'right': (free[:-2, 1:-1] & b[:-2, :-2]) | (free[2:, 1:-1] & b[2:, :-2]),
+            'left': (free[:-2, 1:-1] & b[:-2, 2:]) | (free[2:, 1:-1] & b[2:, 2:]),
+            'down': (free[1:-1, :-2] & b[:-2, :-2]) | (free[1:-1, 2:] & b[:-2, 2:]),
+            'up': (free[1:-1, :-2] & b[2:, :-2]) | (free[1:-1, 2:] & b[2:, 2:]),
+        }
+        for name, mask in forced.items():
+            window = self._marker_arrays[name][r0:r1, c0:c1]
+            window[:] = b[1:-1, 1:-1]
+            window[mask & inner] = 2
+
+    def update_region(self, cells, i0, i1, j0, j1, added=True):
+        """Bring the snapshot up to date after cells [i0, i1) x [j0, j1) of ``cells`` changed.
+
+        Only the changed block (plus the one-cell ring whose markers depend on it)
+        is rebuilt. Cached segments that cannot be affected are kept: after obstacles
+        are added, that is every path that stays clear of the block.
+        """
+        self._padded[i0 + 1:i1 + 1, j0 + 1:j1 + 1] = np.asarray(cells, dtype=bool)[i0:i1, j0:j1]
+        r0, r1 = max(1, i0), min(self.height - 1, i1 + 2)
+        c0, c1 = max(1, j0), min(self.width - 1, j1 + 2)
+        self._fill_markers(r0, r1, c0, c1)
+
+        width, height = self.width, self.height
+        block = self._padded[r0:r1, c0:c1].astype(np.uint8)
+        for r in range(r0, r1):
+            self.blocked[r * width + c0:r * width + c1] = block[r - r0].tobytes()
+        for name in ('right', 'left'):
+            marker, window = self.markers[name], self._marker_arrays[name]
+            for r in range(r0, r1):
+                marker[r * width + c0:r * width + c1] = window[r, c0:c1].tobytes()
+        for name in ('down', 'up'):
+            marker, window = self.markers[name], self._marker_arrays[name]
+            for c in range(c0, c1):
+                marker[c * height + r0:c * height + r1] = window[r0:r1, c].tobytes()
+
+        if added:
+            stale = [key for key, path in self.segment_cache.items()
+                     if path is not None and _path_touches(path, i0, i1, j0, j1)]
+            for key in stale:
+                del self.segment_cache[key]
+        else:
+            self.segment_cache.clear()  # Freed cells can open shorter routes anywhere
+        self.grid_version = getattr(cells, 'version', None)
+
+    def on_cells_changed(self, grid, i0, i1, j0, j1, added):
+        """OccupancyGrid observer hook: keeps the planner in step with the world model."""
+        self.update_region(grid, i0, i1, j0, j1, added)
+
+    # Coordinates
+
+    def world_to_cell(self, x, y):
+        return (int(math.floor((x - self.origin[0]) / self.resolution)),
+                int(math.floor((y - self.origin[1]) / self.resolution)))
+
+    def cell_to_world(self, cell):
+        """Center of a cell in world coordinates."""
+        return (self.origin[0] + (cell[0] + 0.5) * self.resolution,
+                self.origin[1] + (cell[1] + 0.5) * self.resolution)
+
+    def _index(self, cell):
+        return (cell[0] + 1) * self.width + cell[1] + 1
+
+    def _cell(self, index):
+        i, j = divmod(index, self.width)
+        return i - 1, j - 1
+
+    def is_free(self, cell):
+        i, j = cell
+        return 0 <= i < self.rows and 0 <= j < self.cols and not self.blocked[self._index(cell)]
+
+    # Planning
+
+    def plan(self, start, goal):
+        """Turning points from ``start`` to ``goal`` cell (both included), or None if unreachable.
+
+        Consecutive points are joined by straight or diagonal runs of free cells.
+        """
+        key = (start, goal)
+        path = self.segment_cache.get(key)
+        if path is None and key not in self.segment_cache:
+            path = self._jump_point_search(start, goal)
+            if len(self.segment_cache) >= self.cache_size:
+                self.segment_cache.clear()
+            self.segment_cache[key] = path
+        return list(path) if path is not None else None
+
+    def _octile(self, a, b):
+        ai, aj = divmod(a, self.width)
+        bi, bj = divmod(b, self.width)
+        di, dj = abs(ai - bi), abs(aj - bj)
+        return max(di, dj) + (SQRT2 - 1) * min(di, dj)
+
+    def _jump_point_search(self, start, goal):
+        if not self.is_free(start) or not self.is_free(goal):
+            return None
+        start_index, goal_index = self._index(start), self._index(goal)
+        if start_index == goal_index:
+            return (start, goal)
+
+        g_score = {start_index: 0.0}
+        parent = {start_index: None}
+        open_heap = [(self._octile(start_index, goal_index), 0.0, start_index)]
+        closed = set()
+        while open_heap:
+            _, g, node = heapq.heappop(open_heap)
+            if node == goal_index:
+                points = []
+                while node is not None:
+                    points.append(self._cell(node))
+                    node = parent[node]
+                points.reverse()
+                return tuple(points)
+            if node in closed:
+                continue
+            closed.add(node)
+            for direction in self._pruned_directions(node, parent[node]):
+                jump_point = self._jump(node, direction, goal_index)
+                if jump_point is None or jump_point in closed:
+                    continue
+                new_g = g + self._octile(node, jump_point)
+                if new_g < g_score.get(jump_point, math.inf):
+                    g_score[jump_point] = new_g
+                    parent[jump_point] = node
+                    heapq.heappush(open_heap, (new_g + self._octile(jump_point, goal_index), new_g, jump_point))
+        return None
+
+    def _step_direction(self, node, parent):
+        ni, nj = divmod(node, self.width)
+        pi, pj = divmod(parent, self.width)
+        di = (ni > pi) - (ni < pi)
+        dj = (nj > pj) - (nj < pj)
+        return di, dj
+
+    def _pruned_directions(self, node, parent):
+        """Directions worth searching from ``node``, given where the search came from."""
+        blocked, width = self.blocked, self.width
+        if parent is None:
+            directions = []
+            for di in (-1, 0, 1):
+                for dj in (-1, 0, 1):
+                    if (di or dj) and self._can_step(node, di, dj):
+                        directions.append(di * width + dj)
+            return directions
+
+        di, dj = self._step_direction(node, parent)
+        directions = []
+        if di and dj:
+            vertical, horizontal = di * width, dj
+            if not blocked[node + vertical]:
+                directions.append(vertical)
+            if not blocked[node + horizontal]:
+                directions.append(horizontal)
+            if not blocked[node + vertical] and not blocked[node + horizontal]:
+                directions.append(vertical + horizontal)
+        else:
+            forward = di * width + dj
+            side = 1 if di else width  # Perpendicular to the direction of travel
+            forward_free = not blocked[node + forward]
+            for s in (side, -side):
+                if not blocked[node + s]:
+                    directions.append(s)
+                    if forward_free:
+                        directions.append(forward + s)
+            if forward_free:
+                directions.append(forward)
+        return directions
+
+    def _can_step(self, node, di, dj):
+        blocked, width = self.blocked, self.width
+        if blocked[node + di * width + dj]:
+            return False
+        if di and dj:
+            return not blocked[node + di * width] and not blocked[node + dj]
+        return True
+
+    def _jump_straight(self, node, direction, goal):
+        """Scan in a straight line; returns the goal, the first forced stop, or None at a wall."""
+        width = self.width
+        horizontal = direction == 1 or direction == -1
+        if horizontal:
+            marker = self.markers['right' if direction == 1 else 'left']
+            start, target, line, step = node, goal, width, direction
+        else:
+            # Vertical scans run along the transposed markers, where columns are contiguous
+            height = self.height
+            marker = self.markers['down' if direction > 0 else 'up']
+            start = (node % width) * height + node // width
+            target = (goal % width) * height + goal // width
+            line, step = height, 1 if direction > 0 else -1
+
+        if step > 0:
+            wall = marker.find(1, start + 1)
+            stop = marker.find(2, start + 1, wall)
+        else:
+            wall = marker.rfind(1, 0, start)
+            stop = marker.rfind(2, wall + 1, start)
+        last = stop if stop != -1 else wall - step  # Furthest cell the scan reaches
+        if target // line == start // line and 0 < (target - start) * step <= (last - start) * step:
+            return goal
+        if stop == -1:
+            return None
+        if horizontal:
+            return stop
+        return (stop % height) * width + stop // height
+
+    def _jump(self, node, direction, goal):
+        """Next jump point from ``node`` heading in ``direction``, or None."""
+        width = self.width
+        if abs(direction) == 1 or abs(direction) == width:
+            return self._jump_straight(node, direction, goal)
+        blocked = self.blocked
+        vertical = width if direction > 0 else -width  # |horizontal| is 1, so the sign is the vertical's
+        horizontal = direction - vertical
+        while True:
+            node += direction
+            if blocked[node]:
+                return None
+            if node == goal:
+                return node
+            if self._jump_straight(node, vertical, goal) is not None or \
+                    self._jump_straight(node, horizontal, goal) is not None:
+                return node
+            if blocked[node + vertical] or blocked[node + horizontal]:
+                return None  # Moving on would cut a blocked corner
+
+    def plan_astar(self, start, goal):
+        """Plain A* over every cell; returns the full cell path or None."""
+        if not self.is_free(start) or not self.is_free(goal):
+            return None
+        start_index, goal_index = self._index(start), self._index(goal)
+        width = self.width
+        steps = [(di * width + dj, SQRT2 if di and dj else 1.0, di, dj)
+                 for di in (-1, 0, 1) for dj in (-1, 0, 1) if di or dj]
+        g_score = {start_index: 0.0}
+        parent = {start_index: None}
+        open_heap = [(self._octile(start_index, goal_index), 0.0, start_index)]
+        closed = set()
+        while open_heap:
+            _, g, node = heapq.heappop(open_heap)
+            if node == goal_index:
+                cells = []
+                while node is not None:
+                    cells.append(self._cell(node))
+                    node = parent[node]
+                cells.reverse()
+                return cells
+            if node in closed:
+                continue
+            closed.add(node)
+            for offset, cost, di, dj in steps:
+                neighbour = node + offset
+                if neighbour in closed or not self._can_step(node, di, dj):
+                    continue
+                new_g = g + cost
+                if new_g < g_score.get(neighbour, math.inf):
+                    g_score[neighbour] = new_g
+                    parent[neighbour] = node
+                    heapq.heappush(open_heap, (new_g + self._octile(neighbour, goal_index), new_g, neighbour))
+        return None
+
+
+def _path_touches(points, i0, i1, j0, j1):
+    """True if any run between consecutive points has its bounding box inside the block."""
+    for (ai, aj), (bi, bj) in zip(points, points[1:]):
+        if min(ai, bi) < i1 and max(ai, bi) >= i0 and min(aj, bj) < j1 and max(aj, bj) >= j0:
+            return True
+    return False
+
+
+def path_length(cells):
+    """Octile length of a path given as cells."""
+    total = 0.0
+    for (ai, aj), (bi, bj) in zip(cells, cells[1:]):
+        di, dj = abs(ai - bi), abs(aj - bj)
+        total += max(di, dj) + (SQRT2 - 1) * min(di, dj)
+    return total
+
+
+class WaypointMission:
+    """Drives AutoControl through a list of waypoints along planned, obstacle-free routes.
+
+    Each leg between waypoints is planned once (and cached by the planner). The
+    route's turning points are handed to AutoControl one at a time. Planning is
+    done in the simulation's local x/y, the units of the grid and of the
+    collision checks; waypoints are (lat, lon) like any other target and are
+    converted through the controller's frame. The way to the next turning
+    point is planned again when the rover drifts more than
+    ``replan_distance`` from the current route segment, or when
+    ``blocked_limit`` moves in a row were refused by the world model; the
+    rover then heads for the farthest point of the new route it can see.
+    """
+
+    def __init__(self, planner, auto_control, waypoints, replan_distance=None, blocked_limit=3):
+        self.planner = planner
+        self.auto_control = auto_control
+        self.rover = auto_control.rover
+        self.waypoints = list(waypoints)
+        if replan_distance is None:
+            # A controller ends a leg up to its threshold short of the turning point and may take one more
+            # step along its old heading, so only drift beyond that (and a cell) means the rover is off route
+            step = getattr(auto_control, 'max_speed', getattr(self.rover, 'move_distance', 0.0))
+            replan_distance = auto_control.threshold + step + planner.resolution
+        self.replan_distance = replan_distance
+        self.blocked_limit = blocked_limit
+        self.route = []  # Local (x, y) points still to visit, current target first
+        self.segment_start = None
+        self.finished = False
+        self.replans = 0
+        self.blocked = 0  # Refused moves in a row
+
+    def _position(self):
+        return self.rover.position_x, self.rover.position_y
+
+    def _to_local(self, lat, lon):
+        frame = self.auto_control.frame
+        if frame is None:
+            return lat, lon
+        east, north = frame.to_enu(lat, lon)
+        return north, east
+
+    def _aim(self, point):
+        """Make ``point`` (local x, y) the controller's target."""
+        frame = self.auto_control.frame
+        if frame is None:
+            self.auto_control.set_target(*point)
+        else:
+            self.auto_control.set_target(*frame.to_geodetic(point[1], point[0]))
+
+    def start(self):
+        """Plan every leg from the rover's position; returns False if a waypoint is unreachable."""
+        planner = self.planner
+        position = self._position()
+        route = []
+        cell = planner.world_to_cell(*position)
+        for waypoint in self.waypoints:
+            point = self._to_local(*waypoint)
+            goal = planner.world_to_cell(*point)
+            cells = planner.plan(cell, goal)
+            if cells is None:
+                logging.error(f"No route to waypoint {waypoint}")
+                return False
+            route.extend(planner.cell_to_world(c) for c in cells[1:-1])
+            route.append(point)  # Finish on the exact waypoint rather than its cell center
+            cell = goal
+        self.route = route
+        self.segment_start = position
+        self.finished = not route
+        self.blocked = 0
+        if route:
+            self._aim(route[0])
+        return True
+
+    def update(self):
+        """Run one auto tick; returns True once the last waypoint is reached."""
+        if self.finished or not self.route:
+            return self.finished  # Done, or start() found no route
+        if self._off_route() or self.blocked >= self.blocked_limit:
+            self.replan()
+        collisions = getattr(self.rover, 'collisions', 0)
+        reached = self.auto_control.update()
+        self.blocked = self.blocked + 1 if getattr(self.rover, 'collisions', 0) > collisions else 0
+        if reached:
+            self.route.pop(0)
+            self.segment_start = self._position()  # The controller stops short of the point by up to its threshold
+            if self.route:
+                self._aim(self.route[0])
+            else:
+                self.finished = True
+        return self.finished
+
+    def _off_route(self):
+        (ax, ay), (bx, by) = self.segment_start, self.route[0]
+        px, py = self._position()
+        dx, dy = bx - ax, by - ay
+        length_squared = dx * dx + dy * dy
+        t = 0.0 if length_squared == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_squared))
+        return math.hypot(px - (ax + t * dx), py - (ay + t * dy)) > self.replan_distance
+
+    def replan(self):
+        """Plan from where the rover is to the current turning point and splice it in."""
+        planner = self.planner
+        position = self._position()
+        cells = planner.plan(planner.world_to_cell(*position), planner.world_to_cell(*self.route[0]))
+        self.segment_start = position
+        self.blocked = 0
+        if cells is None:
+            return False
+        self.replans += 1
+        points = [planner.cell_to_world(c) for c in cells[1:-1]] + [self.route[0]]
+        world = getattr(self.rover, 'world', None)
+        if world is not None:
+            points = self._in_sight(world, position, points)
+        self.route[:1] = points
+        self._aim(self.route[0])
+        return True
+
+    def _in_sight(self, world, position, points):
+        """Drop the points before the farthest one in plain sight, and lead up to it with a point
+        ``threshold`` beyond it on the same line, so the controller has to drive all the way there.
+
+        Otherwise a point within the controller's threshold counts as reached at once, and cutting
+        the corner towards the one after it is what blocks the rover.
+        """
+        first = 0
+        for k in range(len(points) - 1, 0, -1):
+            if not world.segment_blocked(*position, *points[k]):
+                first = k
+                break
+        points = points[first:]
+        (x, y), (tx, ty) = position, points[0]
+        distance = math.hypot(tx - x, ty - y)
+        if distance == 0:
+            return points
+        scale = (distance + self.auto_control.threshold) / distance
+        beyond = (x + (tx - x) * scale, y + (ty - y) * scale)
+        if world.segment_blocked(x, y, *beyond):
+            return points
+        return [beyond] + points
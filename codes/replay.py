@@ -0,0 +1,95 @@
+import argparse
+import sys
+from mission_log import MissionLog, MissionReplay
+
+SEEK_STEP = 10.0  # Seconds to jump with the Left/Right keys
+FRAME_MS = 33
+
+
+def replay_turtle(replay):
+    """Play the mission back in a turtle window."""
+    import turtle
+    from turtle_view import TurtleView
+
+    screen = turtle.Screen()
+    screen.title("Mission Replay")
+    screen.bgcolor("white")
+    rover = turtle.Turtle()
+    rover.shape("turtle")
+    rover.color("blue")
+    rover.penup()
+
+    view = TurtleView(rover, "Mission Replay - Lat: {lat:.2f}, Lon: {lon:.2f} | Mode: {mode}")
+    replay.add_observer(view)
+    replay.index = -1  # Force the current record to be drawn in the new view
+    replay.seek(replay.playback_time)
+    view.start(fps=1000 // FRAME_MS)
+
+    screen.listen()
+    screen.onkey(lambda: replay.seek(replay.playback_time - SEEK_STEP), 'Left')
+    screen.onkey(lambda: replay.seek(replay.playback_time + SEEK_STEP), 'Right')
+
+    def update():
+        replay.update()
+        screen.ontimer(update, FRAME_MS)
+
+    update()
+    turtle.mainloop()
+
+
+def replay_pygame(replay, width=800, height=600):
+    """Play the mission back in a pygame window, origin at the center of the screen."""
+    import pygame
+
+    pygame.init()
+    screen = pygame.display.set_mode((width, height))
+    pygame.display.set_caption("Mission Replay")
+    clock = pygame.time.Clock()
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_LEFT:
+                    replay.seek(replay.playback_time - SEEK_STEP)
+                elif event.key == pygame.K_RIGHT:
+                    replay.seek(replay.playback_time + SEEK_STEP)
+
+        replay.update()
+        state = replay.state
+        screen.fill((200, 200, 200))
+        pygame.draw.rect(screen, (0, 128, 255), (width / 2 + state.position_x - 10,
+                                                 height / 2 - state.position_y - 10, 20, 20))
+        pygame.display.set_caption(f"Mission Replay - t={replay.playback_time:.1f}s "
+                                   f"Lat: {state.position_x:.2f}, Lon: {state.position_y:.2f}")
+        pygame.display.flip()
+        clock.tick(1000 // FRAME_MS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded rover mission.")
+    parser.add_argument("log", help="mission log written by MissionRecorder")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed multiplier")
+    parser.add_argument("--start", type=float, default=None, help="timestamp to start from")
+    parser.add_argument("--view", choices=("turtle", "pygame"), default="turtle")
+    args = parser.parse_args(argv)
+
+    log = MissionLog(args.log)
+    if not len(log):
+        print(f"{args.log} has no records.")
+        return 1
+    print(f"Loaded {len(log)} records, {log.start_time():.1f}s to {log.end_time():.1f}s")
+
+    replay = MissionReplay(log, speed=args.speed)
+    replay.seek(args.start if args.start is not None else log.start_time())
+    if args.view == "pygame":
+        replay_pygame(replay)
+    else:
+        replay_turtle(replay)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import math
+from auto_control import AutoControl
+from manual_control import ManualControl
+from geo import LocalFrame
+
+
+class RoverState:
+    """Holds the rover pose and control mode without any graphics."""
+
+    def __init__(self, position_x=0.0, position_y=0.0, heading=0.0, control_mode='manual', frame=None):
+        self.position_x = position_x  # North, in metres when a frame is set
+        self.position_y = position_y  # East
+        self.heading = heading  # Angle in radians
+        self.control_mode = control_mode
+        self.frame = frame  # Optional geo.LocalFrame anchoring the position to real coordinates
+
+    def get_lat_lon(self):
+        if self.frame is not None:
+            return self.frame.to_geodetic(self.position_y, self.position_x)
+        # For simplicity, assume x and y directly represent lat and lon
+        return self.position_x, self.position_y
+
+
+class RoverSimulation:
+    """Steps the rover kinematics at a fixed timestep with no graphics attached."""
+
+    def __init__(self, state=None, move_distance=10, turn_angle=math.pi / 8, dt=0.1, origin=None, world=None,
+                 controller=AutoControl):
+        self.state = state if state is not None else RoverState()
+        if origin is not None:
+            self.state.frame = LocalFrame(*origin)
+        self.move_distance = move_distance
+        self.turn_angle = turn_angle
+        self.dt = dt  # Seconds of simulated time per control tick
+        self.tick_count = 0
+        self.sim_time = 0.0
+        self.observers = []  # Called with the RoverState after every change
+        self.recorder = None  # Optional MissionRecorder, fed once per tick
+        self.mission = None  # Optional WaypointMission that feeds auto_control its targets
+        self.world = world  # Optional OccupancyGrid; moves that would hit an obstacle are refused
+        self.collisions = 0
+        self.odometry_x = 0.0  # Commanded displacement summed over every move, as wheel odometry reports it
+        self.odometry_y = 0.0
+        self.estimator = None  # Optional sensors.PositionEstimator, updated at the start of each tick
+        # Auto mode controller: AutoControl, or any controllers.Controller class (pure pursuit, PID, ...)
+        self.auto_control = controller(self, self.state.frame)
+        self.manual_control = ManualControl(self)
+
+    # The boards and the controllers read and write these attributes directly
+    @property
+    def position_x(self):
+        return self.state.position_x
+
+    @position_x.setter
+    def position_x(self, value):
+        self.state.position_x = value
+
+    @property
+    def position_y(self):
+        return self.state.position_y
+
+    @position_y.setter
+    def position_y(self, value):
+        self.state.position_y = value
+
+    @property
+    def heading(self):
+        return self.state.heading
+
+    @heading.setter
+    def heading(self, value):
+        self.state.heading = value
+
+    @property
+    def control_mode(self):
+        return self.state.control_mode
+
+    @control_mode.setter
+    def control_mode(self, value):
+        self.state.control_mode = value
+
+    def add_observer(self, observer):
+        """Register a callable (e.g. a turtle view) to be told about state changes."""
+        self.observers.append(observer)
+
+    def remove_observer(self, observer):
+        """Detach a previously registered observer."""
+        self.observers.remove(observer)
+
+    def set_estimator(self, estimator):
+        """Navigate auto mode on ``estimator``'s position (e.g. filtered GPS) instead of the true one."""
+        self.estimator = estimator
+        self.auto_control.estimate = estimator
+
+    def move_forward(self):
+        self._move(self.move_distance)
+
+    def move_backward(self):
+        self._move(-self.move_distance)
+
+    def move(self, distance):
+        """Move ``distance`` along the heading; the smooth controllers pick a distance per tick."""
+        self._move(distance)
+
+    def _move(self, distance):
+        state = self.state
+        dx = math.cos(state.heading) * distance
+        dy = math.sin(state.heading) * distance
+        new_x = state.position_x + dx
+        new_y = state.position_y + dy
+        if self.world is not None and self.world.segment_blocked(state.position_x, state.position_y, new_x, new_y):
+            self.collisions += 1  # Blocked: the rover stays where it is
+            return
+        self.odometry_x += dx
+        self.odometry_y += dy
+        state.position_x = new_x
+        state.position_y = new_y
+        self.update_rover_position()
+
+    def turn_left(self):
+        self.state.heading -= self.turn_angle
+        self.update_rover_position()
+
+    def turn_right(self):
+        self.state.heading += self.turn_angle
+        self.update_rover_position()
+
+    def stop(self):
+        # Nothing to do: the kinematics only move when a primitive is called
+        pass
+
+    def get_lat_lon(self):
+        return self.state.get_lat_lon()
+
+    def adjust_heading(self, angle):
+        self.state.heading = angle
+        self.update_rover_position()
+
+    def set_pose(self, x, y, heading):
+        """Put the rover at a pose worked out elsewhere (e.g. a precomputed trajectory)."""
+        state = self.state
+        self.odometry_x += x - state.position_x
+        self.odometry_y += y - state.position_y
+        state.position_x = x
+        state.position_y = y
+        state.heading = heading
+        self.update_rover_position()
+
+    def update_rover_position(self):
+        # Headless runs have no observers, so this is just a length check
+        if self.observers:
+            for observer in self.observers:
+                observer(self.state)
+
+    def step(self):
+        """Advance one control tick; returns True when auto mode reports the target reached."""
+        if self.estimator is not None:
+            self.estimator.update(self.sim_time)
+        if self.state.control_mode == 'auto':
+            controller = self.mission if self.mission is not None else self.auto_control
+            reached = bool(controller.update())
+        else:
+            self.manual_control.update()
+            reached = False
+        self.tick_count += 1
+        self.sim_time = self.tick_count * self.dt
+        if self.recorder is not None:
+            self.recorder.record_state(self.sim_time, self.state)
+        return reached
+
+    def run(self, ticks):
+        """Run a fixed number of control ticks as fast as the CPU allows."""
+        for _ in range(ticks):
+            self.step()
+
+    def run_until_reached(self, max_ticks=10000):
+        """Run auto mode until the target is reached; returns the ticks used or None."""
+        start = self.tick_count
+        for _ in range(max_ticks):
+            if self.step():
+                return self.tick_count - start
+        return None
@@ -0,0 +1,289 @@
+import argparse
+import asyncio
+import sys
+from rover_sim import RoverSimulation, RoverState
+from scheduler import LatencyHistogram
+from sensors import GpsSensor, PositionEstimator
+
+
+def offer(queue, item):
+    """Put ``item`` on a bounded asyncio queue, dropping the oldest item if it is full; returns True if one was."""
+    dropped = False
+    if queue.full():
+        queue.get_nowait()
+        dropped = True
+    queue.put_nowait(item)
+    return dropped
+
+
+class TaskStats:
+    """Timing of one periodic task: how late each run started and how long it took."""
+
+    def __init__(self, period):
+        self.period = period
+        self.jitter = LatencyHistogram()
+        self.latency = LatencyHistogram()
+        self.runs = 0
+        self.overruns = 0  # Runs that finished after the next deadline
+        self.skipped = 0  # Deadlines dropped to get back on the grid
+
+    def summary(self):
+        return (f"{self.runs} runs at {1.0 / self.period:.1f} Hz, {self.overruns} overruns, {self.skipped} skipped\n"
+                f"    jitter:  {self.jitter.summary()}\n"
+                f"    latency: {self.latency.summary()}")
+
+
+class RoverRuntime:
+    """Runs a RoverSimulation as asyncio tasks at independent rates.
+
+    - sensor (``sensor_hz``, only with a GpsSensor): takes GPS fixes and
+      queues them for the control task.
+    - control (``control_hz``): fuses the queued fixes into the position
+      estimate, runs one ``sim.step()`` and queues a snapshot
+      ``(time, x, y, heading, mode)`` for the other tasks.
+    - render (``render_hz``, only with a view): draws the newest snapshot;
+      older ones are skipped.
+    - telemetry (``telemetry_hz``, only with a recorder): writes every
+      snapshot, in batches.
+
+    Each task keeps its own deadline grid, like scheduler.ControlLoop with the
+    SKIP policy, so a slow frame costs the control task at most the length
+    of that one frame, never its rate. Tasks only talk through bounded queues
+    that drop their oldest entry when full; ``dropped`` counts the losses per
+    queue. Everything runs on one thread, so the simulation needs no locks.
+    """
+
+    def __init__(self, sim, control_hz=None, render_hz=30, telemetry_hz=4, sensor_hz=None, gps=None,
+                 view=None, recorder=None, queue_size=256):
+        self.sim = sim
+        self.control_period = 1.0 / control_hz if control_hz else sim.dt
+        self.render_period = 1.0 / render_hz
+        self.telemetry_period = 1.0 / telemetry_hz
+        self.gps = gps
+        self.sensor_period = 1.0 / sensor_hz if sensor_hz else self.control_period
+        self.estimator = None
+        if gps is not None:
+            # The control task advances the estimate; the simulation must not do it again in step()
+            self.estimator = PositionEstimator(sim, gps)
+            sim.auto_control.estimate = self.estimator
+        self.view = view  # Optional callable taking a RoverState, e.g. a TurtleRenderer or a PygameView
+        self.recorder = recorder  # Optional MissionRecorder
+        self.queue_size = queue_size
+        self.stats = {}
+        self.dropped = {'fixes': 0, 'render': 0, 'telemetry': 0}
+        self._view_state = RoverState(frame=sim.state.frame)
+        self._stopping = None
+
+    def stop(self):
+        """Ask the runtime to finish; safe to call from a key binding or a task."""
+        if self._stopping is not None:
+            self._stopping.set()
+
+    def run(self, duration=None):
+        """Run until ``stop()`` or for ``duration`` seconds; returns the report."""
+        asyncio.run(self.main(duration))
+        return self.report()
+
+    async def main(self, duration=None):
+        self._stopping = asyncio.Event()
+        self.fixes = asyncio.Queue(self.queue_size)
+        self.frames = asyncio.Queue(self.queue_size)
+        self.records = asyncio.Queue(self.queue_size)
+        tasks = [asyncio.create_task(self._periodic('control', self.control_period, self._control))]
+        if self.gps is not None:
+            tasks.append(asyncio.create_task(self._periodic('sensor', self.sensor_period, self._sense)))
+        if self.view is not None:
+            tasks.append(asyncio.create_task(self._periodic('render', self.render_period, self._render)))
+        if self.recorder is not None:
+            tasks.append(asyncio.create_task(self._periodic('telemetry', self.telemetry_period, self._record)))
+        try:
+            await asyncio.wait_for(self._stopping.wait(), duration)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.recorder is not None:
+                self._record()  # Whatever was still queued
+            self._stopping = None
+
+    async def _periodic(self, name, period, fn):
+        loop = asyncio.get_running_loop()
+        stats = self.stats[name] = TaskStats(period)
+        deadline = loop.time()
+        while True:
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)  # Let the other tasks run even when this one is behind
+            start = loop.time()
+            stats.jitter.record(max(0.0, start - deadline) * 1000)
+            fn()
+            end = loop.time()
+            stats.latency.record((end - start) * 1000)
+            stats.runs += 1
+            deadline += period
+            if end > deadline:
+                stats.overruns += 1
+                missed = int((end - deadline) // period) + 1
+                deadline += missed * period
+                stats.skipped += missed
+
+    def _sense(self):
+        sim = self.sim
+        fix = self.gps.measure(sim.sim_time, sim.position_x, sim.position_y)
+        if fix is not None and offer(self.fixes, fix):
+            self.dropped['fixes'] += 1
+
+    def _control(self):
+        sim = self.sim
+        if self.estimator is not None:
+            self.estimator.advance(sim.sim_time)
+            while not self.fixes.empty():
+                self.estimator.fuse(self.fixes.get_nowait())
+        sim.step()
+        state = sim.state
+        snapshot = (sim.sim_time, state.position_x, state.position_y, state.heading, state.control_mode)
+        if self.view is not None and offer(self.frames, snapshot):
+            self.dropped['render'] += 1
+        if self.recorder is not None and offer(self.records, snapshot):
+            self.dropped['telemetry'] += 1
+
+    def _render(self):
+        frames = self.frames
+        if frames.empty():
+            return
+        while frames.qsize() > 1:
+            frames.get_nowait()  # Only the newest pose is worth drawing
+        _, x, y, heading, mode = frames.get_nowait()
+        state = self._view_state
+        state.position_x, state.position_y, state.heading, state.control_mode = x, y, heading, mode
+        self.view(state)
+
+    def _record(self):
+        records, recorder = self.records, self.recorder
+        while not records.empty():
+            recorder.record(*records.get_nowait())
+
+    def report(self):
+        lines = [f"{name}: {stats.summary()}" for name, stats in self.stats.items()]
+        lines.append("dropped: " + ", ".join(f"{name} {count}" for name, count in self.dropped.items()))
+        return "\n".join(lines)
+
+
+class TurtleRenderer:
+    """Render task view for turtle: draws through a TurtleView, then lets Tk process its events.
+
+    Tk only handles key presses and window events while the canvas is
+    updated, so this is also where the keyboard bindings get to run.
+    """
+
+    def __init__(self, view, screen):
+        self.view = view
+        self.screen = screen
+        screen.tracer(0)
+
+    def __call__(self, state):
+        self.view.state = state
+        self.view.draw()
+        self.screen.update()
+        self.screen.getcanvas().update()
+
+
+class PygameView:
+    """Render task view for pygame: a square for the rover, origin at the center of the window.
+
+    Window events are handled once per frame; event observers are called with each of them.
+    """
+
+    def __init__(self, runtime=None, width=800, height=600):
+        import pygame
+        self.pygame = pygame
+        self.runtime = runtime  # Stopped when the window is closed
+        self.width = width
+        self.height = height
+        self.event_observers = []
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((width, height))
+
+    def add_event_observer(self, observer):
+        self.event_observers.append(observer)
+
+    def __call__(self, state):
+        pygame = self.pygame
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT and self.runtime is not None:
+                self.runtime.stop()
+            for observer in self.event_observers:
+                observer(event)
+        self.screen.fill((200, 200, 200))
+        pygame.draw.rect(self.screen, (0, 128, 255), (self.width / 2 + state.position_x - 10,
+                                                      self.height / 2 - state.position_y - 10, 20, 20))
+        pygame.display.set_caption(f"Rover - Lat: {state.position_x:.2f}, Lon: {state.position_y:.2f} "
+                                   f"| Mode: {state.control_mode.capitalize()}")
+        pygame.display.flip()
+
+
+def open_turtle_view(runtime):
+    """Create the turtle window, the rover turtle and the key bindings for a runtime."""
+    import turtle
+    from turtle_view import TurtleView
+    screen = turtle.Screen()
+    screen.bgcolor("white")
+    rover = turtle.Turtle()
+    rover.shape("turtle")
+    rover.color("blue")
+    rover.penup()
+    view = TurtleView(rover, "Rover Simulation - Lat: {lat:.2f}, Lon: {lon:.2f} | Mode: {mode}")
+    manual = runtime.sim.manual_control
+    screen.listen()
+    for key, press in (('Up', manual.move_forward), ('Down', manual.move_backward),
+                       ('Left', manual.turn_left), ('Right', manual.turn_right)):
+        screen.onkeypress(press, key)
+        screen.onkeyrelease(manual.stop, key)
+    screen.onkey(runtime.stop, 'q')
+    return TurtleRenderer(view, screen)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the rover simulation as concurrent asyncio tasks.")
+    parser.add_argument('--view', choices=('turtle', 'pygame', 'none'), default='turtle')
+    parser.add_argument('--mode', choices=('manual', 'auto'), default='manual')
+    parser.add_argument('--target', nargs=2, type=float, metavar=('LAT', 'LON'),
+                        help="target for auto mode; implies --mode auto")
+    parser.add_argument('--duration', type=float, default=None, help="seconds to run (default: until 'q')")
+    parser.add_argument('--control-hz', type=float, default=10.0)
+    parser.add_argument('--render-hz', type=float, default=30.0)
+    parser.add_argument('--gps', nargs=3, type=float, metavar=('NOISE', 'LATENCY', 'DROPOUT'),
+                        help="navigate on Kalman-filtered GPS fixes")
+    parser.add_argument('--record', metavar='PATH', help="log every tick to a mission log")
+    args = parser.parse_args(argv)
+    if args.view == 'none' and args.duration is None:
+        parser.error("--view none needs a --duration")
+
+    sim = RoverSimulation(dt=1.0 / args.control_hz)
+    sim.control_mode = 'auto' if args.target is not None else args.mode
+    recorder = None
+    if args.record:
+        from mission_log import MissionRecorder
+        recorder = MissionRecorder(args.record)
+    gps = GpsSensor(*args.gps) if args.gps else None
+    runtime = RoverRuntime(sim, control_hz=args.control_hz, render_hz=args.render_hz, gps=gps, recorder=recorder)
+    if args.target is not None:
+        sim.auto_control.set_target(*args.target)
+    if args.view == 'turtle':
+        runtime.view = open_turtle_view(runtime)
+    elif args.view == 'pygame':
+        runtime.view = PygameView(runtime)
+    try:
+        print(runtime.run(args.duration))
+    finally:
+        if recorder is not None:
+            recorder.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import bisect
+import time
+
+SKIP = 'skip'  # After an overrun, drop the missed ticks and stay on the original grid
+CATCH_UP = 'catch_up'  # After an overrun, run the missed ticks back to back (up to a limit)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of durations in milliseconds; recording is a bisect and an increment."""
+
+    def __init__(self, edges_ms=(0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)):
+        self.edges = list(edges_ms)  # Bucket i holds values below edges[i]; the last bucket is overflow
+        self.counts = [0] * (len(self.edges) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms):
+        self.counts[bisect.bisect_right(self.edges, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the ``p``-th percentile (the max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self.edges[i], self.max) if i < len(self.edges) else self.max
+        return self.max
+
+    def summary(self):
+        return (f"n={self.count} mean={self.mean():.2f}ms p50<={self.percentile(50):.2f}ms "
+                f"p99<={self.percentile(99):.2f}ms max={self.max:.2f}ms")
+
+    def format(self):
+        """One line per non-empty bucket, for printing after a run."""
+        lines = []
+        low = 0
+        for i, n in enumerate(self.counts):
+            high = self.edges[i] if i < len(self.edges) else None
+            if n:
+                label = f"{low:>6}-{high:<6}" if high is not None else f"{low:>6}+      "
+                lines.append(f"{label} ms {n:>7}")
+            low = high
+        return "\n".join(lines)
+
+
+class ControlLoop:
+    """Runs ``callback`` every ``period_ms`` against a monotonic deadline.
+
+    The next deadline is always the previous one plus the period, not "now plus
+    the period", so the time the callback takes does not stretch the period and
+    the rate does not drift. ``jitter`` records how late each tick started and
+    ``latency`` how long the callback took. When a tick finishes after the next
+    deadline, the ``policy`` decides: ``SKIP`` drops the missed ticks,
+    ``CATCH_UP`` runs them straight away, at most ``max_catch_up`` in a row.
+
+    Ticks are queued with ``screen.ontimer`` (any object with that method works);
+    ``run()`` drives the loop with ``time.sleep`` instead, for headless use.
+    """
+
+    def __init__(self, screen, callback, period_ms=100, policy=SKIP, max_catch_up=5, clock=time.monotonic):
+        if policy not in (SKIP, CATCH_UP):
+            raise ValueError(f"Unknown overrun policy: {policy}")
+        self.screen = screen
+        self.callback = callback
+        self.period = period_ms / 1000.0
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.jitter = LatencyHistogram()
+        self.latency = LatencyHistogram()
+        self.ticks = 0
+        self.overruns = 0  # Ticks that finished after the next deadline
+        self.skipped = 0  # Ticks dropped under the SKIP policy
+        self.running = False
+        self.deadline = None
+        self._generation = 0  # Lets a restart orphan a timer still queued from before a stop
+
+    def start(self, immediate=True):
+        """Start ticking; the first tick runs now unless ``immediate`` is False."""
+        if self.running:
+            return
+        self.running = True
+        self._generation += 1
+        self.deadline = self.clock() + (0.0 if immediate else self.period)
+        if immediate:
+            self._tick(self._generation)
+        else:
+            self._schedule()
+
+    def stop(self):
+        self.running = False
+
+    def _run_once(self):
+        generation = self._generation
+        start = self.clock()
+        self.jitter.record(max(0.0, start - self.deadline) * 1000)
+        self.callback()
+        self.latency.record((self.clock() - start) * 1000)
+        self.ticks += 1
+        if generation == self._generation:
+            self.deadline += self.period  # Otherwise the callback restarted the loop, on a grid of its own
+
+    def _advance(self):
+        """Handle an overrun after a tick; returns True if another tick should run immediately."""
+        late = self.clock() - self.deadline
+        if late < 0:
+            return False
+        self.overruns += 1
+        if self.policy == CATCH_UP:
+            return True
+        missed = int(late // self.period) + 1
+        self.deadline += missed * self.period
+        self.skipped += missed
+        return False
+
+    def _run_due(self):
+        """Run the tick that is due, plus any catch-up ticks the policy asks for."""
+        generation = self._generation
+        self._run_once()
+        caught_up = 0
+        while self.running and generation == self._generation and self._advance():
+            if caught_up == self.max_catch_up:
+                # Too far behind to recover: give up on the backlog and restart the grid from now
+                self.deadline = self.clock() + self.period
+                break
+            self._run_once()
+            caught_up += 1
+
+    def _tick(self, generation):
+        if not self.running or generation != self._generation:
+            return
+        self._run_due()
+        if self.running and generation == self._generation:
+            self._schedule()  # A stop() and start() inside the callback has already scheduled the new chain
+
+    def _schedule(self):
+        delay_ms = max(0, round((self.deadline - self.clock()) * 1000))
+        generation = self._generation
+        self.screen.ontimer(lambda: self._tick(generation), delay_ms)
+
+    def run(self, ticks, sleep=time.sleep):
+        """Run ``ticks`` ticks in the calling thread, sleeping until each deadline."""
+        self.running = True
+        self._generation += 1
+        self.deadline = self.clock()
+        target = self.ticks + ticks
+        while self.running and self.ticks < target:
+            wait = self.deadline - self.clock()
+            if wait > 0:
+                sleep(wait)
+            self._run_due()
+        self.running = False
+
+    def report(self):
+        rate = 1.0 / self.period
+        return (f"{self.ticks} ticks at {rate:.1f} Hz, {self.overruns} overruns, {self.skipped} skipped\n"
+                f"  jitter:  {self.jitter.summary()}\n"
+                f"  latency: {self.latency.summary()}")
@@ -0,0 +1,274 @@
+import collections
+import random
+
+try:
+    import numpy as np
+except ImportError:  # FleetKalmanFilter needs NumPy; the single-rover classes do not
+    np = None
+
+
+class GpsSensor:
+    """Simulated GPS: true positions in, noisy, late and sometimes missing fixes out.
+
+    Each fix gets Gaussian noise of ``noise`` (position units, per axis), is
+    delivered ``latency`` seconds after it was taken, and is lost with
+    probability ``dropout``. A fix is ``(time taken, x, y)``.
+    """
+
+    def __init__(self, noise=2.0, latency=0.0, dropout=0.0, seed=None):
+        self.noise = noise
+        self.latency = latency
+        self.dropout = dropout
+        self.random = random.Random(seed)
+        self._pending = collections.deque()  # Fixes taken but not delivered yet
+        self.dropped = 0
+
+    def measure(self, time, x, y):
+        """Take a fix of the true position at ``time``; returns the newest fix now due, or None."""
+        rng = self.random
+        if self.dropout and rng.random() < self.dropout:
+            self.dropped += 1
+        else:
+            self._pending.append((time, x + rng.gauss(0.0, self.noise), y + rng.gauss(0.0, self.noise)))
+        fix = None
+        pending = self._pending
+        due = time - self.latency + 1e-9
+        while pending and pending[0][0] <= due:
+            fix = pending.popleft()  # Older due fixes are superseded by the newest one
+        return fix
+
+
+class KalmanFilter:
+    """Constant-velocity Kalman filter for one rover's x/y position.
+
+    The state is position and velocity on each axis. Both axes have the same
+    model and get their measurements together, so they share one 2x2
+    covariance ``[[a, b], [b, c]]`` and every step is a handful of float
+    operations in closed form: no matrices, no allocation. ``process_noise``
+    is the white acceleration spectral density; ``gps_var`` and
+    ``odometry_var`` are the measurement variances of a position fix and of
+    an odometry velocity.
+    """
+
+    def __init__(self, process_noise=1.0, gps_var=4.0, odometry_var=1.0):
+        self.process_noise = process_noise
+        self.gps_var = gps_var
+        self.odometry_var = odometry_var
+        self.reset(0.0, 0.0)
+
+    def reset(self, x, y, var=None):
+        self.x = x
+        self.y = y
+        self.vx = 0.0
+        self.vy = 0.0
+        self.a = self.gps_var if var is None else var  # Position variance
+        self.b = 0.0  # Position/velocity covariance
+        self.c = self.odometry_var  # Velocity variance
+
+    def predict(self, dt):
+        q = self.process_noise
+        b, c = self.b, self.c
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        self.a += dt * (2 * b + dt * c) + q * dt ** 3 / 3
+        self.b = b + dt * c + q * dt * dt / 2
+        self.c = c + q * dt
+
+    def update_velocity(self, vx, vy):
+        """Fuse a velocity measured by odometry."""
+        b, c = self.b, self.c
+        s = c + self.odometry_var
+        kp, kv = b / s, c / s
+        ex, ey = vx - self.vx, vy - self.vy
+        self.x += kp * ex
+        self.y += kp * ey
+        self.vx += kv * ex
+        self.vy += kv * ey
+        self.a -= kp * b
+        self.b = b - kv * b
+        self.c = c - kv * c
+
+    def update_position(self, x, y):
+        """Fuse a GPS fix."""
+        a, b = self.a, self.b
+        s = a + self.gps_var
+        ka, kb = a / s, b / s
+        ex, ey = x - self.x, y - self.y
+        self.x += ka * ex
+        self.y += ka * ey
+        self.vx += kb * ex
+        self.vy += kb * ey
+        self.c -= kb * b
+        self.b = b - ka * b
+        self.a = a - ka * a
+
+
+class FleetKalmanFilter:
+    """KalmanFilter for a whole fleet at once: the same closed form on NumPy arrays.
+
+    Each rover has its own covariance, since dropouts leave some rovers without
+    a fix on a given tick. The ``mask`` arguments pick the rovers a
+    measurement applies to; the others are left untouched. Scratch buffers are
+    reused so an update does not allocate.
+    """
+
+    def __init__(self, count, process_noise=1.0, gps_var=4.0, odometry_var=1.0):
+        self.count = count
+        self.process_noise = process_noise
+        self.gps_var = gps_var
+        self.odometry_var = odometry_var
+        self.x = np.zeros(count)
+        self.y = np.zeros(count)
+        self.vx = np.zeros(count)
+        self.vy = np.zeros(count)
+        self.a = np.full(count, gps_var)
+        self.b = np.zeros(count)
+        self.c = np.full(count, odometry_var)
+        self._s = np.empty(count)
+        self._k1 = np.empty(count)
+        self._k2 = np.empty(count)
+        self._ex = np.empty(count)
+        self._ey = np.empty(count)
+        self._skip = np.empty(count, dtype=bool)
+
+    def reset(self, x, y, var=None):
+        self.x[:] = x
+        self.y[:] = y
+        self.vx[:] = 0.0
+        self.vy[:] = 0.0
+        self.a[:] = self.gps_var if var is None else var
+        self.b[:] = 0.0
+        self.c[:] = self.odometry_var
+
+    def predict(self, dt):
+        q = self.process_noise
+        a, b, c, tmp = self.a, self.b, self.c, self._s
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        np.multiply(b, 2 * dt, out=tmp)
+        tmp += c * (dt * dt)
+        a += tmp
+        a += q * dt ** 3 / 3
+        b += c * dt
+        b += q * dt * dt / 2
+        c += q * dt
+
+    def _innovation(self, zx, zy, px, py, mask):
+        ex, ey = self._ex, self._ey
+        np.subtract(zx, px, out=ex)
+        np.subtract(zy, py, out=ey)
+        if mask is not None:
+            np.logical_not(mask, out=self._skip)
+            ex[self._skip] = 0.0  # Also clears NaNs standing in for missing fixes
+            ey[self._skip] = 0.0
+        return ex, ey
+
+    def _mask_gains(self, mask):
+        if mask is not None:
+            self._k1[self._skip] = 0.0
+            self._k2[self._skip] = 0.0
+
+    def update_velocity(self, vx, vy, mask=None):
+        a, b, c, s, kp, kv = self.a, self.b, self.c, self._s, self._k1, self._k2
+        ex, ey = self._innovation(vx, vy, self.vx, self.vy, mask)
+        np.add(c, self.odometry_var, out=s)
+        np.divide(b, s, out=kp)
+        np.divide(c, s, out=kv)
+        self._mask_gains(mask)
+        self.x += kp * ex
+        self.y += kp * ey
+        self.vx += kv * ex
+        self.vy += kv * ey
+        a -= kp * b
+        c -= kv * c
+        b -= kv * b
+
+    def update_position(self, x, y, mask=None):
+        a, b, c, s, ka, kb = self.a, self.b, self.c, self._s, self._k1, self._k2
+        ex, ey = self._innovation(x, y, self.x, self.y, mask)
+        np.add(a, self.gps_var, out=s)
+        np.divide(a, s, out=ka)
+        np.divide(b, s, out=kb)
+        self._mask_gains(mask)
+        self.x += ka * ex
+        self.y += ka * ey
+        self.vx += kb * ex
+        self.vy += kb * ey
+        c -= kb * b
+        b -= ka * b
+        a -= ka * a
+
+
+class PositionEstimator:
+    """Fuses a GpsSensor with a RoverSimulation's odometry into a position estimate.
+
+    Call ``update(time)`` once per tick (RoverSimulation.step() does when it is
+    set as ``sim.estimator``), or ``advance(time)`` each tick and ``fuse(fix)``
+    for fixes that arrive some other way. The odometry since the last call
+    becomes a velocity measurement, the filter is predicted to ``time``, and
+    the GPS fix due now, if any, is fused after moving it forward by the
+    odometry since it was taken, so latency does not drag the estimate
+    behind. The estimate is ``position_x`` / ``position_y``, so a controller
+    can read it as it reads the rover.
+    """
+
+    def __init__(self, sim, gps, kalman=None):
+        self.sim = sim
+        self.gps = gps
+        self.kalman = kalman if kalman is not None else KalmanFilter(gps_var=max(gps.noise ** 2, 1e-6))
+        self.kalman.reset(sim.position_x, sim.position_y)
+        self.position_x = sim.position_x
+        self.position_y = sim.position_y
+        self._last_time = None
+        self._odometry = (sim.odometry_x, sim.odometry_y)
+        self._history = collections.deque()  # (time, odometry_x, odometry_y) back to the oldest pending fix
+        self.history_margin = 1.0  # Seconds of odometry kept beyond the GPS latency, for fixes queued elsewhere
+
+    def update(self, time):
+        """Advance to ``time`` and fuse the GPS fix due then, if any."""
+        self.advance(time)
+        fix = self.gps.measure(time, self.sim.position_x, self.sim.position_y)
+        if fix is not None:
+            self.fuse(fix)
+
+    def advance(self, time):
+        """Fuse the odometry since the last call and predict the estimate forward to ``time``."""
+        sim, kalman = self.sim, self.kalman
+        odometry_x, odometry_y = sim.odometry_x, sim.odometry_y
+        if self._last_time is not None and time > self._last_time:
+            dt = time - self._last_time
+            last_x, last_y = self._odometry
+            kalman.update_velocity((odometry_x - last_x) / dt, (odometry_y - last_y) / dt)
+            kalman.predict(dt)
+        self._last_time = time
+        self._odometry = (odometry_x, odometry_y)
+        history = self._history
+        history.append((time, odometry_x, odometry_y))
+        oldest = time - self.gps.latency - self.history_margin
+        while len(history) > 1 and history[1][0] <= oldest:
+            history.popleft()  # No fix this old is still on its way
+        self.position_x = kalman.x
+        self.position_y = kalman.y
+
+    def fuse(self, fix):
+        """Fuse a ``(time taken, x, y)`` fix, moved forward by the odometry since it was taken."""
+        taken, x, y = fix
+        history = self._history
+        while len(history) > 1 and history[1][0] <= taken:
+            history.popleft()
+        _, then_x, then_y = history[0]
+        odometry_x, odometry_y = self._odometry
+        kalman = self.kalman
+        kalman.update_position(x + odometry_x - then_x, y + odometry_y - then_y)
+        self.position_x = kalman.x
+        self.position_y = kalman.y
+
+    def error(self):
+        """Distance between the estimate and the true position."""
+        return ((self.position_x - self.sim.position_x) ** 2 + (self.position_y - self.sim.position_y) ** 2) ** 0.5
+
+    def get_lat_lon(self):
+        frame = self.sim.state.frame
+        if frame is not None:
+            return frame.to_geodetic(self.position_y, self.position_x)
+        return self.position_x, self.position_y
@@ -0,0 +1,276 @@
+import argparse
+import multiprocessing
+import queue
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+from rover_sim import RoverSimulation, RoverState
+from scheduler import ControlLoop
+from telemetry import MODE_CODES, MODE_NAMES
+
+SEQUENCE = struct.Struct('<Q')
+# time, x, y, heading, target x, target y, ticks, mode code, has target
+PAYLOAD = struct.Struct('<ddddddQBB')
+PAYLOAD_OFFSET = 8
+BUS_SIZE = PAYLOAD_OFFSET + PAYLOAD.size
+
+
+class Snapshot:
+    """One consistent copy of the published rover state."""
+
+    __slots__ = ('version', 'time', 'position_x', 'position_y', 'heading', 'target', 'ticks', 'control_mode')
+
+    def __init__(self, version, time, x, y, heading, target_x, target_y, ticks, mode, has_target):
+        self.version = version  # Counts publishes; unchanged means nothing new to draw
+        self.time = time
+        self.position_x = x
+        self.position_y = y
+        self.heading = heading
+        self.target = (target_x, target_y) if has_target else None
+        self.ticks = ticks
+        self.control_mode = MODE_NAMES.get(mode, 'manual')
+
+
+class StateBus:
+    """Latest rover state in a shared memory block, guarded by a seqlock.
+
+    One process publishes and any number read, without locks: the writer
+    makes the sequence number odd, writes the payload and makes it even
+    again; a reader copies the payload and keeps the copy only if the
+    sequence was even and unchanged around it. The writer never waits for a
+    reader, so a reader stuck in a dialog cannot hold up the control loop.
+
+    CPython has no memory barriers, so the ordering of the three stores
+    relies on the interpreter executing them as separate, ordered memory
+    operations.
+    """
+
+    def __init__(self, name=None, create=True):
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=BUS_SIZE)
+            self.shm.buf[:BUS_SIZE] = bytes(BUS_SIZE)
+        else:
+            self.shm = _attach(name)
+        self.owner = create
+        self.buf = self.shm.buf
+        self.sequence = SEQUENCE.unpack_from(self.buf, 0)[0]
+        self.retries = 0  # Reads that had to start over because a publish was in progress
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def publish(self, time, x, y, heading, mode, target=None, ticks=0):
+        buf = self.buf
+        sequence = self.sequence + 1
+        SEQUENCE.pack_into(buf, 0, sequence)  # Odd: write in progress
+        has_target = target is not None
+        target_x, target_y = target if has_target else (0.0, 0.0)
+        PAYLOAD.pack_into(buf, PAYLOAD_OFFSET, time, x, y, heading, target_x, target_y, ticks,
+                          MODE_CODES.get(mode, 0), has_target)
+        self.sequence = sequence + 1
+        SEQUENCE.pack_into(buf, 0, self.sequence)
+
+    def publish_sim(self, sim):
+        control = sim.auto_control
+        target = (control.target_x, control.target_y) if control.target_lat is not None else None
+        state = sim.state
+        self.publish(sim.sim_time, state.position_x, state.position_y, state.heading, state.control_mode, target,
+                     sim.tick_count)
+
+    def read(self):
+        """The latest consistent snapshot, or None if nothing was published yet."""
+        buf = self.buf
+        while True:
+            before = SEQUENCE.unpack_from(buf, 0)[0]
+            if before & 1:
+                self.retries += 1
+                time.sleep(0)  # Let the writer finish
+                continue
+            payload = PAYLOAD.unpack_from(buf, PAYLOAD_OFFSET)
+            if SEQUENCE.unpack_from(buf, 0)[0] == before:
+                break
+            self.retries += 1
+        if before == 0:
+            return None
+        return Snapshot(before // 2, *payload)
+
+    def version(self):
+        """Publishes so far; cheap enough to poll every frame before reading."""
+        return SEQUENCE.unpack_from(self.buf, 0)[0] // 2
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+: only the creator tracks it
+    except TypeError:
+        # Older versions register it again, which is harmless for a child started by start_control():
+        # the child shares its parent's resource tracker, and the creator unlinks the block
+        return shared_memory.SharedMemory(name=name)
+
+
+def apply_command(sim, command):
+    """Run a command a view sent: ('key', method), ('mode', name) or ('target', lat, lon)."""
+    kind = command[0]
+    if kind == 'key':
+        getattr(sim.manual_control, command[1])()
+    elif kind == 'mode':
+        sim.control_mode = command[1]
+    elif kind == 'target':
+        sim.control_mode = 'auto'
+        sim.auto_control.set_target(command[1], command[2])
+
+
+def control_process(bus_name, commands, stop, period_ms=100, mode='manual', target=None):
+    """Control process: runs the simulation against a fixed deadline and publishes every tick."""
+    bus = StateBus(bus_name, create=False)
+    sim = RoverSimulation(dt=period_ms / 1000.0)
+    sim.control_mode = mode
+    if target is not None:
+        sim.auto_control.set_target(*target)
+    loop = None
+
+    def tick():
+        try:
+            while True:
+                apply_command(sim, commands.get_nowait())
+        except queue.Empty:
+            pass
+        sim.step()
+        bus.publish_sim(sim)
+        if stop.is_set():
+            loop.stop()
+
+    loop = ControlLoop(None, tick, period_ms=period_ms)
+    bus.publish_sim(sim)
+    try:
+        loop.run(sys.maxsize)
+    finally:
+        print(f"Control process: {loop.report()}")
+        bus.close()
+
+
+def start_control(period_ms=100, mode='manual', target=None):
+    """Create the bus and start the control process; returns (bus, commands, stop, process)."""
+    context = multiprocessing.get_context('spawn')  # A fresh interpreter: no Tk or pygame state inherited
+    bus = StateBus()
+    commands = context.Queue()
+    stop = context.Event()
+    process = context.Process(target=control_process, args=(bus.name, commands, stop, period_ms, mode, target),
+                              name="rover-control", daemon=True)
+    process.start()
+    return bus, commands, stop, process
+
+
+def _view_state(snapshot, state):
+    state.position_x = snapshot.position_x
+    state.position_y = snapshot.position_y
+    state.heading = snapshot.heading
+    state.control_mode = snapshot.control_mode
+    return state
+
+
+def run_turtle(bus, commands, fps=30):
+    """Turtle view in this process; its dialogs block only the view, never the control process."""
+    import turtle
+    from turtle_view import TurtleView
+    screen = turtle.Screen()
+    screen.bgcolor("white")
+    rover = turtle.Turtle()
+    rover.shape("turtle")
+    rover.color("blue")
+    rover.penup()
+    view = TurtleView(rover, "Rover Simulation - Lat: {lat:.2f}, Lon: {lon:.2f} | Mode: {mode}")
+    view.start(fps=fps)
+    state = RoverState()
+    frame_ms = max(1, int(1000 / fps))
+    last = [None]
+
+    def poll():
+        if bus.version() != last[0]:
+            snapshot = bus.read()
+            if snapshot is not None:
+                last[0] = snapshot.version
+                view(_view_state(snapshot, state))
+        screen.ontimer(poll, frame_ms)
+
+    def ask_target():
+        lat = screen.numinput("Target Location", "Enter target latitude:", default=0)
+        lon = screen.numinput("Target Location", "Enter target longitude:", default=0)
+        if lat is not None and lon is not None:
+            commands.put(('target', lat, lon))
+
+    screen.listen()
+    for key, method in (('Up', 'move_forward'), ('Down', 'move_backward'), ('Left', 'turn_left'),
+                        ('Right', 'turn_right')):
+        screen.onkeypress(lambda method=method: commands.put(('key', method)), key)
+        screen.onkeyrelease(lambda: commands.put(('key', 'stop')), key)
+    screen.onkey(ask_target, 'a')
+    screen.onkey(lambda: commands.put(('mode', 'manual')), 'm')
+    poll()
+    turtle.mainloop()
+
+
+def run_pygame(bus, commands, fps=30):
+    """Pygame view in this process, reading the bus once per frame."""
+    import pygame
+    from runtime import PygameView
+    view = PygameView()
+    state = RoverState()
+    keys = {pygame.K_UP: 'move_forward', pygame.K_DOWN: 'move_backward', pygame.K_LEFT: 'turn_left',
+            pygame.K_RIGHT: 'turn_right'}
+    running = [True]
+
+    def handle(event):
+        if event.type == pygame.QUIT:
+            running[0] = False
+        elif event.type == pygame.KEYDOWN and event.key in keys:
+            commands.put(('key', keys[event.key]))
+        elif event.type == pygame.KEYUP and event.key in keys:
+            commands.put(('key', 'stop'))
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_m:
+            commands.put(('mode', 'manual'))
+
+    view.add_event_observer(handle)
+    clock = pygame.time.Clock()
+    while running[0]:
+        snapshot = bus.read()
+        if snapshot is not None:
+            view(_view_state(snapshot, state))
+        clock.tick(fps)
+    pygame.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rover with the control loop in its own process.")
+    parser.add_argument('--view', choices=('turtle', 'pygame'), default='turtle')
+    parser.add_argument('--mode', choices=('manual', 'auto'), default='manual')
+    parser.add_argument('--target', nargs=2, type=float, metavar=('LAT', 'LON'),
+                        help="target for auto mode; implies --mode auto")
+    parser.add_argument('--period-ms', type=float, default=100.0, help="control period")
+    parser.add_argument('--fps', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    mode = 'auto' if args.target is not None else args.mode
+    bus, commands, stop, process = start_control(args.period_ms, mode, args.target)
+    try:
+        if args.view == 'pygame':
+            run_pygame(bus, commands, args.fps)
+        else:
+            run_turtle(bus, commands, args.fps)
+    finally:
+        stop.set()
+        process.join(timeout=2)
+        bus.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
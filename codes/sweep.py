@@ -0,0 +1,295 @@
+import argparse
+import itertools
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from auto_control import AutoControl
+from controllers import PurePursuitController, PIDController
+from rover_sim import RoverSimulation
+from sensors import GpsSensor, PositionEstimator
+from trajectory import TrajectoryController
+
+CONTROLLERS = {
+    'auto': AutoControl,
+    'pursuit': PurePursuitController,
+    'pid': PIDController,
+    'trajectory': TrajectoryController,
+}
+
+
+class NoisySimulation(RoverSimulation):
+    """A RoverSimulation whose moves land slightly off.
+
+    Each move lands off by ``N(0, noise)`` times its length on each axis and
+    turns the heading by ``N(0, noise)`` radians; a pose set by a trajectory is
+    off by the same relative error on the step it made. Odometry still reports
+    the commanded move. ``path_length`` is the distance the rover really
+    covered, so every controller is scored on the same measure.
+    ``noise=0`` behaves exactly like the plain simulation. Every run has its own seeded generator, so a sweep gives the
+    same numbers however the runs are spread over processes.
+    """
+
+    def __init__(self, noise=0.0, seed=None, **kwargs):
+        super().__init__(**kwargs)
+        self.noise = noise
+        self.random = random.Random(seed)
+        self.path_length = 0.0
+
+    def _move(self, distance):
+        state = self.state
+        x, y = state.position_x, state.position_y
+        super()._move(distance)
+        if self.noise:
+            self._slip(math.hypot(state.position_x - x, state.position_y - y))
+            state.heading += self.random.gauss(0.0, self.noise)
+        self.path_length += math.hypot(state.position_x - x, state.position_y - y)
+
+    def set_pose(self, x, y, heading):
+        state = self.state
+        start_x, start_y = state.position_x, state.position_y
+        super().set_pose(x, y, heading)
+        if self.noise:
+            self._slip(math.hypot(x - start_x, y - start_y))
+        self.path_length += math.hypot(state.position_x - start_x, state.position_y - start_y)
+
+    def _slip(self, step):
+        state = self.state
+        state.position_x += self.random.gauss(0.0, self.noise * step)
+        state.position_y += self.random.gauss(0.0, self.noise * step)
+
+
+class Scenario:
+    """One run of a sweep: a controller, its parameters, a noise level and a start/target pair."""
+
+    __slots__ = ('controller', 'params', 'noise', 'start', 'target', 'seed', 'max_ticks', 'gps')
+
+    def __init__(self, controller, params, noise, start, target, seed, max_ticks=2000, gps=None):
+        self.controller = controller  # Key of CONTROLLERS
+        self.params = params  # Tuple of (name, value), set on the controller or the simulation
+        self.noise = noise
+        self.start = start  # (x, y, heading)
+        self.target = target  # (x, y)
+        self.seed = seed
+        self.max_ticks = max_ticks
+        self.gps = gps  # Optional GpsSensor arguments (noise, latency, dropout): navigate on filtered GPS
+
+
+def apply_params(sim, controller, params):
+    """Set each (name, value) on the simulation's controller, or else on the simulation.
+
+    Raises ValueError for an unknown name, and for an AutoControl threshold
+    below ``move_distance``: AutoControl moves a whole ``move_distance``
+    every tick, so with a smaller threshold it keeps stepping over the target
+    and most runs never finish.
+    """
+    control = sim.auto_control
+    for name, value in params:
+        if hasattr(control, name):
+            setattr(control, name, value)
+        elif hasattr(sim, name):
+            setattr(sim, name, value)
+        else:
+            raise ValueError(f"{controller} has no parameter {name!r}")
+    if isinstance(control, AutoControl) and control.threshold < sim.move_distance:
+        raise ValueError(f"{controller}: threshold={control.threshold:g} must be at least "
+                         f"move_distance={sim.move_distance:g}, or the rover keeps stepping over the target")
+
+
+def run_scenario(scenario):
+    """Run one scenario headless; returns (ticks or None, path length, straight-line distance)."""
+    x, y, heading = scenario.start
+    sim = NoisySimulation(noise=scenario.noise, seed=scenario.seed, controller=CONTROLLERS[scenario.controller])
+    sim.state.position_x, sim.state.position_y, sim.state.heading = x, y, heading
+    control = sim.auto_control
+    apply_params(sim, scenario.controller, scenario.params)
+    if scenario.gps is not None:
+        sim.set_estimator(PositionEstimator(sim, GpsSensor(*scenario.gps, seed=scenario.seed)))
+    sim.control_mode = 'auto'
+    control.set_target(*scenario.target)
+    straight = math.hypot(scenario.target[0] - x, scenario.target[1] - y)
+    ticks = sim.run_until_reached(scenario.max_ticks)
+    return ticks, sim.path_length, straight
+
+
+def _run_chunk(scenarios):
+    return [run_scenario(scenario) for scenario in scenarios]
+
+
+def random_pairs(count, radius, seed):
+    """``count`` random start poses and targets in a square of half-width ``radius``."""
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        start = (rng.uniform(-radius, radius), rng.uniform(-radius, radius), rng.uniform(-math.pi, math.pi))
+        pairs.append((start, (rng.uniform(-radius, radius), rng.uniform(-radius, radius))))
+    return pairs
+
+
+def build_scenarios(controllers, grid, noises, pairs, seed=0, max_ticks=2000, gps=None):
+    """Every controller x parameter combination x noise level, each run on the same start/target pairs.
+
+    ``grid`` maps a parameter name to the values to try. Reusing the pairs (and
+    the noise seeds) across the cells keeps differences between cells down to
+    the parameters rather than luck of the draw. Every controller and
+    parameter combination is checked with ``apply_params`` first, so a bad
+    one fails here rather than in a worker.
+    """
+    names = sorted(grid)
+    combos = [tuple(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    for controller, params in itertools.product(controllers, combos):
+        apply_params(RoverSimulation(controller=CONTROLLERS[controller]), controller, params)
+    scenarios = []
+    for controller, params, noise in itertools.product(controllers, combos, noises):
+        for i, (start, target) in enumerate(pairs):
+            scenarios.append(Scenario(controller, params, noise, start, target, seed + i, max_ticks, gps))
+    return scenarios
+
+
+def run_sweep(scenarios, workers=None, chunk_size=None):
+    """Run the scenarios over a process pool; results come back in scenario order.
+
+    Scenarios are sent in chunks so each worker round trip covers many runs,
+    not one. ``workers=1`` runs everything in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return _run_chunk(scenarios)
+    chunk_size = chunk_size or max(1, math.ceil(len(scenarios) / (workers * 8)))
+    chunks = [scenarios[i:i + chunk_size] for i in range(0, len(scenarios), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_results in pool.map(_run_chunk, chunks):
+            results.extend(chunk_results)
+    return results
+
+
+class CellStats:
+    """Aggregates the runs of one sweep cell (controller, parameters, noise)."""
+
+    __slots__ = ('runs', 'ticks', 'efficiencies')
+
+    def __init__(self):
+        self.runs = 0
+        self.ticks = []  # Successful runs only
+        self.efficiencies = []
+
+    def add(self, ticks, path_length, straight):
+        self.runs += 1
+        if ticks is None:
+            return
+        self.ticks.append(ticks)
+        self.efficiencies.append(straight / path_length if path_length else 1.0)
+
+    def success_rate(self):
+        return len(self.ticks) / self.runs if self.runs else 0.0
+
+    def ticks_percentile(self, p):
+        if not self.ticks:
+            return float('nan')
+        ordered = sorted(self.ticks)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def mean_ticks(self):
+        return sum(self.ticks) / len(self.ticks) if self.ticks else float('nan')
+
+    def mean_efficiency(self):
+        return sum(self.efficiencies) / len(self.efficiencies) if self.efficiencies else float('nan')
+
+
+def aggregate(scenarios, results):
+    """Group results by (controller, params, noise), in the order the cells first appear."""
+    cells = {}
+    for scenario, result in zip(scenarios, results):
+        key = (scenario.controller, scenario.params, scenario.noise)
+        cells.setdefault(key, CellStats()).add(*result)
+    return cells
+
+
+def format_params(params):
+    return " ".join(f"{name}={value:g}" for name, value in params) or "-"
+
+
+def format_table(cells):
+    width = max([len(format_params(params)) for _, params, _ in cells] + [6])
+    lines = [f"{'controller':<11}{'params':<{width + 2}}{'noise':>6}{'runs':>7}{'success':>9}"
+             f"{'ticks':>8}{'p50':>7}{'p90':>7}{'effic.':>8}"]
+    for (controller, params, noise), stats in cells.items():
+        lines.append(f"{controller:<11}{format_params(params):<{width + 2}}{noise:>6g}{stats.runs:>7}"
+                     f"{stats.success_rate():>9.1%}{stats.mean_ticks():>8.1f}{stats.ticks_percentile(50):>7g}"
+                     f"{stats.ticks_percentile(90):>7g}{stats.mean_efficiency():>8.1%}")
+    return "\n".join(lines)
+
+
+def write_csv(path, cells):
+    import csv
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['controller', 'params', 'noise', 'runs', 'success_rate', 'mean_ticks', 'p50_ticks',
+                         'p90_ticks', 'mean_efficiency'])
+        for (controller, params, noise), stats in cells.items():
+            writer.writerow([controller, format_params(params), noise, stats.runs, stats.success_rate(),
+                             stats.mean_ticks(), stats.ticks_percentile(50), stats.ticks_percentile(90),
+                             stats.mean_efficiency()])
+
+
+def _number(text):
+    value = float(text)
+    return int(value) if value.is_integer() and '.' not in text and 'e' not in text.lower() else value
+
+
+def parse_param(text):
+    """``name=v1,v2,...`` -> (name, [values])."""
+    name, sep, values = text.partition('=')
+    if not sep or not name or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=V1,V2,..., got {text!r}")
+    try:
+        return name, [_number(value) for value in values.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"non-numeric value in {text!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo sweep of the navigation controllers over a process pool.")
+    parser.add_argument('--controllers', nargs='+', default=['auto'], metavar='NAME',
+                        help=f"controllers to sweep: {', '.join(CONTROLLERS)} (default: auto)")
+    parser.add_argument('--param', action='append', type=parse_param, default=[], metavar='NAME=V1,V2',
+                        help="parameter grid, set on the controller or the simulation (repeatable), "
+                             "e.g. threshold=1,5,10 or move_distance=1,10; auto needs threshold >= move_distance")
+    parser.add_argument('--noise', nargs='+', type=float, default=[0.0], help="noise levels to try (default: 0)")
+    parser.add_argument('--gps', nargs=3, type=float, metavar=('NOISE', 'LATENCY', 'DROPOUT'),
+                        help="navigate on Kalman-filtered GPS fixes with this noise, latency (s) and dropout rate")
+    parser.add_argument('--runs', type=int, default=100, help="random start/target pairs per cell")
+    parser.add_argument('--radius', type=float, default=500.0, help="half-width of the square starts and targets "
+                                                                    "are drawn from")
+    parser.add_argument('--max-ticks', type=int, default=2000, help="ticks before a run counts as failed")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument('--csv', metavar='PATH', help="also write the table as CSV")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.controllers if name not in CONTROLLERS]
+    if unknown:
+        parser.error(f"unknown controller(s): {', '.join(unknown)}")
+
+    pairs = random_pairs(args.runs, args.radius, args.seed)
+    try:
+        scenarios = build_scenarios(args.controllers, dict(args.param), args.noise, pairs, args.seed, args.max_ticks,
+                                    args.gps)
+    except ValueError as e:
+        parser.error(str(e))
+    start = time.perf_counter()
+    results = run_sweep(scenarios, args.workers)
+    elapsed = time.perf_counter() - start
+    cells = aggregate(scenarios, results)
+    print(format_table(cells))
+    print(f"{len(scenarios)} runs in {elapsed:.1f}s ({len(scenarios) / elapsed:,.0f} runs/s)")
+    if args.csv:
+        write_csv(args.csv, cells)
+        print(f"Wrote {args.csv}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
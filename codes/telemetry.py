@@ -0,0 +1,139 @@
+import struct
+import threading
+import time
+import logging
+
+# One record: timestamp (s), x, y, heading (radians), mode code, motor state
+RECORD = struct.Struct('<dddfBB')
+
+MODE_CODES = {'manual': 0, 'auto': 1}
+MODE_NAMES = {code: name for name, code in MODE_CODES.items()}
+MODE_UNKNOWN = 255
+
+# Motor state codes; a drive stores the right motor in the low nibble and the left in the high one
+MOTOR_STOPPED = 0
+MOTOR_FORWARD = 1
+MOTOR_BACKWARD = 2
+
+
+def motor_state(right, left):
+    """Pack the right and left motor codes into one record byte."""
+    return right | (left << 4)
+
+
+def format_record(record):
+    timestamp, x, y, heading, mode, motor = record
+    return (f"[{timestamp:.2f}] X={x:.2f}, Y={y:.2f}, Heading={heading:.2f}, "
+            f"Mode={MODE_NAMES.get(mode, '?')}, Motors={motor & 0x0F}/{motor >> 4}")
+
+
+class TelemetryRing:
+    """Fixed-size binary records in a preallocated buffer, for one writer and one reader."""
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.buffer = bytearray(capacity * RECORD.size)
+        self.write_count = 0  # Records ever written
+        self.read_count = 0  # Records ever drained
+        self.dropped = 0  # Records lost because the reader fell behind
+
+    def push(self, timestamp, x, y, heading, mode, motor):
+        """Store one record; returns False (and counts a drop) when the buffer is full."""
+        if self.write_count - self.read_count >= self.capacity:
+            self.dropped += 1
+            return False
+        RECORD.pack_into(self.buffer, (self.write_count % self.capacity) * RECORD.size,
+                         timestamp, x, y, heading, mode, motor)
+        self.write_count += 1
+        return True
+
+    def drain(self):
+        """Return the raw bytes of every unread record, oldest first."""
+        start, end = self.read_count, self.write_count
+        count = end - start
+        if count == 0:
+            return b''
+        first = start % self.capacity
+        size = RECORD.size
+        if first + count <= self.capacity:
+            data = bytes(self.buffer[first * size:(first + count) * size])
+        else:
+            data = bytes(self.buffer[first * size:]) + bytes(self.buffer[:(first + count - self.capacity) * size])
+        self.read_count = end
+        return data
+
+    def latest(self):
+        """Return the most recently written record, or None."""
+        if self.write_count == 0:
+            return None
+        return RECORD.unpack_from(self.buffer, ((self.write_count - 1) % self.capacity) * RECORD.size)
+
+
+class TelemetryLogger:
+    """Collects telemetry records without blocking the caller on file or console output.
+
+    ``record()`` only packs a struct into the ring buffer. A background thread
+    drains the ring every ``flush_interval`` seconds into a binary log at ``path``
+    and, if ``console_interval`` is set, prints the latest record at most that often.
+    """
+
+    def __init__(self, path=None, capacity=4096, flush_interval=0.25, console_interval=None,
+                 console_format=format_record):
+        self.ring = TelemetryRing(capacity)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.console_interval = console_interval
+        self.console_format = console_format
+        self.start_time = time.monotonic()
+        self._last_console = None
+        self._last_printed = None
+        self._file = open(path, 'ab') if path else None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="telemetry-flusher", daemon=True)
+        self._thread.start()
+
+    def record(self, x, y, heading=0.0, mode='manual', motor=MOTOR_STOPPED):
+        """Queue one record stamped with the seconds since the logger was created."""
+        return self.ring.push(time.monotonic() - self.start_time, x, y, heading,
+                              MODE_CODES.get(mode, MODE_UNKNOWN), motor)
+
+    def flush(self):
+        """Write pending records to the log and feed the console sink."""
+        data = self.ring.drain()
+        if data and self._file is not None:
+            self._file.write(data)
+            self._file.flush()
+        if self.console_interval is not None:
+            now = time.monotonic()
+            if self._last_console is None or now - self._last_console >= self.console_interval:
+                latest = self.ring.latest()
+                if latest is not None and latest != self._last_printed:
+                    self._last_console = now
+                    self._last_printed = latest
+                    print(self.console_format(latest))
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except (OSError, ValueError) as e:
+                logging.error(f"Telemetry flush failed: {e}")
+
+    def close(self):
+        """Stop the flusher, write whatever is left and close the log."""
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        if self.ring.dropped:
+            logging.error(f"Telemetry dropped {self.ring.dropped} records")
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_log(path):
+    """Yield (timestamp, x, y, heading, mode, motor) tuples from a binary telemetry log."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    usable = len(data) - len(data) % RECORD.size  # Ignore a partly written last record
+    yield from RECORD.iter_unpack(memoryview(data)[:usable])
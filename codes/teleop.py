@@ -0,0 +1,251 @@
+import argparse
+import os
+import select
+import socket
+import struct
+import sys
+import tempfile
+import time
+from scheduler import LatencyHistogram
+
+# kind, flags, sequence, sender timestamp (echoed in the ack), linear, angular
+MESSAGE = struct.Struct('<BBIdff')
+VELOCITY = 1
+ACK = 2
+FLAG_STOP = 1
+
+DEFAULT_PORT = 47800
+RTT_EDGES_MS = (0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50)
+
+
+def parse_address(text):
+    """'unix:/path' -> '/path' (Unix datagram socket); 'host:port' or 'port' -> (host, port) over UDP."""
+    if text.startswith('unix:'):
+        return text[len('unix:'):]
+    host, _, port = text.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def _datagram_socket(address):
+    family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+    return socket.socket(family, socket.SOCK_DGRAM)
+
+
+class TeleopServer:
+    """Takes velocity commands over UDP or a Unix datagram socket; the latest command wins.
+
+    ``poll()`` reads everything that arrived since the last call without
+    blocking, acks every message (so the sender can time the round trip) and
+    applies only the newest one to ``target.set_velocity(linear, angular)``.
+    Older or out-of-order commands are dropped. If no command arrives for
+    ``deadman`` seconds, ``target.stop()`` is called. Call ``poll()`` from the
+    control tick, or run ``serve_forever()`` on its own.
+    """
+
+    def __init__(self, target, address=('127.0.0.1', DEFAULT_PORT), deadman=0.5, clock=time.monotonic):
+        self.target = target  # ManualControl, hal.Drive, or anything with set_velocity() and stop()
+        self.address = address
+        self.deadman = deadman
+        self.clock = clock
+        if isinstance(address, str) and os.path.exists(address):
+            os.unlink(address)  # Left behind by a previous server
+        self.sock = _datagram_socket(address)
+        self.sock.bind(address)
+        self.sock.setblocking(False)
+        self.last_sequence = None
+        self.last_command = None  # Clock time of the last applied command
+        self.stopped = True
+        self.received = 0
+        self.applied = 0
+        self.superseded = 0  # Replaced by a newer command in the same poll
+        self.stale = 0  # Older than a command already applied
+        self.malformed = 0
+        self.deadman_stops = 0
+
+    def poll(self):
+        """Apply the newest pending command, or stop on the deadman timeout; returns True if a command was applied."""
+        sock = self.sock
+        newest = None
+        while True:
+            try:
+                data, peer = sock.recvfrom(64)
+            except BlockingIOError:
+                break
+            if len(data) != MESSAGE.size:
+                self.malformed += 1
+                continue
+            kind, flags, sequence, stamp, linear, angular = MESSAGE.unpack(data)
+            if kind != VELOCITY:
+                self.malformed += 1
+                continue
+            self.received += 1
+            if peer:
+                try:
+                    sock.sendto(MESSAGE.pack(ACK, flags, sequence, stamp, linear, angular), peer)
+                except OSError:
+                    pass  # The sender is gone; the command still counts
+            if self._is_stale(sequence, newest):
+                self.stale += 1
+                continue
+            if newest is not None:
+                self.superseded += 1
+            newest = (flags, sequence, linear, angular)
+
+        now = self.clock()
+        if newest is not None:
+            flags, self.last_sequence, linear, angular = newest
+            self.last_command = now
+            self.applied += 1
+            if flags & FLAG_STOP:
+                self._stop()
+            else:
+                self.target.set_velocity(linear, angular)
+                self.stopped = False
+            return True
+        if not self.stopped and now - self.last_command > self.deadman:
+            self.deadman_stops += 1
+            self._stop()
+        return False
+
+    def _is_stale(self, sequence, newest):
+        last = newest[1] if newest is not None else None
+        if last is None and not self.stopped:
+            last = self.last_sequence  # After a stop, any sequence starts a new session (e.g. a restarted client)
+        if last is None:
+            return False
+        return 0 < (last - sequence) % (1 << 32) < (1 << 31)  # Wraps around at 2**32
+
+    def _stop(self):
+        self.stopped = True
+        self.target.stop()
+
+    def serve_forever(self, should_stop=lambda: False):
+        """Poll whenever a command arrives, and often enough to honour the deadman, until ``should_stop()``."""
+        while not should_stop():
+            select.select([self.sock], [], [], self.deadman / 4)
+            self.poll()
+
+    def report(self):
+        return (f"{self.received} received, {self.applied} applied, {self.superseded} superseded, "
+                f"{self.stale} stale, {self.malformed} malformed, {self.deadman_stops} deadman stops")
+
+    def close(self):
+        self.sock.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+class TeleopClient:
+    """Sends velocity commands to a TeleopServer and times the round trip of each from its ack."""
+
+    def __init__(self, address=('127.0.0.1', DEFAULT_PORT), clock=time.perf_counter):
+        self.address = address
+        self.clock = clock
+        self.sock = _datagram_socket(address)
+        self.local_path = None
+        if isinstance(address, str):
+            # A Unix datagram client needs an address of its own to get acks back
+            self.local_path = os.path.join(tempfile.gettempdir(), f"teleop-client-{os.getpid()}-{id(self)}.sock")
+            self.sock.bind(self.local_path)
+        self.sock.setblocking(False)
+        self.sequence = 0
+        self.sent = 0
+        self.acked = 0
+        self.rtt = LatencyHistogram(RTT_EDGES_MS)
+
+    def send(self, linear, angular, stop=False):
+        self.sequence = (self.sequence + 1) % (1 << 32)
+        self.sock.sendto(MESSAGE.pack(VELOCITY, FLAG_STOP if stop else 0, self.sequence, self.clock(),
+                                      linear, angular), self.address)
+        self.sent += 1
+
+    def stop(self):
+        self.send(0.0, 0.0, stop=True)
+
+    def poll_acks(self):
+        """Record the round trip of every ack received so far."""
+        while True:
+            try:
+                data = self.sock.recv(64)
+            except BlockingIOError:
+                return
+            if len(data) != MESSAGE.size:
+                continue
+            kind, _, _, stamp, _, _ = MESSAGE.unpack(data)
+            if kind == ACK:
+                self.acked += 1
+                self.rtt.record((self.clock() - stamp) * 1000)
+
+    def wait_ack(self, timeout=0.1):
+        select.select([self.sock], [], [], timeout)
+        self.poll_acks()
+
+    def close(self):
+        self.sock.close()
+        if self.local_path is not None and os.path.exists(self.local_path):
+            os.unlink(self.local_path)
+
+
+def probe(address, count=1000, rate_hz=100.0, server=None):
+    """Send ``count`` commands at ``rate_hz`` and return the client with its round-trip histogram.
+
+    With a ``server`` it is polled in this thread after each send, so the
+    whole path can be timed in one process.
+    """
+    client = TeleopClient(address)
+    period = 1.0 / rate_hz
+    deadline = time.perf_counter()
+    try:
+        for i in range(count):
+            client.send(0.5, 0.1 if i % 2 else -0.1)
+            if server is not None:
+                server.poll()
+            client.wait_ack(0.0 if server is not None else period)
+            deadline += period
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        client.stop()
+        client.wait_ack(0.1)
+    finally:
+        client.close()
+    return client
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teleop command server and latency probe.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="drive a motor backend from teleop commands")
+    serve.add_argument('--backend', choices=('gpiozero', 'gpiozero-mock', 'mock'), default='gpiozero')
+    serve.add_argument('--deadman', type=float, default=0.5, help="seconds without a command before stopping")
+    probe_parser = commands.add_parser('probe', help="send commands and report the round-trip latency")
+    probe_parser.add_argument('--count', type=int, default=1000)
+    probe_parser.add_argument('--rate', type=float, default=100.0, help="commands per second")
+    for sub in (serve, probe_parser):
+        sub.add_argument('--address', type=parse_address, default=('127.0.0.1', DEFAULT_PORT),
+                         help=f"host:port, port or unix:/path (default 127.0.0.1:{DEFAULT_PORT})")
+    args = parser.parse_args(argv)
+
+    if args.command == 'probe':
+        client = probe(args.address, args.count, args.rate)
+        print(f"{client.acked}/{client.sent} acked, round trip {client.rtt.summary()}")
+        print(client.rtt.format())
+        return 0
+
+    from hal import open_drive
+    drive = open_drive(args.backend)
+    server = TeleopServer(drive, args.address, deadman=args.deadman)
+    print(f"Teleop server on {args.address} ({args.backend} drive)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        drive.close()
+        server.close()
+        print(server.report())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
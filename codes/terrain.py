@@ -0,0 +1,263 @@
+import argparse
+import collections
+import math
+import mmap
+import struct
+import sys
+import threading
+import time
+from scheduler import LatencyHistogram
+
+try:
+    import numpy as np
+except ImportError:  # Only generating a map needs it; reading one is plain mmap
+    np = None
+
+# File layout: a 64-byte header, then the tiles row by row, each tile_size x tile_size RGB pixels
+# stored contiguously, so one tile is one read of one slice of the file.
+MAGIC = b'RVTM'
+VERSION = 1
+HEADER = struct.Struct('<4sIIII3d')  # magic, version, tile size, tile rows, tile cols, origin x, origin y, resolution
+HEADER_SIZE = 64
+CHANNELS = 3
+
+
+class TerrainMap:
+    """Read-only, memory-mapped tiled raster map.
+
+    Map pixel (px, py) covers world x in [origin_x + px * resolution, ...)
+    and y likewise with py; px runs along the tile columns and py down the
+    tile rows. Opening a map reads only the header: the OS pages tiles in
+    when ``read_tile()`` touches them, so a map can be far bigger than RAM.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.tile_size, self.rows, self.cols, origin_x, origin_y,
+         self.resolution) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} terrain map")
+        self.origin = (origin_x, origin_y)
+        self.tile_bytes = self.tile_size * self.tile_size * CHANNELS
+        self.width = self.cols * self.tile_size  # Map pixels
+        self.height = self.rows * self.tile_size
+
+    def contains(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def tile_at(self, px, py):
+        """(row, col) of the tile holding map pixel (px, py)."""
+        return int(py // self.tile_size), int(px // self.tile_size)
+
+    def read_tile(self, row, col):
+        """The tile's RGB bytes. Copying them out is what reads the disk, so call this off the frame loop."""
+        offset = HEADER_SIZE + (row * self.cols + col) * self.tile_bytes
+        return self._map[offset:offset + self.tile_bytes]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def write_terrain(path, rows, cols, tile_size=256, origin=(0.0, 0.0), resolution=1.0, tile_fn=None):
+    """Write a terrain map of rows x cols tiles, one tile at a time, so it never needs the whole map in memory.
+
+    ``tile_fn(row, col, tile_size)`` returns a (tile_size, tile_size, 3) uint8
+    array; the default is ``procedural_tile``.
+    """
+    tile_fn = tile_fn or procedural_tile
+    with open(path, 'wb') as f:
+        header = HEADER.pack(MAGIC, VERSION, tile_size, rows, cols, origin[0], origin[1], resolution)
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        for row in range(rows):
+            for col in range(cols):
+                f.write(np.ascontiguousarray(tile_fn(row, col, tile_size), dtype=np.uint8).tobytes())
+
+
+# Terrain colours from low to high ground: water, sand, grass, scrub, rock
+PALETTE = ((60, 110, 170), (210, 195, 150), (110, 160, 80), (80, 120, 60), (140, 130, 120))
+LEVELS = (-0.5, -0.35, 0.2, 0.6)  # Height thresholds between the palette entries
+
+
+def procedural_tile(row, col, tile_size, scale=600.0):
+    """A tile of smooth pseudo-terrain; a function of the map pixel only, so tiles join seamlessly."""
+    py, px = np.mgrid[row * tile_size:(row + 1) * tile_size, col * tile_size:(col + 1) * tile_size] / scale
+    height = (np.sin(px * 1.3 + np.cos(py * 0.7)) * 0.5 + np.sin(py * 1.7 + 2.0 * np.sin(px * 0.4)) * 0.35
+              + np.sin((px + py) * 4.1) * 0.15)
+    level = np.digitize(height, LEVELS)
+    tile = np.asarray(PALETTE, dtype=np.uint8)[level]
+    # Shade slopes facing away from the light so the relief shows
+    shade = np.clip(1.0 + np.gradient(height, axis=1) * 40.0, 0.75, 1.1)
+    return np.clip(tile * shade[..., None], 0, 255).astype(np.uint8)
+
+
+class TileCache:
+    """Bounded LRU cache of terrain tiles, filled by a loader thread.
+
+    ``get()`` never touches the file: it returns a cached tile, or None
+    after queueing the tile as urgent, so a frame loop only ever reads
+    memory. ``prefetch()`` queues the tiles around a position and ahead of
+    it in the direction of travel; each call replaces the previous list
+    (urgent tiles stay queued, and go first), so tiles the rover has
+    already passed are never loaded. Loaded tiles go through
+    ``make(data, tile_size)`` on the loader thread (e.g. to wrap them in a
+    pygame Surface), and ``take_arrived()`` says which ones came in since it
+    was last called, so the view can redraw them.
+
+    Memory is at most ``capacity`` tiles, plus the one being loaded.
+    """
+
+    def __init__(self, terrain, capacity=96, make=None):
+        self.terrain = terrain
+        self.capacity = capacity
+        self.make = make  # None keeps the raw bytes
+        self.tiles = collections.OrderedDict()
+        self.load_time = LatencyHistogram()
+        self.hits = 0
+        self.misses = 0
+        self.loaded = 0
+        self.evicted = 0
+        self._lock = threading.Condition()  # Guards everything the loader thread shares
+        self._urgent = []  # Tiles a get() missed, most recent last
+        self._wanted = []  # Tiles to prefetch, most urgent last
+        self._loading = None
+        self._arrived = []
+        self._last_prefetch = None
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="tile-loader", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            self.running = False
+            self._lock.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def get(self, row, col):
+        """The tile if it is cached; otherwise None, and the tile goes to the front of the queue."""
+        key = (row, col)
+        with self._lock:
+            tile = self.tiles.get(key)
+            if tile is not None:
+                self.tiles.move_to_end(key)
+                self.hits += 1
+                return tile
+            self.misses += 1
+            if key != self._loading and key not in self._urgent and self.terrain.contains(row, col):
+                self._urgent.append(key)
+                self._lock.notify()
+            return None
+
+    def request(self, keys):
+        """Replace the prefetch queue with ``keys`` (row, col), most urgent first; cached ones are skipped."""
+        with self._lock:
+            wanted = [key for key in keys if key not in self.tiles and key != self._loading
+                      and key not in self._urgent and self.terrain.contains(*key)]
+            self._wanted = wanted[:self.capacity][::-1]  # Never queue more than fits
+            self._lock.notify()
+
+    def prefetch(self, px, py, dx=0.0, dy=0.0, radius=3, ahead=2):
+        """Queue the tiles within ``radius`` of map pixel (px, py), nearest first, then the same
+        neighbourhood up to ``ahead`` tiles further along the direction (dx, dy), if any.
+
+        Cheap to call every frame: nothing happens until the tile or the direction changes.
+        """
+        size = self.terrain.tile_size
+        row, col = self.terrain.tile_at(px, py)
+        length = math.hypot(dx, dy)
+        direction = (round(dx / length, 1), round(dy / length, 1)) if length else None
+        if (row, col, direction) == self._last_prefetch:
+            return
+        self._last_prefetch = (row, col, direction)
+        keys = {}
+        centers = [(px, py)]
+        if direction is not None:
+            centers += [(px + dx / length * size * step, py + dy / length * size * step)
+                        for step in range(1, ahead + 1)]
+        for order, (cx, cy) in enumerate(centers):
+            center_row, center_col = self.terrain.tile_at(cx, cy)
+            for r in range(center_row - radius, center_row + radius + 1):
+                for c in range(center_col - radius, center_col + radius + 1):
+                    if (r, c) not in keys:
+                        distance = math.hypot((c + 0.5) * size - cx, (r + 0.5) * size - cy)
+                        keys[(r, c)] = (order, distance)
+        self.request(sorted(keys, key=keys.get))
+
+    def take_arrived(self):
+        """(row, col) of the tiles loaded since the last call."""
+        with self._lock:
+            arrived, self._arrived = self._arrived, []
+        return arrived
+
+    def _run(self):
+        terrain, make, lock = self.terrain, self.make, self._lock
+        while True:
+            with lock:
+                while self.running and not self._urgent and not self._wanted:
+                    lock.wait()
+                if not self.running:
+                    return
+                key = self._loading = (self._urgent or self._wanted).pop()
+            start = time.perf_counter()
+            tile = terrain.read_tile(*key)  # The disk read, outside the lock
+            if make is not None:
+                tile = make(tile, terrain.tile_size)
+            self.load_time.record((time.perf_counter() - start) * 1000)
+            with lock:
+                self._loading = None
+                self.tiles[key] = tile
+                self._arrived.append(key)
+                self.loaded += 1
+                while len(self.tiles) > self.capacity:
+                    self.tiles.popitem(last=False)
+                    self.evicted += 1
+
+    def memory_bytes(self):
+        """Raw tile bytes held (a made tile may be larger, e.g. a pygame Surface pads to 4 bytes per pixel)."""
+        return len(self.tiles) * self.terrain.tile_bytes
+
+    def report(self):
+        return (f"{self.hits} hits, {self.misses} misses, {self.loaded} loaded, {self.evicted} evicted, "
+                f"{len(self.tiles)}/{self.capacity} cached; load {self.load_time.summary()}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create or inspect a tiled terrain map.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    generate = commands.add_parser('generate', help="write a procedural terrain map")
+    generate.add_argument('path')
+    generate.add_argument('--tiles', nargs=2, type=int, default=(24, 32), metavar=('ROWS', 'COLS'))
+    generate.add_argument('--tile-size', type=int, default=256, help="pixels per tile side")
+    generate.add_argument('--resolution', type=float, default=0.1, help="world units per pixel (Simu's GPS_SCALE)")
+    generate.add_argument('--origin', nargs=2, type=float, default=(0.0, 0.0), metavar=('X', 'Y'))
+    info = commands.add_parser('info', help="print a map's size")
+    info.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        if np is None:
+            parser.error("generating a map needs numpy")
+        rows, cols = args.tiles
+        write_terrain(args.path, rows, cols, args.tile_size, tuple(args.origin), args.resolution)
+    terrain = TerrainMap(args.path)
+    size = HEADER_SIZE + terrain.rows * terrain.cols * terrain.tile_bytes
+    print(f"{args.path}: {terrain.rows} x {terrain.cols} tiles of {terrain.tile_size} px "
+          f"({terrain.width} x {terrain.height} px, {size / 1e6:.1f} MB), "
+          f"{terrain.resolution} units per pixel from {terrain.origin}")
+    terrain.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import unittest
+from scheduler import ControlLoop
+
+
+class FakeScreen:
+    """Queues ontimer callbacks so a test can fire them one at a time."""
+
+    def __init__(self):
+        self.timers = []
+
+    def ontimer(self, fun, t=0):
+        self.timers.append(fun)
+
+    def fire(self):
+        timers, self.timers = self.timers, []
+        for fun in timers:
+            fun()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ControlLoopRestartTest(unittest.TestCase):
+    def test_restart_from_inside_the_callback_keeps_one_timer_chain(self):
+        screen, clock = FakeScreen(), FakeClock()
+        ticks = []
+
+        def callback():
+            ticks.append(clock.now)
+            if len(ticks) in (2, 4):
+                loop.stop()  # As VirtualPiBoard.auto_move does before asking for a new target
+                loop.start()
+
+        loop = ControlLoop(screen, callback, period_ms=100, clock=clock)
+        loop.start()
+        for _ in range(6):
+            clock.now += 0.1
+            screen.fire()
+            self.assertEqual(len(screen.timers), 1)
+        self.assertTrue(loop.running)
+
+    def test_stop_from_inside_the_callback_schedules_nothing(self):
+        screen, clock = FakeScreen(), FakeClock()
+        loop = ControlLoop(screen, lambda: loop.stop(), period_ms=100, clock=clock)
+        loop.start()
+        self.assertEqual(screen.timers, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
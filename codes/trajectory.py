@@ -0,0 +1,247 @@
+import math
+import numpy as np
+from controllers import Controller, wrap_angle
+
+
+class Trajectory:
+    """A whole approach worked out in advance: one pose per control tick.
+
+    ``steps`` is the distance driven on each tick. The generated arrays are
+    stored as Python lists: playback reads one element a tick, and list indexing
+    is far cheaper than indexing a NumPy array.
+    """
+
+    def __init__(self, xs, ys, headings, times, steps, reaches_target=True, blocked=False):
+        self.xs = xs.tolist()
+        self.ys = ys.tolist()
+        self.headings = headings.tolist()
+        self.times = times.tolist()
+        self.steps = steps.tolist()
+        self.reaches_target = reaches_target  # False if cut short by the horizon or an obstacle
+        self.blocked = blocked  # True if cut short by an obstacle
+
+    def __len__(self):
+        return len(self.xs)
+
+    def points(self):
+        return list(zip(self.xs, self.ys))
+
+    def length(self):
+        return sum(self.steps)
+
+    def duration(self):
+        return self.times[-1] - self.times[0] if self.times else 0.0
+
+
+def speed_profile(distance, max_speed, accel=None, limit=None, start_speed=0.0):
+    """Distance per tick to cover ``distance``: ramp up by ``accel``, cruise, ramp down, no overshoot.
+
+    Without ``accel`` every tick moves ``max_speed`` until the last, shorter one.
+    With ``limit`` only the first ``limit`` ticks are returned (and built).
+    A rover already moving at ``start_speed`` a tick carries on from it
+    rather than ramping up from rest, as long as it can still stop in time.
+    """
+    if distance <= 0:
+        return np.zeros(0)
+    if accel is None or accel >= max_speed:
+        ramp = up = down = np.zeros(0)
+    else:
+        ramp = np.minimum(accel * np.arange(1, math.ceil(max_speed / accel) + 1), max_speed)
+        ramp = ramp[ramp < max_speed]
+        # Keep as much of the ramp up as fits, with the ramp down from the speed it reaches. If even
+        # stopping from ``start_speed`` does not fit, start from rest instead.
+        for start in (min(start_speed, max_speed), 0.0):
+            up = start + accel * np.arange(1, math.ceil((max_speed - start) / accel) + 1)
+            up = up[up < max_speed]
+            for kept in range(len(up), -1, -1):
+                peak = up[kept - 1] if kept else start
+                down = ramp if kept == len(up) else ramp[ramp < peak + accel / 2]
+                if up[:kept].sum() + down.sum() <= distance:
+                    up = up[:kept]
+                    break
+            else:
+                continue
+            break
+    middle = distance - up.sum() - down.sum()
+    pieces = math.ceil(middle / max_speed - 1e-12) if middle > 0 else 0
+    shown = pieces if limit is None else min(pieces, limit)
+    cruise = np.full(shown, middle / pieces) if pieces else np.zeros(0)
+    # Sorted, the cruise steps slot in where they keep the speed rising instead of dipping mid-run
+    profile = np.concatenate((np.sort(np.concatenate((up, cruise))), down[::-1]))
+    return profile if limit is None else profile[:limit]
+
+
+def generate_trajectory(x, y, heading, target_x, target_y, max_speed, accel=None, max_turn=None,
+                        dt=0.1, start_time=0.0, horizon=None, start_speed=0.0):
+    """Turn to face the target (at most ``max_turn`` a tick, or at once), then drive straight at it.
+
+    Every pose is computed in one vectorized pass; the last one is exactly the
+    target, unless the trajectory is cut at ``horizon`` ticks. A rover moving
+    at ``start_speed`` takes a turn of up to ``max_turn`` without stopping.
+    """
+    dx, dy = target_x - x, target_y - y
+    distance = math.hypot(dx, dy)
+    bearing = math.atan2(dy, dx) if distance else heading
+    turn = wrap_angle(bearing - heading)
+    turn_ticks = math.ceil(abs(turn) / max_turn - 1e-12) if max_turn and distance else 0
+    if turn_ticks > 1:
+        start_speed = 0.0  # Stops to turn on the spot
+    elif start_speed:
+        turn_ticks = 0
+    if horizon is not None:
+        turn_ticks = min(turn_ticks, horizon)
+    turn_headings = heading + turn * np.arange(1, turn_ticks + 1) / max(turn_ticks, 1)
+
+    steps = speed_profile(distance, max_speed, accel, None if horizon is None else horizon - turn_ticks,
+                          start_speed)
+    travelled = np.cumsum(steps)
+    complete = travelled[-1] >= distance - 1e-9 if len(travelled) else distance == 0
+    if complete and len(travelled):
+        travelled[-1] = distance  # No rounding drift: finish on the target
+    scale = travelled / distance if distance else travelled
+    count = turn_ticks + len(steps)
+    xs = np.concatenate((np.full(turn_ticks, float(x)), x + dx * scale))
+    ys = np.concatenate((np.full(turn_ticks, float(y)), y + dy * scale))
+    headings = np.concatenate((turn_headings, np.full(len(steps), bearing)))
+    times = start_time + dt * np.arange(1, count + 1)
+    return Trajectory(xs, ys, headings, times, np.concatenate((np.zeros(turn_ticks), steps)), complete)
+
+
+def clip_to_world(trajectory, world, x, y):
+    """Cut the trajectory short before the first move ``world`` would block."""
+    if world is None or not len(trajectory):
+        return trajectory
+    xs = np.asarray(trajectory.xs)
+    ys = np.asarray(trajectory.ys)
+    blocked = np.flatnonzero(world.segments_blocked(np.concatenate(([x], xs[:-1])), np.concatenate(([y], ys[:-1])),
+                                                    xs, ys))
+    if not len(blocked):
+        return trajectory
+    end = int(blocked[0])
+    return Trajectory(xs[:end], ys[:end], np.asarray(trajectory.headings[:end]), np.asarray(trajectory.times[:end]),
+                      np.asarray(trajectory.steps[:end]), reaches_target=False, blocked=True)
+
+
+class TrajectoryController(Controller):
+    """Plays back a trajectory generated when the target is set, one pose per tick.
+
+    No trigonometry runs per tick: ``update()`` checks the rover is still near
+    where the last pose put it and moves it on by the next step. The trajectory
+    is only generated again when the target changes, when the rover has strayed
+    more than ``tolerance`` from it (wheel slip, manual driving, a collision),
+    when it was played out but left the rover ``threshold`` or more off the
+    target, or when one cut short by an obstacle has been played out and the
+    world model changed since it was generated. A new trajectory carries on at
+    the speed the rover was going. With an estimator set, trajectories are
+    planned from, and drift is measured on, the estimated position, as every
+    other controller navigates; each step still moves the real rover. Route observers are called with every new Trajectory, so a view
+    can draw the whole route straight away. Long approaches are generated
+    ``horizon`` ticks at a time.
+    """
+
+    def __init__(self, rover, frame=None, threshold=1.0, max_speed=10.0, accel=4.0, max_turn=math.pi / 8,
+                 horizon=3000, tolerance=None):
+        super().__init__(rover, frame, threshold)
+        self.max_speed = max_speed
+        self.accel = accel
+        self.max_turn = max_turn
+        self.horizon = horizon
+        self.tolerance = threshold if tolerance is None else max(tolerance, threshold)
+        self.trajectory = None
+        self.index = 0
+        self.route_observers = []  # Called with each new Trajectory
+        self.regenerations = 0
+        self.speed = 0.0  # Distance moved on the last tick played
+        self._expected = None  # Pose the rover should be in if nothing else moved it
+        self._world_version = None  # World model version the trajectory was clipped against
+
+    def add_route_observer(self, observer):
+        self.route_observers.append(observer)
+
+    def reset(self):
+        self.trajectory = None
+        self.speed = 0.0
+        if self.target_lat is not None:
+            self.generate()
+
+    def generate(self):
+        rover = self.rover
+        x, y = self.position()
+        heading = rover.heading
+        target_x, target_y = self.target_x, self.target_y
+        if math.hypot(target_x - x, target_y - y) < self.threshold:
+            target_x, target_y = x, y  # Already there: an empty trajectory
+        trajectory = generate_trajectory(x, y, heading, target_x, target_y, self.max_speed, self.accel,
+                                         self.max_turn, getattr(rover, 'dt', 0.1), getattr(rover, 'sim_time', 0.0),
+                                         self.horizon, self.speed)
+        world = getattr(rover, 'world', None)
+        self.trajectory = clip_to_world(trajectory, world, x, y)
+        self._world_version = getattr(world, 'version', None)
+        self.index = 0
+        self._expected = (x, y, heading)
+        self.regenerations += 1
+        for observer in self.route_observers:
+            observer(self.trajectory)
+        return self.trajectory
+
+    def navigate_to_target(self):
+        if self.target_lat is None or self.target_lon is None:
+            return False  # No target set
+        self._refresh()
+        if self.index == len(self.trajectory):
+            self.speed = 0.0
+            if self.trajectory.blocked:
+                return False  # In front of the obstacle; tried again once the world changes
+            self.rover.stop()
+            self._finish()
+            return True
+        self._ticks += 1
+        self._play()
+        return False
+
+    def steer(self, distance, bearing):
+        """One tick of playback, for callers that drive controllers through ``steer()``.
+
+        The trajectory already knows the way, so the arguments are not used.
+        Returns the heading of the pose applied, or None if none was left.
+        """
+        self._refresh()
+        return self._play()
+
+    def _refresh(self):
+        trajectory = self.trajectory
+        drift = self._drift() if trajectory is not None else None
+        if trajectory is None or drift > self.tolerance:
+            self.generate()  # The rover strayed from the trajectory: plan again from where it is
+        elif self.index == len(trajectory):
+            if trajectory.reaches_target:
+                if drift >= self.threshold:
+                    self.generate()  # Played out, but short of the target
+            elif not trajectory.blocked or self._world_changed():
+                self.generate()  # The next stretch, or another try at the way the obstacle blocked
+
+    def _drift(self):
+        """How far the rover is (or is estimated to be) from where the last pose put it."""
+        x, y, _ = self._expected
+        position_x, position_y = self.position()
+        return math.hypot(position_x - x, position_y - y)
+
+    def _world_changed(self):
+        """True if the world may have changed since the trajectory was clipped against it."""
+        version = getattr(getattr(self.rover, 'world', None), 'version', None)
+        return version is None or version != self._world_version
+
+    def _play(self):
+        trajectory, i = self.trajectory, self.index
+        if i == len(trajectory):
+            return None
+        x, y, heading = trajectory.xs[i], trajectory.ys[i], trajectory.headings[i]
+        last_x, last_y, _ = self._expected
+        rover = self.rover
+        # Move on by the step from where the rover is, so any drift is kept and seen, not hidden
+        rover.set_pose(rover.position_x + x - last_x, rover.position_y + y - last_y, heading)
+        self._expected = (x, y, heading)
+        self.speed = trajectory.steps[i]
+        self._path_length += self.speed
+        self.index = i + 1
+        return heading
@@ -0,0 +1,119 @@
+import turtle
+import math
+
+
+class FrameRenderer:
+    """Redraws a turtle screen at its own frame rate instead of on every state change.
+
+    Animation is switched off with ``tracer(0)``; anything that changes the picture
+    calls ``mark_dirty()`` and the next frame runs the draw callbacks once and
+    performs a single ``screen.update()``. Frames with nothing new are skipped.
+    """
+
+    def __init__(self, screen, fps=30):
+        self.screen = screen
+        self.frame_ms = max(1, int(1000 / fps))
+        self.draw_callbacks = []  # Run once per drawn frame, before the canvas update
+        self.dirty = False
+        self.running = False
+        self.frames_drawn = 0
+
+    def add_draw_callback(self, callback):
+        self.draw_callbacks.append(callback)
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def start(self):
+        """Turn off turtle animation and start the frame loop."""
+        if self.running:
+            return
+        self.screen.tracer(0)
+        self.running = True
+        self._frame()
+
+    def stop(self):
+        self.running = False
+
+    def draw(self):
+        """Draw now if anything changed since the last frame; returns True if it drew."""
+        if not self.dirty:
+            return False
+        self.dirty = False
+        for callback in self.draw_callbacks:
+            callback()
+        self.screen.update()
+        self.frames_drawn += 1
+        return True
+
+    def _frame(self):
+        if not self.running:
+            return
+        self.draw()
+        self.screen.ontimer(self._frame, self.frame_ms)
+
+
+class TurtleView:
+    """Draws the rover with a turtle; attach it to a RoverSimulation as an observer."""
+
+    def __init__(self, rover, title_format="Rover Simulation - Lat: {lat:.2f}, Lon: {lon:.2f}"):
+        self.rover = rover
+        self.title_format = title_format
+        self.renderer = None  # Draw immediately until start() is called
+        self.state = None
+        self.last_title = None
+
+    def __call__(self, state):
+        self.state = state
+        if self.renderer is not None:
+            self.renderer.mark_dirty()  # Coalesced into the next frame
+        else:
+            self.draw()
+
+    def start(self, fps=30):
+        """Decouple drawing from the control tick and redraw at ``fps`` frames per second."""
+        self.renderer = FrameRenderer(self.rover.getscreen(), fps)
+        self.renderer.add_draw_callback(self.draw)
+        if self.state is not None:
+            self.renderer.mark_dirty()
+        self.renderer.start()
+        return self.renderer
+
+    def draw(self):
+        state = self.state
+        if state is None:
+            return
+        self.rover.setheading(math.degrees(state.heading))
+        self.rover.goto(state.position_x, state.position_y)
+        self.update_screen_title(state)
+
+    def update_screen_title(self, state):
+        lat, lon = state.get_lat_lon()
+        title = self.title_format.format(lat=lat, lon=lon, mode=state.control_mode.capitalize())
+        if title != self.last_title:  # Only touch the window manager when the text changes
+            self.last_title = title
+            turtle.title(title)
+
+
+class RoutePreview:
+    """Draws a planned route with its own hidden turtle; add it as a route observer of a TrajectoryController."""
+
+    def __init__(self, renderer=None, color="gray"):
+        self.renderer = renderer  # FrameRenderer to redraw through; None draws immediately
+        self.pen = turtle.Turtle()
+        self.pen.hideturtle()
+        self.pen.penup()
+        self.pen.color(color)
+
+    def __call__(self, trajectory):
+        pen = self.pen
+        pen.clear()
+        points = trajectory.points()
+        if points:
+            pen.goto(points[0])
+            pen.pendown()
+            for point in points[1:]:
+                pen.goto(point)
+            pen.penup()
+        if self.renderer is not None:
+            self.renderer.mark_dirty()
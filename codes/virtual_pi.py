@@ -1,242 +1,337 @@
-import turtle
-import logging
-import math
-
-# Configure logging
-logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
-
-
-class VirtualMotor:
-    """Simulates a motor using the Turtle graphics module."""
-
-    def __init__(self, forward_pin, backward_pin, turtle_obj, name="Motor"):
-        self.forward_pin = forward_pin
-        self.backward_pin = backward_pin
-        self.turtle_obj = turtle_obj
-        self.name = name
-        self.moving = False  # Flag to track the movement state
-
-    def forward(self):
-        """Simulate moving forward."""
-        self.moving = True
-        print(f"{self.name} moving forward")
-        self._move_turtle_forward()
-
-    def backward(self):
-        """Simulate moving backward."""
-        self.moving = True
-        print(f"{self.name} moving backward")
-        self._move_turtle_backward()
-
-    def stop(self):
-        """Simulate stopping."""
-        self.moving = False
-        print(f"{self.name} stopped")
-
-    def _move_turtle_forward(self):
-        """Move Turtle forward continuously until stopped."""
-        if self.moving:
-            try:
-                self.turtle_obj.forward(10)
-                self.center_view()  # Keep Turtle in the center of the view
-                self.turtle_obj.screen.ontimer(self._move_turtle_forward, 50)
-            except turtle.TurtleGraphicsError as e:
-                logging.error(f"Error moving turtle forward: {e}")
-
-    def _move_turtle_backward(self):
-        """Move Turtle backward continuously until stopped."""
-        if self.moving:
-            try:
-                self.turtle_obj.backward(10)
-                self.center_view()  # Keep Turtle in the center of the view
-                self.turtle_obj.screen.ontimer(self._move_turtle_backward, 50)
-            except turtle.TurtleGraphicsError as e:
-                logging.error(f"Error moving turtle backward: {e}")
-
-    def center_view(self):
-        """Center the screen view on the Turtle."""
-        x, y = self.turtle_obj.position()
-        self.turtle_obj.screen.setworldcoordinates(x - 200, y - 200, x + 200, y + 200)
-        self.turtle_obj.screen.update()
-
-
-class VirtualPiBoard:
-    """Simulates a Raspberry Pi board using Turtle."""
-
-    def __init__(self):
-        # Initialize the Turtle screen
-        self.screen = turtle.Screen()
-        self.screen.title("Virtual Raspberry Pi Board Simulation")
-        self.screen.bgcolor("white")
-
-        # Initialize the Turtle object representing the rover
-        self.rover = turtle.Turtle()
-        self.rover.color("blue")
-        self.rover.penup()  # Lift the pen to avoid drawing lines
-        self.rover.speed(0)  # Highest speed for immediate response
-
-        # Initialize simulated GPS coordinates
-        self.latitude = 0.0
-        self.longitude = 0.0
-        self.update_coordinates()  # Initial coordinate display
-
-        # Initialize motors with their respective Turtle control
-        self.motor_right = VirtualMotor(forward_pin=17, backward_pin=18, turtle_obj=self.rover, name="Right Motor")
-        self.motor_left = VirtualMotor(forward_pin=22, backward_pin=23, turtle_obj=self.rover, name="Left Motor")
-
-        # Set initial mode to manual
-        self.mode = "manual"  # Possible values: "manual", "auto"
-        self.target_latitude = None
-        self.target_longitude = None
-        self.setup_ui()
-
-    def setup_ui(self):
-        """Set up UI and key bindings."""
-        self.bind_keys()
-        self.ask_for_mode()  # Ask user to choose mode
-
-    def move_forward(self):
-        """Move the rover forward."""
-        if self.mode == "manual":
-            self.motor_right.forward()
-            self.motor_left.forward()
-            self.update_coordinates()
-
-    def move_backward(self):
-        """Move the rover backward."""
-        if self.mode == "manual":
-            self.motor_right.backward()
-            self.motor_left.backward()
-            self.update_coordinates()
-
-    def turn_left(self):
-        """Simulate turning left."""
-        if self.mode == "manual":
-            print("Rover turning left")
-            self.rover.left(15)
-            self.update_coordinates()
-
-    def turn_right(self):
-        """Simulate turning right."""
-        if self.mode == "manual":
-            print("Rover turning right")
-            self.rover.right(15)
-            self.update_coordinates()
-
-    def stop(self):
-        """Stop the rover."""
-        self.motor_right.stop()
-        self.motor_left.stop()
-
-    def update_coordinates(self):
-        """Update and display the rover's simulated GPS coordinates."""
-        self.latitude = self.rover.ycor() / 10.0  # Scale factor for simulation
-        self.longitude = self.rover.xcor() / 10.0
-        self.screen.title(
-            f"Virtual Raspberry Pi Board Simulation - Lat: {self.latitude:.2f}, Lon: {self.longitude:.2f}")
-
-    def bind_keys(self):
-        """Bind arrow keys to rover movement functions and mode switch."""
-        self.screen.listen()
-        self.screen.onkeypress(self.move_forward, "Up")
-        self.screen.onkeyrelease(self.stop, "Up")
-        self.screen.onkeypress(self.move_backward, "Down")
-        self.screen.onkeyrelease(self.stop, "Down")
-        self.screen.onkeypress(self.turn_left, "Left")
-        self.screen.onkeypress(self.turn_right, "Right")
-        self.screen.onkeyrelease(self.stop, "space")
-        self.screen.onkeypress(self.toggle_mode, "m")  # Bind 'm' key to toggle modes
-
-    def toggle_mode(self):
-        """Toggle between manual and automatic modes."""
-        if self.mode == "manual":
-            self.mode = "auto"
-            print("Switched to automatic mode")
-            self.ask_for_target_location()
-        else:
-            self.mode = "manual"
-            print("Switched to manual mode")
-            self.stop()  # Stop the rover when switching to manual mode
-
-    def ask_for_mode(self):
-        """Prompt the user to select the mode."""
-        mode_input = self.screen.textinput("Mode Selection", "Enter mode (manual/auto): ")
-        if mode_input:
-            mode_input = mode_input.strip().lower()
-            if mode_input == "auto":
-                self.mode = "auto"
-                self.ask_for_target_location()
-            else:
-                self.mode = "manual"
-
-    def ask_for_target_location(self):
-        """Prompt the user for target location in automatic mode."""
-        if self.mode == "auto":
-            try:
-                lat_input = self.screen.textinput("Target Location", "Enter target latitude:")
-                lon_input = self.screen.textinput("Target Location", "Enter target longitude:")
-                if lat_input and lon_input:
-                    self.target_latitude = float(lat_input)
-                    self.target_longitude = float(lon_input)
-                    print(f"Target set to Lat: {self.target_latitude}, Lon: {self.target_longitude}")
-                    self.start_auto_mode()
-                else:
-                    print("Target location inputs cannot be empty.")
-            except ValueError:
-                print("Invalid input. Please enter numeric values for latitude and longitude.")
-
-    def start_auto_mode(self):
-        """Start automatic mode behavior."""
-        if self.mode == "auto":
-            print("Starting automatic mode")
-            self.auto_move()  # Start automatic movement
-
-    def auto_move(self):
-        """Move the rover automatically towards the target."""
-        try:
-            if self.mode == "auto":
-                distance = self.calculate_distance_to_target()
-                print(f"Current Distance to Target: {distance:.2f}")  # Debug print
-                if distance > 1.0:  # Adjust the threshold as needed
-                    self.move_towards_target()
-                    self.update_coordinates()
-                    self.screen.update()  # Ensure the screen updates with the new position
-                    self.screen.ontimer(self.auto_move, 500)  # Continue moving every 0.5 second
-                else:
-                    self.stop()  # Stop if the rover is close to the target
-                    print("Reached the target location.")
-                    self.ask_for_mode()  # Ask user to select mode after reaching the target
-        except Exception as e:
-            logging.error(f"Error in automatic mode: {e}")
-            self.mode = "manual"  # Switch back to manual mode on error
-
-    def move_towards_target(self):
-        """Move the rover towards the target location."""
-        try:
-            target_x = self.target_longitude * 10
-            target_y = self.target_latitude * 10
-            angle_to_target = self.rover.towards(target_x, target_y)
-            distance = self.calculate_distance_to_target()
-
-            self.rover.setheading(angle_to_target)
-            print(f"Moving towards angle: {angle_to_target}, Distance: {distance:.2f}")
-
-            if distance > 1.0:  # Ensure movement while away from the target
-                self.motor_right.forward()
-                self.motor_left.forward()
-            else:
-                self.stop()  # Stop if very close to the target
-        except Exception as e:
-            logging.error(f"Error moving towards target: {e}")
-            self.stop()  # Stop the rover on error
-            self.ask_for_mode()
-
-    def calculate_distance_to_target(self):
-        """Calculate the distance to the target location."""
-        dx = self.target_longitude * 10 - self.rover.xcor()
-        dy = self.target_latitude * 10 - self.rover.ycor()
-        return math.sqrt(dx ** 2 + dy ** 2)
-
-    def cleanup(self):
-        """Clean up the Turtle graphics."""
-        self.screen.bye()
\ No newline at end of file
+import argparse
+import turtle
+import logging
+import math
+from turtle_view import FrameRenderer
+from camera import Camera
+from geo import LocalFrame
+from hal import Drive
+from scheduler import ControlLoop
+from telemetry import TelemetryLogger, motor_state
+
+
+class VirtualDrive(Drive):
+    """The virtual backend of hal.Drive: both wheels move one Turtle.
+
+    A single timer loop integrates the differential-drive kinematics once
+    every ``period_ms``; at full speed on both wheels that is the old 10
+    units per 50 ms. The loop is only ever scheduled once, however often
+    the speeds are set.
+    """
+
+    def __init__(self, turtle_obj, renderer=None, on_change=None, period_ms=50, step=10, track_width=20):
+        super().__init__()
+        self.turtle_obj = turtle_obj
+        self.renderer = renderer  # Optional FrameRenderer that batches redraws
+        self.on_change = on_change  # Called after every speed change and integration step
+        self.period_ms = period_ms
+        self.step = step  # Distance per tick at full speed
+        self.track_width = track_width  # Distance between the wheels, in turtle units
+        self.scheduled = False  # True while a tick is pending on the Turtle timer
+
+    def _apply(self, left, right):
+        """Make sure the integration loop is running; the next tick uses the new speeds."""
+        self._changed()
+        if self.is_moving() and not self.scheduled:
+            self.scheduled = True
+            self.turtle_obj.screen.ontimer(self._tick, self.period_ms)
+
+    def _tick(self):
+        """One integration step; reschedules itself only while a wheel is turning."""
+        self.scheduled = False
+        if not self.is_moving():
+            return
+        try:
+            left = self.left_speed * self.step
+            right = self.right_speed * self.step
+            # Turn by half the rotation, move, then the other half: exact for small steps
+            half_turn = math.degrees((right - left) / self.track_width) / 2
+            self.turtle_obj.left(half_turn)
+            self.turtle_obj.forward((left + right) / 2)
+            self.turtle_obj.left(half_turn)
+            self.center_view()  # Keep Turtle in view
+            self._changed()
+        except turtle.TurtleGraphicsError as e:
+            logging.error(f"Error moving turtle: {e}")
+            return
+        self.scheduled = True
+        self.turtle_obj.screen.ontimer(self._tick, self.period_ms)
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def center_view(self):
+        """Center the screen view on the Turtle."""
+        if self.renderer is not None:
+            self.renderer.mark_dirty()  # Re-centred once on the next frame
+            return
+        self.recenter()
+
+    def recenter(self):
+        """Move the world coordinates so the Turtle is in the middle (this redraws the canvas)."""
+        x, y = self.turtle_obj.position()
+        self.turtle_obj.screen.setworldcoordinates(x - 200, y - 200, x + 200, y + 200)
+
+
+class VirtualPiBoard:
+    """Simulates a Raspberry Pi board using Turtle."""
+
+    def __init__(self, fps=30, pan_frames=1, origin=None, mode=None, target=None):
+        # Initialize the Turtle screen
+        self.screen = turtle.Screen()
+        self.screen.title("Virtual Raspberry Pi Board Simulation")
+        self.screen.bgcolor("white")
+        self.last_title = None
+
+        # Binary telemetry instead of printing every step; the console shows one line a second
+        self.telemetry = TelemetryLogger("virtual_pi.tlm", console_interval=1.0)
+
+        # Redraw at a fixed frame rate instead of after every motor step
+        self.renderer = FrameRenderer(self.screen, fps)
+        # Only re-frame the view when the rover gets near the edge
+        self.camera = Camera(self.screen, pan_frames=pan_frames)
+
+        # Initialize the Turtle object representing the rover
+        self.rover = turtle.Turtle()
+        self.rover.color("blue")
+        self.rover.penup()  # Lift the pen to avoid drawing lines
+        self.rover.speed(0)  # Highest speed for immediate response
+
+        # Initialize simulated GPS coordinates. With an origin (lat, lon) the turtle works in
+        # metres on a local tangent plane; without one, lat/lon are turtle units / 10.
+        self.frame = LocalFrame(*origin) if origin is not None else None
+        self.latitude = 0.0
+        self.longitude = 0.0
+        self.target_position = None  # Target in turtle coordinates, worked out once per target
+        self.update_coordinates()  # Initial coordinate display
+
+        # One drive loop moves the Turtle; both wheels are always set together through it
+        self.drive = VirtualDrive(self.rover, renderer=self.renderer, on_change=self.record_telemetry)
+        self.renderer.add_draw_callback(self.follow_rover)
+        self.renderer.start()
+        # Auto mode steers every 0.5 seconds against a fixed deadline, however long a step takes
+        self.auto_loop = ControlLoop(self.screen, self.auto_move, period_ms=500)
+
+        # Set initial mode to manual
+        self.mode = "manual"  # Possible values: "manual", "auto"
+        self.target_latitude = None
+        self.target_longitude = None
+        self.setup_ui(mode, target)
+
+    def setup_ui(self, mode=None, target=None):
+        """Set up UI and key bindings; only prompts for what the arguments leave open."""
+        self.bind_keys()
+        if mode is None and target is None:
+            self.ask_for_mode()  # Ask user to choose mode
+        elif mode == "manual":
+            self.mode = "manual"
+        else:
+            self.mode = "auto"
+            if target is None:
+                self.ask_for_target_location()
+            else:
+                self.set_target(*target)
+
+    def move_forward(self):
+        """Move the rover forward."""
+        if self.mode == "manual":
+            logging.debug("Rover moving forward")
+            self.drive.forward()
+            self.update_coordinates()
+
+    def move_backward(self):
+        """Move the rover backward."""
+        if self.mode == "manual":
+            logging.debug("Rover moving backward")
+            self.drive.backward()
+            self.update_coordinates()
+
+    def turn_left(self):
+        """Simulate turning left."""
+        if self.mode == "manual":
+            logging.debug("Rover turning left")
+            self.rover.left(15)
+            self.update_coordinates()
+            self.record_telemetry()
+
+    def turn_right(self):
+        """Simulate turning right."""
+        if self.mode == "manual":
+            logging.debug("Rover turning right")
+            self.rover.right(15)
+            self.update_coordinates()
+            self.record_telemetry()
+
+    def stop(self):
+        """Stop the rover."""
+        self.drive.stop()
+
+    def record_telemetry(self):
+        """Queue the current pose, mode and motor states for the telemetry log."""
+        x, y = self.rover.position()
+        self.telemetry.record(x, y, math.radians(self.rover.heading()), self.mode,
+                              motor_state(*self.drive.motor_states()))
+
+    def follow_rover(self):
+        """Keep the rover in view; called once per rendered frame."""
+        self.camera.follow(*self.rover.position())
+        if self.camera.is_panning():
+            self.renderer.mark_dirty()  # Keep drawing frames until the pan finishes
+
+    def update_coordinates(self):
+        """Update and display the rover's simulated GPS coordinates."""
+        if self.frame is not None:
+            self.latitude, self.longitude = self.frame.to_geodetic(self.rover.xcor(), self.rover.ycor())
+        else:
+            self.latitude = self.rover.ycor() / 10.0  # Scale factor for simulation
+            self.longitude = self.rover.xcor() / 10.0
+        title = f"Virtual Raspberry Pi Board Simulation - Lat: {self.latitude:.2f}, Lon: {self.longitude:.2f}"
+        if title != self.last_title:  # Only retitle the window when the shown value changes
+            self.last_title = title
+            self.screen.title(title)
+        self.renderer.mark_dirty()
+
+    def bind_keys(self):
+        """Bind arrow keys to rover movement functions and mode switch."""
+        self.screen.listen()
+        self.screen.onkeypress(self.move_forward, "Up")
+        self.screen.onkeyrelease(self.stop, "Up")
+        self.screen.onkeypress(self.move_backward, "Down")
+        self.screen.onkeyrelease(self.stop, "Down")
+        self.screen.onkeypress(self.turn_left, "Left")
+        self.screen.onkeypress(self.turn_right, "Right")
+        self.screen.onkeyrelease(self.stop, "space")
+        self.screen.onkeypress(self.toggle_mode, "m")  # Bind 'm' key to toggle modes
+
+    def toggle_mode(self):
+        """Toggle between manual and automatic modes."""
+        if self.mode == "manual":
+            self.mode = "auto"
+            print("Switched to automatic mode")
+            self.ask_for_target_location()
+        else:
+            self.mode = "manual"
+            print("Switched to manual mode")
+            self.stop()  # Stop the rover when switching to manual mode
+
+    def ask_for_mode(self):
+        """Prompt the user to select the mode."""
+        mode_input = self.screen.textinput("Mode Selection", "Enter mode (manual/auto): ")
+        if mode_input:
+            mode_input = mode_input.strip().lower()
+            if mode_input == "auto":
+                self.mode = "auto"
+                self.ask_for_target_location()
+            else:
+                self.mode = "manual"
+
+    def ask_for_target_location(self):
+        """Prompt the user for target location in automatic mode."""
+        if self.mode == "auto":
+            try:
+                lat_input = self.screen.textinput("Target Location", "Enter target latitude:")
+                lon_input = self.screen.textinput("Target Location", "Enter target longitude:")
+                if lat_input and lon_input:
+                    self.set_target(float(lat_input), float(lon_input))
+                else:
+                    print("Target location inputs cannot be empty.")
+            except ValueError:
+                print("Invalid input. Please enter numeric values for latitude and longitude.")
+
+    def set_target(self, lat, lon):
+        """Set the auto mode target and start driving to it."""
+        self.target_latitude = lat
+        self.target_longitude = lon
+        self.target_position = self.to_turtle_coordinates(self.target_latitude, self.target_longitude)
+        print(f"Target set to Lat: {self.target_latitude}, Lon: {self.target_longitude}")
+        self.start_auto_mode()
+
+    def start_auto_mode(self):
+        """Start automatic mode behavior."""
+        if self.mode == "auto":
+            print("Starting automatic mode")
+            self.auto_loop.start()  # Start automatic movement
+
+    def auto_move(self):
+        """Move the rover automatically towards the target."""
+        try:
+            if self.mode == "auto":
+                distance = self.calculate_distance_to_target()
+                logging.debug("Current Distance to Target: %.2f", distance)
+                if distance > 1.0:  # Adjust the threshold as needed
+                    self.move_towards_target()
+                    self.update_coordinates()  # The renderer shows the new position on its next frame
+                else:
+                    self.auto_loop.stop()
+                    self.stop()  # Stop if the rover is close to the target
+                    print("Reached the target location.")
+                    self.ask_for_mode()  # Ask user to select mode after reaching the target
+        except Exception as e:
+            logging.error(f"Error in automatic mode: {e}")
+            self.auto_loop.stop()
+            self.mode = "manual"  # Switch back to manual mode on error
+
+    def move_towards_target(self):
+        """Move the rover towards the target location."""
+        try:
+            target_x, target_y = self.target_position
+            angle_to_target = self.rover.towards(target_x, target_y)
+            distance = self.calculate_distance_to_target()
+
+            self.rover.setheading(angle_to_target)
+            logging.debug("Moving towards angle: %s, Distance: %.2f", angle_to_target, distance)
+
+            if distance > 1.0:  # Ensure movement while away from the target
+                self.drive.forward()
+            else:
+                self.stop()  # Stop if very close to the target
+        except Exception as e:
+            logging.error(f"Error moving towards target: {e}")
+            self.stop()  # Stop the rover on error
+            self.ask_for_mode()
+
+    def calculate_distance_to_target(self):
+        """Calculate the distance to the target location."""
+        target_x, target_y = self.target_position
+        return math.hypot(target_x - self.rover.xcor(), target_y - self.rover.ycor())
+
+    def to_turtle_coordinates(self, lat, lon):
+        """Convert a target latitude/longitude to turtle x, y."""
+        if self.frame is not None:
+            return self.frame.to_enu(lat, lon)
+        return lon * 10, lat * 10
+
+    def shutdown(self):
+        """Stop the loops and close the telemetry log; the window may already be gone."""
+        self.renderer.stop()
+        self.auto_loop.stop()
+        logging.info("Auto mode control loop: %s", self.auto_loop.report())
+        self.telemetry.close()
+
+    def cleanup(self):
+        """Clean up the Turtle graphics."""
+        self.shutdown()
+        self.screen.bye()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Virtual Raspberry Pi rover board.")
+    parser.add_argument('--mode', choices=('manual', 'auto'), help="mode to start in (default: ask)")
+    parser.add_argument('--target', nargs=2, type=float, metavar=('LAT', 'LON'),
+                        help="target for auto mode; implies --mode auto")
+    parser.add_argument('--origin', nargs=2, type=float, metavar=('LAT', 'LON'),
+                        help="real coordinates of the start point; the turtle then works in metres")
+    parser.add_argument('--fps', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
+    board = VirtualPiBoard(fps=args.fps, origin=args.origin, mode=args.mode, target=args.target)
+    try:
+        turtle.mainloop()
+    finally:
+        board.shutdown()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,164 @@
+import math
+import numpy as np
+
+
+class OccupancyGrid:
+    """World model: a uint8 NumPy grid of blocked cells laid over the rover's x/y plane.
+
+    Cell (i, j) covers x in [origin_x + i * resolution, ...) and y likewise with j,
+    the same convention as GridPlanner. Memory is one byte per cell, fixed at
+    creation (a 10 km x 10 km site at 1 m is 100 MB; at 5 m, 4 MB).
+    Obstacles can be added or cleared at any time; observers are told which block
+    of cells changed so planners can update just that part.
+    """
+
+    def __init__(self, rows, cols, resolution=1.0, origin=(0.0, 0.0), outside_blocked=True):
+        self.cells = np.zeros((rows, cols), dtype=np.uint8)
+        self.rows, self.cols = rows, cols
+        self.resolution = resolution
+        self.origin = origin
+        self.outside_blocked = outside_blocked  # Treat everything off the map as an obstacle
+        self.version = 0
+        self.observers = []  # Called as observer(grid, i0, i1, j0, j1, added) after each change
+
+    def __array__(self, dtype=None, copy=None):
+        return self.cells if dtype is None else self.cells.astype(dtype)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, index):
+        return self.cells[index]
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def memory_bytes(self):
+        return self.cells.nbytes
+
+    # Coordinates
+
+    def world_to_cell(self, x, y):
+        return (int(math.floor((x - self.origin[0]) / self.resolution)),
+                int(math.floor((y - self.origin[1]) / self.resolution)))
+
+    def cell_to_world(self, cell):
+        return (self.origin[0] + (cell[0] + 0.5) * self.resolution,
+                self.origin[1] + (cell[1] + 0.5) * self.resolution)
+
+    # Queries
+
+    def is_blocked_cell(self, i, j):
+        if 0 <= i < self.rows and 0 <= j < self.cols:
+            return bool(self.cells[i, j])
+        return self.outside_blocked
+
+    def is_blocked(self, x, y):
+        return self.is_blocked_cell(*self.world_to_cell(x, y))
+
+    def _blocked_many(self, i, j):
+        """Vectorized cell lookup; cells off the map follow ``outside_blocked``."""
+        inside = (i >= 0) & (i < self.rows) & (j >= 0) & (j < self.cols)
+        result = np.full(i.shape, self.outside_blocked, dtype=bool)
+        result[inside] = self.cells[i[inside], j[inside]] != 0
+        return result
+
+    def _segment_cells(self, x0, y0, x1, y1):
+        """Every cell the segment passes through, in order, as (i, j) index arrays.
+
+        The segment is cut at each grid line it crosses; the midpoint of each piece
+        lies in exactly one cell, so nothing is skipped however short the cells are.
+        """
+        res = self.resolution
+        gx0, gy0 = (x0 - self.origin[0]) / res, (y0 - self.origin[1]) / res
+        gx1, gy1 = (x1 - self.origin[0]) / res, (y1 - self.origin[1]) / res
+        dx, dy = gx1 - gx0, gy1 - gy0
+        cuts = [(0.0, 1.0)]
+        if dx:
+            cuts.append((np.arange(math.floor(min(gx0, gx1)) + 1, math.ceil(max(gx0, gx1))) - gx0) / dx)
+        if dy:
+            cuts.append((np.arange(math.floor(min(gy0, gy1)) + 1, math.ceil(max(gy0, gy1))) - gy0) / dy)
+        t = np.sort(np.concatenate(cuts))  # Repeated cuts only repeat a cell, which is harmless
+        mid = (t[:-1] + t[1:]) * 0.5
+        return np.floor(gx0 + mid * dx).astype(np.intp), np.floor(gy0 + mid * dy).astype(np.intp)
+
+    def segment_blocked(self, x0, y0, x1, y1):
+        """True if any cell between the two points is blocked."""
+        i0, j0 = self.world_to_cell(x0, y0)
+        i1, j1 = self.world_to_cell(x1, y1)
+        low_i, high_i = min(i0, i1), max(i0, i1)
+        low_j, high_j = min(j0, j1), max(j0, j1)
+        if low_i >= 0 and low_j >= 0 and high_i < self.rows and high_j < self.cols:
+            # The segment stays inside its bounding box of cells: if that is clear, so is the path
+            if not self.cells[low_i:high_i + 1, low_j:high_j + 1].any():
+                return False
+        i, j = self._segment_cells(x0, y0, x1, y1)
+        return bool(self._blocked_many(i, j).any())
+
+    def move_blocked(self, x, y, heading, distance):
+        """True if moving ``distance`` along ``heading`` (radians) from (x, y) would hit something."""
+        return self.segment_blocked(x, y, x + math.cos(heading) * distance, y + math.sin(heading) * distance)
+
+    def raycast(self, x, y, heading, max_range):
+        """Distance to the first blocked cell along ``heading``, or ``max_range`` if clear."""
+        end_x, end_y = x + math.cos(heading) * max_range, y + math.sin(heading) * max_range
+        i, j = self._segment_cells(x, y, end_x, end_y)
+        hits = np.flatnonzero(self._blocked_many(i, j))
+        if not len(hits):
+            return max_range
+        # Distance to the near edge of the first blocked cell
+        cx, cy = self.cell_to_world((i[hits[0]], j[hits[0]]))
+        half = self.resolution / 2
+        return max(0.0, min(max_range, math.hypot(cx - x, cy - y) - half))
+
+    def segments_blocked(self, x0, y0, x1, y1):
+        """Batched check for many segments (e.g. a fleet's next moves); returns a bool array.
+
+        Each segment is sampled every quarter cell, which only misses the very
+        corner of a cell a segment clips.
+        """
+        x0, y0, x1, y1 = (np.asarray(a, dtype=float) for a in (x0, y0, x1, y1))
+        length = np.hypot(x1 - x0, y1 - y0)
+        samples = int(np.ceil(length.max(initial=0.0) / self.resolution * 4)) + 1
+        t = np.linspace(0.0, 1.0, samples)
+        xs = x0[:, None] + (x1 - x0)[:, None] * t
+        ys = y0[:, None] + (y1 - y0)[:, None] * t
+        i = np.floor((xs - self.origin[0]) / self.resolution).astype(np.intp)
+        j = np.floor((ys - self.origin[1]) / self.resolution).astype(np.intp)
+        return self._blocked_many(i, j).any(axis=1)
+
+    # Updates
+
+    def _cell_range(self, x0, y0, x1, y1):
+        i0, j0 = self.world_to_cell(min(x0, x1), min(y0, y1))
+        i1, j1 = self.world_to_cell(max(x0, x1), max(y0, y1))
+        return max(i0, 0), min(i1 + 1, self.rows), max(j0, 0), min(j1 + 1, self.cols)
+
+    def set_cells(self, i0, i1, j0, j1, blocked=True):
+        """Mark the block of cells [i0, i1) x [j0, j1) as blocked or free."""
+        if i0 >= i1 or j0 >= j1:
+            return
+        self.cells[i0:i1, j0:j1] = 1 if blocked else 0
+        self.version += 1
+        for observer in self.observers:
+            observer(self, i0, i1, j0, j1, blocked)
+
+    def add_rectangle(self, x0, y0, x1, y1):
+        """Block every cell touched by the rectangle between two world corners."""
+        self.set_cells(*self._cell_range(x0, y0, x1, y1), blocked=True)
+
+    def clear_rectangle(self, x0, y0, x1, y1):
+        self.set_cells(*self._cell_range(x0, y0, x1, y1), blocked=False)
+
+    def add_circle(self, x, y, radius):
+        """Block every cell whose center lies within ``radius`` of (x, y)."""
+        i0, i1, j0, j1 = self._cell_range(x - radius, y - radius, x + radius, y + radius)
+        if i0 >= i1 or j0 >= j1:
+            return
+        cx = self.origin[0] + (np.arange(i0, i1) + 0.5) * self.resolution
+        cy = self.origin[1] + (np.arange(j0, j1) + 0.5) * self.resolution
+        inside = (cx[:, None] - x) ** 2 + (cy[None, :] - y) ** 2 <= radius * radius
+        self.cells[i0:i1, j0:j1][inside] = 1
+        self.version += 1
+        for observer in self.observers:
+            observer(self, i0, i1, j0, j1, True)
@@ -1,139 +1,164 @@
-import turtle
-import math
-from auto_control import AutoControl
-from manual_control import ManualControl
-
-class VirtualPiBoard:
-    def __init__(self):
-        self.motor = turtle.Turtle()
-        self.motor.hideturtle()
-        self.motor.penup()
-        self.position_x = 0
-        self.position_y = 0
-        self.heading = 0  # Angle in radians
-        self.rover = turtle.Turtle()
-        self.rover.shape("turtle")  # Change shape here
-        self.rover.color("blue")
-        self.rover.penup()
-        self.rover.speed(5)  # Increase speed (1 is slowest, 10 is fastest)
-        self.auto_control = AutoControl(self)
-        self.manual_control = ManualControl(self)
-        self.control_mode = 'manual'  # Default mode; will be set by user input
-        self.initial_mode_selection()  # Prompt user for mode at start
-
-    def initial_mode_selection(self):
-        # Prompt the user to select the starting mode
-        mode = turtle.textinput("Select Mode", "Enter 'manual' or 'auto' to start:")
-        if mode and mode.lower() == 'auto':
-            self.set_auto_mode()
-        else:
-            self.set_manual_mode()
-
-    def move_forward(self):
-        move_distance = 1
-        self.position_x += move_distance * math.cos(self.heading)
-        self.position_y += move_distance * math.sin(self.heading)
-        self.update_rover_position()
-
-    def move_backward(self):
-        move_distance = 1
-        self.position_x -= move_distance * math.cos(self.heading)
-        self.position_y -= move_distance * math.sin(self.heading)
-        self.update_rover_position()
-
-    def turn_left(self):
-        self.heading -= math.pi / 8  # Turn 22.5 degrees left
-        self.update_rover_position()
-
-    def turn_right(self):
-        self.heading += math.pi / 8  # Turn 22.5 degrees right
-        self.update_rover_position()
-
-    def stop(self):
-        # Placeholder to manage stop actions if needed
-        pass
-
-    def get_lat_lon(self):
-        # For simplicity, assume x and y directly represent lat and lon
-        return self.position_x, self.position_y
-
-    def adjust_heading(self, angle):
-        self.heading = angle
-        self.update_rover_position()
-
-    def update_rover_position(self):
-        self.rover.setheading(math.degrees(self.heading))
-        self.rover.goto(self.position_x, self.position_y)
-        self.update_screen_title()
-
-    def update_screen_title(self):
-        lat, lon = self.get_lat_lon()
-        turtle.title(f"Rover Simulation - Lat: {lat:.2f}, Lon: {lon:.2f} | Mode: {self.control_mode.capitalize()}")
-
-    def set_auto_mode(self):
-        self.control_mode = 'auto'
-        print("Switched to auto mode")
-        self.prompt_target_location()
-
-    def set_manual_mode(self):
-        # Immediately switch to manual mode and halt any ongoing auto navigation
-        self.control_mode = 'manual'
-        self.auto_control.stop_auto_navigation()  # Stop auto mode actions immediately
-        print("Switched to manual mode")
-
-    def prompt_target_location(self):
-        # Prompt the user to enter target latitude and longitude
-        target_lat = turtle.numinput("Target Location", "Enter target latitude:", default=0)
-        target_lon = turtle.numinput("Target Location", "Enter target longitude:", default=0)
-        if target_lat is not None and target_lon is not None:
-            self.auto_control.set_target(target_lat, target_lon)
-        else:
-            self.set_manual_mode()  # Return to manual mode if the user cancels input
-
-    def handle_auto_completion(self):
-        # Called when the target is reached in auto mode
-        print("Target reached in auto mode.")
-        self.set_manual_mode()  # Set to manual mode after reaching target
-
-def setup_key_bindings(board):
-    turtle.listen()
-    turtle.onkeypress(board.manual_control.move_forward, 'Up')
-    turtle.onkeypress(board.manual_control.move_backward, 'Down')
-    turtle.onkeypress(board.manual_control.turn_left, 'Left')
-    turtle.onkeypress(board.manual_control.turn_right, 'Right')
-    turtle.onkeyrelease(board.manual_control.stop, 'Up')
-    turtle.onkeyrelease(board.manual_control.stop, 'Down')
-    turtle.onkeyrelease(board.manual_control.stop, 'Left')
-    turtle.onkeyrelease(board.manual_control.stop, 'Right')
-    turtle.onkey(board.set_auto_mode, 'a')  # Switch to auto mode
-    turtle.onkey(board.set_manual_mode, 'm')  # Switch to manual mode
-
-def main():
-    screen = turtle.Screen()
-    screen.title("Rover Simulation - Lat: 0.00, Lon: 0.00 | Mode: Manual")
-    screen.bgcolor("white")
-
-    board = VirtualPiBoard()  # Instantiate the virtual board
-
-    setup_key_bindings(board)  # Set up keyboard controls for manual and auto mode switching
-
-    def update():
-        print(board.control_mode)
-
-        # Update based on the current control mode
-        if board.control_mode == 'auto':
-            #print(board.auto_control.target_lat, board.auto_control.target_lon)
-            if board.auto_control.update():  # Update auto mode movement and check if target is reached
-                board.handle_auto_completion()  # Handle reaching the target
-        else:
-            print(board.position_x,board.position_y)
-            board.manual_control.update()  # Update manual mode controls
-
-        screen.ontimer(update, 100)  # Schedule the next update
-
-
-    update()  # Initial update call to start the loop
-    turtle.mainloop()  # Start the turtle main loop
-
-if __name__ == '__main__':
-    main()
+import argparse
+import turtle
+import math
+import logging
+from auto_control import AutoControl
+from manual_control import ManualControl
+
+class VirtualPiBoard:
+    def __init__(self, mode='manual', target=None):
+        self.motor = None  # Turtles are only created by open_view(), so a headless board needs no display
+        self.rover = None
+        self.position_x = 0
+        self.position_y = 0
+        self.heading = 0  # Angle in radians
+        self.auto_control = AutoControl(self)
+        self.manual_control = ManualControl(self)
+        self.control_mode = mode
+        if target is not None:
+            self.auto_control.set_target(*target)
+
+    def open_view(self):
+        # Create the turtles on first use and show the current position
+        if self.rover is None:
+            self.motor = turtle.Turtle()
+            self.motor.hideturtle()
+            self.motor.penup()
+            self.rover = turtle.Turtle()
+            self.rover.shape("turtle")  # Change shape here
+            self.rover.color("blue")
+            self.rover.penup()
+            self.rover.speed(5)  # Increase speed (1 is slowest, 10 is fastest)
+            self.update_rover_position()
+
+    def initial_mode_selection(self):
+        # Prompt the user to select the starting mode
+        mode = turtle.textinput("Select Mode", "Enter 'manual' or 'auto' to start:")
+        if mode and mode.lower() == 'auto':
+            self.set_auto_mode()
+        else:
+            self.set_manual_mode()
+
+    def move_forward(self):
+        move_distance = 1
+        self.position_x += move_distance * math.cos(self.heading)
+        self.position_y += move_distance * math.sin(self.heading)
+        self.update_rover_position()
+
+    def move_backward(self):
+        move_distance = 1
+        self.position_x -= move_distance * math.cos(self.heading)
+        self.position_y -= move_distance * math.sin(self.heading)
+        self.update_rover_position()
+
+    def turn_left(self):
+        self.heading -= math.pi / 8  # Turn 22.5 degrees left
+        self.update_rover_position()
+
+    def turn_right(self):
+        self.heading += math.pi / 8  # Turn 22.5 degrees right
+        self.update_rover_position()
+
+    def stop(self):
+        # Placeholder to manage stop actions if needed
+        pass
+
+    def get_lat_lon(self):
+        # For simplicity, assume x and y directly represent lat and lon
+        return self.position_x, self.position_y
+
+    def adjust_heading(self, angle):
+        self.heading = angle
+        self.update_rover_position()
+
+    def update_rover_position(self):
+        if self.rover is None:
+            return  # Headless: nothing to draw
+        self.rover.setheading(math.degrees(self.heading))
+        self.rover.goto(self.position_x, self.position_y)
+        self.update_screen_title()
+
+    def update_screen_title(self):
+        lat, lon = self.get_lat_lon()
+        turtle.title(f"Rover Simulation - Lat: {lat:.2f}, Lon: {lon:.2f} | Mode: {self.control_mode.capitalize()}")
+
+    def set_auto_mode(self):
+        self.control_mode = 'auto'
+        print("Switched to auto mode")
+        self.prompt_target_location()
+
+    def set_manual_mode(self):
+        # Immediately switch to manual mode and halt any ongoing auto navigation
+        self.control_mode = 'manual'
+        self.auto_control.stop_auto_navigation()  # Stop auto mode actions immediately
+        print("Switched to manual mode")
+
+    def prompt_target_location(self):
+        # Prompt the user to enter target latitude and longitude
+        target_lat = turtle.numinput("Target Location", "Enter target latitude:", default=0)
+        target_lon = turtle.numinput("Target Location", "Enter target longitude:", default=0)
+        if target_lat is not None and target_lon is not None:
+            self.auto_control.set_target(target_lat, target_lon)
+        else:
+            self.set_manual_mode()  # Return to manual mode if the user cancels input
+
+    def handle_auto_completion(self):
+        # Called when the target is reached in auto mode
+        print("Target reached in auto mode.")
+        self.set_manual_mode()  # Set to manual mode after reaching target
+
+def setup_key_bindings(board):
+    turtle.listen()
+    turtle.onkeypress(board.manual_control.move_forward, 'Up')
+    turtle.onkeypress(board.manual_control.move_backward, 'Down')
+    turtle.onkeypress(board.manual_control.turn_left, 'Left')
+    turtle.onkeypress(board.manual_control.turn_right, 'Right')
+    turtle.onkeyrelease(board.manual_control.stop, 'Up')
+    turtle.onkeyrelease(board.manual_control.stop, 'Down')
+    turtle.onkeyrelease(board.manual_control.stop, 'Left')
+    turtle.onkeyrelease(board.manual_control.stop, 'Right')
+    turtle.onkey(board.set_auto_mode, 'a')  # Switch to auto mode
+    turtle.onkey(board.set_manual_mode, 'm')  # Switch to manual mode
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rover simulation with a turtle view.")
+    parser.add_argument('--mode', choices=('manual', 'auto'), help="mode to start in (default: ask)")
+    parser.add_argument('--target', nargs=2, type=float, metavar=('LAT', 'LON'),
+                        help="target for auto mode; implies --mode auto")
+    args = parser.parse_args(argv)
+    if args.target is not None:
+        args.mode = 'auto'
+
+    screen = turtle.Screen()
+    screen.title("Rover Simulation - Lat: 0.00, Lon: 0.00 | Mode: Manual")
+    screen.bgcolor("white")
+
+    board = VirtualPiBoard(mode=args.mode or 'manual', target=args.target)  # Instantiate the virtual board
+    board.open_view()
+    if args.mode is None:
+        board.initial_mode_selection()  # Prompt user for mode at start
+    elif args.mode == 'auto' and args.target is None:
+        board.prompt_target_location()
+
+    setup_key_bindings(board)  # Set up keyboard controls for manual and auto mode switching
+
+    def update():
+        logging.debug("Mode: %s", board.control_mode)
+
+        # Update based on the current control mode
+        if board.control_mode == 'auto':
+            #print(board.auto_control.target_lat, board.auto_control.target_lon)
+            if board.auto_control.update():  # Update auto mode movement and check if target is reached
+                board.handle_auto_completion()  # Handle reaching the target
+        else:
+            logging.debug("Position: %s, %s", board.position_x, board.position_y)
+            board.manual_control.update()  # Update manual mode controls
+
+        screen.ontimer(update, 100)  # Schedule the next update
+
+
+    update()  # Initial update call to start the loop
+    turtle.mainloop()  # Start the turtle main loop
+
+if __name__ == '__main__':
+    main()